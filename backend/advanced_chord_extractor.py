@@ -1,8 +1,25 @@
-import music21
-import numpy as np
 from collections import Counter
+import hashlib
 import json
 import os
+import tempfile
+from backend import metrics, midi_reader
+
+# music21 e NumPy são importados sob demanda: só a leitura de arquivos pelo
+# music21 (_extract_notes) e o motor 'numpy' os usam, e importá-los custa
+# centenas de milissegundos na inicialização dos processos
+
+# Nomes das classes de altura (0-11), iguais a music21.pitch.Pitch(midi=p).name
+PITCH_CLASS_NAMES = ['C', 'C#', 'D', 'E-', 'E', 'F', 'F#', 'G', 'G#', 'A', 'B-', 'B']
+
+# Versão do formato/algoritmo da tabela de consulta de acordes; alterar invalida o cache em disco
+CHORD_LOOKUP_VERSION = 1
+
+# Versão do algoritmo de extração; entra na chave do cache de análises (chord_cache)
+EXTRACTOR_VERSION = 1
+
+# Tabelas já construídas neste processo, por hash do banco de acordes
+_chord_lookup_cache = {}
 
 class AdvancedChordExtractor:
     """
@@ -10,28 +27,57 @@ class AdvancedChordExtractor:
     inspirada nas técnicas do MidiVoyager e Musicca.
     """
     
-    def __init__(self, chord_db_path=None):
+    def __init__(self, chord_db_path=None, engine='sweep'):
         """
         Inicializa o extrator de acordes avançado.
         
         Args:
             chord_db_path (str, optional): Caminho para o banco de dados de progressões harmônicas
+            engine (str): Motor de varredura das janelas: 'sweep' (Python puro) ou
+                          'numpy' (piano-roll vetorizado, indicado para reanálise em lote)
         """
+        if engine not in ('sweep', 'numpy'):
+            raise ValueError(f"Motor de extração desconhecido: {engine}")
+        
+        self.engine = engine
         self.chord_db_path = chord_db_path
+        self.chord_db_hash = None
         self.chord_db = self._load_chord_db()
         
+        # Tabela de consulta: máscara de classes de altura (12 bits) -> melhor acorde
+        self.chord_lookup = self._load_chord_lookup()
+        
+        # Matriz de modelos de acorde do motor 'numpy', construída sob demanda
+        self._chord_templates = None
+        
         # Configurações para análise de acordes
         self.min_notes_for_chord = 2  # Mínimo de notas para considerar um acorde
         self.time_window = 0.25       # Janela de tempo para agrupar notas (em quartos de nota)
         self.confidence_threshold = 0.6  # Limiar de confiança para identificação de acordes
         
+    def cache_settings(self):
+        """
+        Versão e configurações que determinam o resultado da extração.
+        
+        Returns:
+            dict: Parâmetros para chord_cache.cache_key
+        """
+        return {
+            'extractor': 'advanced',
+            'version': EXTRACTOR_VERSION,
+            'time_window': self.time_window,
+            'confidence_threshold': self.confidence_threshold,
+            'min_notes_for_chord': self.min_notes_for_chord,
+            'chord_db_hash': self.chord_db_hash
+        }
+    
     def _load_chord_db(self):
         """
         Carrega o banco de dados de progressões harmônicas.
         """
         if not self.chord_db_path or not os.path.exists(self.chord_db_path):
             # Banco de dados padrão se nenhum for fornecido
-            return {
+            chord_db = {
                 "progressions": {
                     "pop": [
                         ["C", "G", "Am", "F"],
@@ -61,97 +107,511 @@ class AdvancedChordExtractor:
                     "sus2": [0, 2, 7]
                 }
             }
+            self.chord_db_hash = hashlib.sha256(
+                json.dumps(chord_db, sort_keys=True).encode('utf-8')).hexdigest()
+            return chord_db
         
         try:
-            with open(self.chord_db_path, 'r') as f:
-                return json.load(f)
+            with open(self.chord_db_path, 'rb') as f:
+                content = f.read()
+            self.chord_db_hash = hashlib.sha256(content).hexdigest()
+            return json.loads(content)
         except Exception as e:
             print(f"Erro ao carregar banco de dados de acordes: {e}")
             return {}
     
+    def _chord_lookup_path(self):
+        """
+        Caminho do cache em disco da tabela de consulta, ao lado do banco de acordes.
+        """
+        if not self.chord_db_path or not self.chord_db_hash:
+            return None
+        return os.path.splitext(self.chord_db_path)[0] + '_lookup.json'
+    
+    def _load_chord_lookup(self):
+        """
+        Carrega a tabela de consulta de acordes do cache em disco ou a reconstrói
+        quando o banco de acordes mudou desde a última construção.
+        
+        Returns:
+            list: 4096 entradas (root, tipo, pontuação) ou None, indexadas pela
+                  máscara de bits das classes de altura presentes
+        """
+        if self.chord_db_hash in _chord_lookup_cache:
+            return _chord_lookup_cache[self.chord_db_hash]
+        
+        lookup_path = self._chord_lookup_path()
+        
+        if lookup_path and os.path.exists(lookup_path):
+            try:
+                with open(lookup_path, 'r') as f:
+                    cached = json.load(f)
+                if (cached.get('version') == CHORD_LOOKUP_VERSION and
+                        cached.get('chord_db_hash') == self.chord_db_hash and
+                        len(cached.get('table', [])) == 4096):
+                    table = [tuple(entry) if entry else None for entry in cached['table']]
+                    _chord_lookup_cache[self.chord_db_hash] = table
+                    return table
+            except Exception as e:
+                print(f"Erro ao ler tabela de acordes em cache: {e}")
+        
+        table = self._build_chord_lookup()
+        if self.chord_db_hash:
+            _chord_lookup_cache[self.chord_db_hash] = table
+        
+        if lookup_path:
+            # Escrita atômica: outro processo nunca lê um arquivo pela metade
+            try:
+                fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(lookup_path) or '.', suffix='.tmp')
+                os.chmod(tmp_path, 0o644)
+                with os.fdopen(fd, 'w') as f:
+                    json.dump({
+                        'version': CHORD_LOOKUP_VERSION,
+                        'chord_db_hash': self.chord_db_hash,
+                        'table': table
+                    }, f)
+                os.replace(tmp_path, lookup_path)
+            except Exception as e:
+                print(f"Erro ao salvar tabela de acordes em cache: {e}")
+        
+        return table
+    
+    def _build_chord_lookup(self):
+        """
+        Pontua todos os 4096 conjuntos de classes de altura contra todos os tipos de
+        acorde do banco, para as 12 fundamentais possíveis.
+        
+        O limiar de confiança não entra na tabela: o primeiro par (fundamental, tipo)
+        com a maior pontuação é o mesmo com ou sem o limiar, que é aplicado na consulta.
+        
+        Returns:
+            list: 4096 entradas (root, tipo, pontuação) ou None
+        """
+        chord_types = list(self.chord_db.get("chord_types", {}).items())
+        
+        # Cada conjunto normalizado (fundamental em 0) é a rotação de algum outro
+        # conjunto, então cada um é pontuado uma única vez contra todos os tipos
+        scores = [None] * 4096
+        for mask in range(1, 4096):
+            normalized = [pc for pc in range(12) if mask >> pc & 1]
+            scores[mask] = [self._calculate_match_score(normalized, intervals)
+                            for _, intervals in chord_types]
+        
+        table = [None] * 4096
+        for mask in range(1, 4096):
+            best_match = None
+            best_score = -1
+            for root in range(12):
+                # Rotacionar a máscara para que a fundamental seja 0
+                normalized_mask = ((mask >> root) | (mask << (12 - root))) & 0xFFF
+                for (chord_type, _), score in zip(chord_types, scores[normalized_mask]):
+                    if score > best_score:
+                        best_score = score
+                        best_match = (root, chord_type, score)
+            
+            table[mask] = best_match
+        
+        return table
+    
     def extract_chords(self, midi_file_path):
         """
         Extrai acordes de um arquivo MIDI usando técnicas avançadas.
         
         Args:
-            midi_file_path (str): Caminho para o arquivo MIDI
+            midi_file_path (str | NoteTable): Caminho para o arquivo MIDI ou tabela de
+                notas já lida por midi_reader.read_midi (evita o music21)
             
         Returns:
-            list: Lista de acordes extraídos com tempos e durações
+            list: Lista de acordes extraídos; 'time', 'start', 'end' e 'duration' em
+                  milissegundos (pelo mapa de andamentos do arquivo) e 'start_beat' /
+                  'end_beat' em quartos de nota
         """
         try:
-            # Carregar o arquivo MIDI
-            midi = music21.converter.parse(midi_file_path)
+            # Carregar o arquivo MIDI e extrair todas as notas
+            with metrics.stage('extractor.notes'):
+                if isinstance(midi_file_path, midi_reader.NoteTable):
+                    all_notes = self._notes_from_table(midi_file_path)
+                    tempo_map = midi_file_path.tempo_map
+                else:
+                    all_notes = self._extract_notes(midi_file_path)
+                    tempo_map = self._read_tempo_map(midi_file_path)
             
-            # Extrair todas as notas
-            all_notes = []
-            for part in midi.parts:
-                for note in part.flat.notes:
-                    if isinstance(note, music21.note.Note):
+            # Extrair acordes em cada janela de tempo
+            with metrics.stage('extractor.scan'):
+                if self.engine == 'numpy':
+                    chords = self._scan_windows_numpy(all_notes)
+                else:
+                    chords = self._scan_windows(all_notes)
+            
+            with metrics.stage('extractor.postprocess'):
+                # Pós-processamento: combinar acordes idênticos consecutivos
+                combined_chords = self._combine_consecutive_chords(chords)
+                
+                # Pós-processamento: aplicar conhecimento de progressões harmônicas
+                refined_chords = self._refine_with_progressions(combined_chords)
+                
+                # Converter os tempos de quartos de nota para milissegundos
+                return self._to_milliseconds(refined_chords, tempo_map)
+            
+        except Exception as e:
+            print(f"Erro ao extrair acordes: {e}")
+            return []
+    
+    def _extract_notes(self, midi_file_path):
+        """
+        Carrega um arquivo MIDI e devolve todas as notas de todas as partes.
+        
+        Args:
+            midi_file_path (str): Caminho para o arquivo MIDI
+            
+        Returns:
+            list: Notas com 'pitch', 'start', 'duration' e 'end' (em quartos de nota)
+        """
+        import music21
+        
+        midi = music21.converter.parse(midi_file_path)
+        
+        all_notes = []
+        for part in midi.parts:
+            for note in part.flat.notes:
+                if isinstance(note, music21.note.Note):
+                    all_notes.append({
+                        'pitch': note.pitch.midi,
+                        'start': note.offset,
+                        'duration': note.duration.quarterLength,
+                        'end': note.offset + note.duration.quarterLength
+                    })
+                elif isinstance(note, music21.chord.Chord):
+                    for pitch in note.pitches:
                         all_notes.append({
-                            'pitch': note.pitch.midi,
+                            'pitch': pitch.midi,
                             'start': note.offset,
                             'duration': note.duration.quarterLength,
                             'end': note.offset + note.duration.quarterLength
                         })
-                    elif isinstance(note, music21.chord.Chord):
-                        for pitch in note.pitches:
-                            all_notes.append({
-                                'pitch': pitch.midi,
-                                'start': note.offset,
-                                'duration': note.duration.quarterLength,
-                                'end': note.offset + note.duration.quarterLength
-                            })
+        
+        return all_notes
+    
+    def _notes_from_table(self, note_table):
+        """
+        Converte uma tabela de notas do midi_reader para o formato de _extract_notes.
+        
+        As notas do canal de percussão são ignoradas, como no music21, que as lê
+        como notas sem altura definida.
+        
+        Args:
+            note_table (NoteTable): Tabela de notas
             
-            # Ordenar notas por tempo de início
-            all_notes.sort(key=lambda x: x['start'])
+        Returns:
+            list: Notas com 'pitch', 'start', 'duration' e 'end' (em quartos de nota)
+        """
+        if note_table.ticks_per_beat:
+            starts, ends, scale = note_table.start_tick, note_table.end_tick, note_table.ticks_per_beat
+        else:
+            # Divisão SMPTE: sem semínima definida, usa-se 500 ms (120 BPM) por quarto
+            starts, ends, scale = note_table.start_ms, note_table.end_ms, 500.0
+        
+        all_notes = []
+        for pitch, channel, start, end in zip(note_table.pitch, note_table.channel, starts, ends):
+            if channel == midi_reader.PERCUSSION_CHANNEL:
+                continue
+            start = start / scale
+            end = end / scale
+            all_notes.append({
+                'pitch': pitch,
+                'start': start,
+                'duration': end - start,
+                'end': end
+            })
+        
+        return all_notes
+    
+    def _read_tempo_map(self, midi_file_path):
+        """
+        Lê apenas o mapa de andamentos do arquivo, com o leitor leve.
+        
+        Args:
+            midi_file_path (str): Caminho para o arquivo MIDI
             
-            # Encontrar todos os tempos únicos onde acordes podem começar ou terminar
-            unique_times = sorted(list(set([note['start'] for note in all_notes] + 
-                                          [note['end'] for note in all_notes])))
+        Returns:
+            TempoMap: Mapa de andamentos (120 BPM se o arquivo não puder ser lido)
+        """
+        try:
+            return midi_reader.read_midi(midi_file_path).tempo_map
+        except (OSError, midi_reader.MidiFormatError) as e:
+            print(f"Erro ao ler mapa de andamentos: {e}")
+            return midi_reader.TempoMap(ticks_per_beat=480)
+    
+    def _to_milliseconds(self, chords, tempo_map):
+        """
+        Converte os tempos dos acordes de quartos de nota para milissegundos.
+        
+        Args:
+            chords (list): Acordes com 'start' e 'end' em quartos de nota
+            tempo_map (TempoMap): Mapa de andamentos do arquivo
             
-            # Extrair acordes em cada janela de tempo
-            chords = []
-            for i in range(len(unique_times) - 1):
-                start_time = unique_times[i]
-                end_time = unique_times[i+1]
-                
-                # Pular janelas muito pequenas
-                if end_time - start_time < self.time_window:
-                    continue
-                
-                # Encontrar notas ativas nesta janela de tempo
-                active_notes = []
-                for note in all_notes:
-                    if note['start'] <= start_time and note['end'] > start_time:
-                        active_notes.append(note['pitch'])
-                
-                # Remover duplicatas e ordenar
-                active_notes = sorted(list(set(active_notes)))
-                
-                # Pular se não houver notas suficientes para um acorde
-                if len(active_notes) < self.min_notes_for_chord:
-                    continue
-                
-                # Identificar o acorde
-                chord_info = self._identify_chord(active_notes)
-                if chord_info:
-                    chord_info['start'] = start_time
-                    chord_info['end'] = end_time
-                    chord_info['duration'] = end_time - start_time
-                    chords.append(chord_info)
+        Returns:
+            list: Os mesmos acordes, com 'time', 'start', 'end' e 'duration' em
+                  milissegundos e as posições originais em 'start_beat' / 'end_beat'
+        """
+        for chord in chords:
+            start_ms = round(tempo_map.quarters_to_ms(chord['start']))
+            end_ms = round(tempo_map.quarters_to_ms(chord['end']))
             
-            # Pós-processamento: combinar acordes idênticos consecutivos
-            combined_chords = self._combine_consecutive_chords(chords)
+            chord['start_beat'] = float(chord['start'])
+            chord['end_beat'] = float(chord['end'])
+            chord['time'] = start_ms
+            chord['start'] = start_ms
+            chord['end'] = end_ms
+            chord['duration'] = end_ms - start_ms
+        
+        return chords
+    
+    def _scan_windows(self, all_notes):
+        """
+        Identifica os acordes de cada janela entre tempos consecutivos de início/fim
+        de nota usando uma varredura (sweep line).
+        
+        Os eventos de início e fim são processados em ordem enquanto um multiconjunto
+        de alturas ativas é mantido, de modo que o custo total é O(n log n) em vez de
+        reexaminar todas as notas em cada janela.
+        
+        Args:
+            all_notes (list): Notas com 'pitch', 'start' e 'end'
             
-            # Pós-processamento: aplicar conhecimento de progressões harmônicas
-            refined_chords = self._refine_with_progressions(combined_chords)
+        Returns:
+            list: Acordes identificados por janela, ainda não combinados
+        """
+        # Eventos de início e de fim, cada um em ordem de tempo
+        starts = sorted(all_notes, key=lambda x: x['start'])
+        ends = sorted(all_notes, key=lambda x: x['end'])
+        
+        # Encontrar todos os tempos únicos onde acordes podem começar ou terminar
+        unique_times = sorted(set([note['start'] for note in all_notes] + 
+                                  [note['end'] for note in all_notes]))
+        
+        # Multiconjunto de alturas ativas: altura MIDI -> número de notas soando
+        active = Counter()
+        start_index = 0
+        end_index = 0
+        
+        chords = []
+        for i in range(len(unique_times) - 1):
+            start_time = unique_times[i]
+            end_time = unique_times[i+1]
             
-            return refined_chords
+            # Uma nota está ativa na janela se start <= start_time < end.
+            # Como start <= end, toda nota removida aqui já foi adicionada.
+            while start_index < len(starts) and starts[start_index]['start'] <= start_time:
+                active[starts[start_index]['pitch']] += 1
+                start_index += 1
+            while end_index < len(ends) and ends[end_index]['end'] <= start_time:
+                pitch = ends[end_index]['pitch']
+                active[pitch] -= 1
+                if not active[pitch]:
+                    del active[pitch]
+                end_index += 1
             
-        except Exception as e:
-            print(f"Erro ao extrair acordes: {e}")
+            # Pular janelas muito pequenas
+            if end_time - start_time < self.time_window:
+                continue
+            
+            # Pular se não houver notas suficientes para um acorde
+            if len(active) < self.min_notes_for_chord:
+                continue
+            
+            # Identificar o acorde
+            chord_info = self._identify_chord(sorted(active))
+            if chord_info:
+                chord_info['start'] = start_time
+                chord_info['end'] = end_time
+                chord_info['duration'] = end_time - start_time
+                chords.append(chord_info)
+        
+        return chords
+    
+    def _scan_windows_numpy(self, all_notes):
+        """
+        Equivalente vetorizado de _scan_windows.
+        
+        Monta um piano-roll (janelas × 128 alturas) das notas ativas no início de cada
+        janela, reduz para cromas de 12 classes de altura e pontua todos os cromas
+        distintos contra todos os modelos de acorde com uma única multiplicação de
+        matrizes. As pontuações reproduzem _calculate_match_score exatamente.
+        
+        Args:
+            all_notes (list): Notas com 'pitch', 'start' e 'end'
+            
+        Returns:
+            list: Acordes identificados por janela, ainda não combinados
+        """
+        import numpy as np
+        
+        if not all_notes:
             return []
+        
+        # Os tempos originais (float ou Fraction do music21) são preservados na saída
+        unique_times = sorted(set([note['start'] for note in all_notes] + 
+                                  [note['end'] for note in all_notes]))
+        times = np.array(unique_times, dtype=np.float64)
+        
+        # Janelas que não são pequenas demais, identificadas pelo índice do tempo inicial
+        windows = np.flatnonzero(np.diff(times) >= self.time_window)
+        if len(windows) == 0:
+            return []
+        
+        pitches = np.array([note['pitch'] for note in all_notes], dtype=np.int64)
+        start_index = np.searchsorted(times, np.array([note['start'] for note in all_notes], dtype=np.float64))
+        end_index = np.searchsorted(times, np.array([note['end'] for note in all_notes], dtype=np.float64))
+        
+        # Piano-roll: a altura p está ativa na janela i se alguma nota com start <= t_i < end
+        piano_roll = np.zeros((len(windows), 128), dtype=bool)
+        for pitch in np.unique(pitches):
+            selected = pitches == pitch
+            started = np.searchsorted(np.sort(start_index[selected]), windows, side='right')
+            ended = np.searchsorted(np.sort(end_index[selected]), windows, side='right')
+            piano_roll[:, pitch] = started > ended
+        
+        note_counts = piano_roll.sum(axis=1)
+        candidates = np.flatnonzero(note_counts >= self.min_notes_for_chord)
+        if len(candidates) == 0:
+            return []
+        
+        # Croma: classes de altura presentes em cada janela candidata
+        chroma = np.zeros((len(candidates), 12), dtype=bool)
+        for pc in range(12):
+            chroma[:, pc] = piano_roll[candidates, pc::12].any(axis=1)
+        
+        # Só existem 4096 cromas possíveis; cada croma distinto é pontuado uma vez
+        masks = chroma @ (1 << np.arange(12))
+        unique_masks, inverse = np.unique(masks, return_inverse=True)
+        unique_chroma = ((unique_masks[:, None] >> np.arange(12)) & 1).astype(np.float64)
+        
+        best_index, best_score = self._score_chroma(unique_chroma)
+        best_index = best_index[inverse]
+        best_score = best_score[inverse]
+        
+        rows = np.flatnonzero(best_score >= self.confidence_threshold)
+        if len(rows) == 0:
+            return []
+        
+        # Nome e tipo de cada modelo (fundamental, tipo), na ordem das colunas
+        chord_types = list(self.chord_db.get("chord_types", {}))
+        templates = []
+        for root in range(12):
+            for chord_type in chord_types:
+                root_note = PITCH_CLASS_NAMES[root]
+                templates.append((root_note, chord_type, self._format_chord_name(root_note, chord_type)))
+        
+        # Nomes das notas calculados uma vez por conjunto distinto de alturas ativas
+        # (cada linha do piano-roll vira uma chave de 128 bits)
+        active_rows = piano_roll[candidates[rows]]
+        row_keys = np.ascontiguousarray(np.packbits(active_rows, axis=1)).view('V16').ravel()
+        _, first_row, row_index = np.unique(row_keys, return_index=True, return_inverse=True)
+        distinct_row, distinct_pitch = np.nonzero(active_rows[first_row])
+        all_names = [PITCH_CLASS_NAMES[pc] for pc in (distinct_pitch % 12).tolist()]
+        bounds = np.searchsorted(distinct_row, np.arange(len(first_row) + 1)).tolist()
+        note_names = [all_names[bounds[i]:bounds[i + 1]] for i in range(len(first_row))]
+        
+        chords = []
+        for window, template_index, score, names_index in zip(
+                windows[candidates[rows]].tolist(), best_index[rows].tolist(),
+                best_score[rows].tolist(), row_index.reshape(-1).tolist()):
+            start_time = unique_times[window]
+            end_time = unique_times[window + 1]
+            root_note, chord_type, name = templates[template_index]
+            
+            # Mesmo arredondamento de _calculate_match_score: max(0, min(1, score))
+            if score >= 1:
+                score = 1
+            elif score <= 0:
+                score = 0
+            
+            chords.append({
+                'root': root_note,
+                'type': chord_type,
+                'name': name,
+                'notes': list(note_names[names_index]),
+                'confidence': score,
+                'start': start_time,
+                'end': end_time,
+                'duration': end_time - start_time
+            })
+        
+        return chords
+    
+    def _score_chroma(self, chroma):
+        """
+        Pontua cromas contra todos os pares (fundamental, tipo de acorde).
+        
+        Args:
+            chroma (np.ndarray): Matriz (n × 12) de 0/1 com as classes de altura presentes
+            
+        Returns:
+            tuple: (índice do melhor modelo, melhor pontuação) para cada linha; o índice
+                   é fundamental * número de tipos + posição do tipo em chord_types
+        """
+        import numpy as np
+        
+        if self._chord_templates is None:
+            self._chord_templates = self._build_chord_templates()
+        weights, lengths = self._chord_templates
+        template_count = len(lengths)
+        
+        if template_count == 0:
+            return np.zeros(len(chroma), dtype=np.int64), np.full(len(chroma), -1.0)
+        
+        # Uma multiplicação: intervalos presentes (com multiplicidade) e notas do acorde
+        products = chroma @ weights
+        matches = products[:, :template_count]
+        chord_tones = products[:, template_count:]
+        
+        pitch_class_count = chroma.sum(axis=1)[:, None]
+        non_chord_tones = pitch_class_count - chord_tones
+        
+        # Mesma ordem de operações de _calculate_match_score para resultados idênticos
+        with np.errstate(divide='ignore', invalid='ignore'):
+            scores = (matches / lengths) - (0.2 * non_chord_tones / pitch_class_count)
+        scores = np.clip(scores, 0, 1)
+        scores[:, lengths == 0] = 0
+        
+        # argmax devolve o primeiro máximo, como a comparação estrita do laço original
+        best_index = scores.argmax(axis=1)
+        best_score = scores[np.arange(len(scores)), best_index]
+        return best_index, best_score
+    
+    def _build_chord_templates(self):
+        """
+        Monta a matriz de modelos (12 × 2K) para os K pares (fundamental, tipo).
+        
+        As primeiras K colunas contam cada intervalo do tipo (com repetições), como a
+        contagem de correspondências; as K seguintes marcam as classes de altura que
+        pertencem ao acorde, usadas para contar as notas estranhas. Intervalos a partir
+        de 12 (9ª, 11ª, 13ª) nunca coincidem com uma classe normalizada, como no laço original.
+        
+        Returns:
+            tuple: (matriz de pesos, vetor com o número de intervalos de cada modelo)
+        """
+        import numpy as np
+        
+        chord_types = list(self.chord_db.get("chord_types", {}).values())
+        template_count = 12 * len(chord_types)
+        
+        weights = np.zeros((12, 2 * template_count), dtype=np.float64)
+        lengths = np.zeros(template_count, dtype=np.float64)
+        
+        for root in range(12):
+            for type_index, intervals in enumerate(chord_types):
+                k = root * len(chord_types) + type_index
+                lengths[k] = len(intervals)
+                for interval in intervals:
+                    if 0 <= interval < 12:
+                        weights[(root + interval) % 12, k] += 1
+                for interval in set(intervals):
+                    if 0 <= interval < 12:
+                        weights[(root + interval) % 12, template_count + k] = 1
+        
+        return weights, lengths
     
     def _identify_chord(self, pitches):
         """
@@ -166,36 +626,24 @@ class AdvancedChordExtractor:
         if not pitches or len(pitches) < self.min_notes_for_chord:
             return None
         
-        # Converter pitches MIDI para classes de altura (0-11)
-        pitch_classes = [p % 12 for p in pitches]
-        pitch_classes = sorted(list(set(pitch_classes)))  # Remover duplicatas
+        # Máscara de bits das classes de altura (0-11) presentes
+        mask = 0
+        for p in pitches:
+            mask |= 1 << (p % 12)
         
-        # Tentar todas as possíveis notas fundamentais
-        best_match = None
-        best_score = -1
+        entry = self.chord_lookup[mask]
+        if entry is None or entry[2] < self.confidence_threshold:
+            return None
         
-        for root in range(12):
-            # Normalizar para que a fundamental seja 0
-            normalized = [(pc - root) % 12 for pc in pitch_classes]
-            normalized.sort()
-            
-            # Verificar correspondência com cada tipo de acorde
-            for chord_type, intervals in self.chord_db.get("chord_types", {}).items():
-                # Calcular pontuação de correspondência
-                score = self._calculate_match_score(normalized, intervals)
-                
-                if score > best_score and score >= self.confidence_threshold:
-                    best_score = score
-                    root_note = music21.pitch.Pitch(midi=root).name
-                    best_match = {
-                        'root': root_note,
-                        'type': chord_type,
-                        'name': self._format_chord_name(root_note, chord_type),
-                        'notes': [music21.pitch.Pitch(midi=p).name for p in pitches],
-                        'confidence': score
-                    }
-        
-        return best_match
+        root, chord_type, score = entry
+        root_note = PITCH_CLASS_NAMES[root]
+        return {
+            'root': root_note,
+            'type': chord_type,
+            'name': self._format_chord_name(root_note, chord_type),
+            'notes': [PITCH_CLASS_NAMES[p % 12] for p in pitches],
+            'confidence': score
+        }
     
     def _calculate_match_score(self, normalized_pitches, chord_intervals):
         """
@@ -379,5 +827,14 @@ class AdvancedChordExtractor:
                     if key_chord.startswith(chord_root):
                         # Verificar compatibilidade de tipo
                         if ('m' in key_chord and 'm' in chord_type) or ('dim' in key_chord and 'dim' in chord_type) or \
-                           ('m' not in key_chord and 'dim' not in key_chord and 'm' not in cho
-(Content truncated due to size limit. Use line ranges to read in chunks)
\ No newline at end of file
+                           ('m' not in key_chord and 'dim' not in key_chord and 'm' not in chord_type and 'dim' not in chord_type):
+                            matches += 1
+                            break
+            
+            key_matches[key] = matches
+        
+        # Selecionar a tonalidade com mais correspondências
+        best_key, best_matches = max(key_matches.items(), key=lambda x: x[1])
+        confidence = best_matches / len(chord_names)
+        
+        return {"key": best_key, "confidence": confidence}
@@ -0,0 +1,128 @@
+"""
+Alinhamento entre a letra e os acordes de uma música.
+
+A letra e os acordes chegam como duas listas ordenadas por tempo. O
+alinhamento junta as duas linhas do tempo uma única vez, com dois ponteiros:
+cada linha da letra fica com os acordes que começam dentro do seu intervalo
+(do seu tempo até o tempo da próxima linha), cada acorde com a posição do
+caractere sobre o qual deve ser desenhado e, quando a linha tem marcas de
+palavra, o índice da palavra. O resultado é guardado com o documento da música,
+então o player não precisa cruzar as listas a cada quadro.
+"""
+from bisect import bisect_right
+import re
+
+# Versão do formato do alinhamento; alterar faz os documentos antigos serem recalculados
+ALIGNMENT_VERSION = 1
+
+# Início de cada palavra de uma linha sem marcas de palavra
+_WORD_START = re.compile(r'\S+')
+
+
+def align_song(lyrics, chords):
+    """
+    Alinha os acordes às linhas (e palavras) da letra.
+
+    Args:
+        lyrics (list): Linhas da letra ordenadas por tempo, como em
+                       lyrics_parser.parse_lyrics
+        chords (list): Acordes com 'time' (ms) e, opcionalmente, 'end' (ms)
+
+    Returns:
+        dict: 'version', 'intro' (índices dos acordes anteriores à primeira
+              linha) e 'lines' — uma entrada por linha da letra, na mesma ordem,
+              com 'start', 'end' (ms ou None na última linha) e 'chords', a
+              lista de {'index', 'offset', 'word'}: índice do acorde em
+              `chords`, posição do caractere em 'text' e índice da palavra
+              (None se a linha não tiver marcas de palavra)
+    """
+    # Os acordes normalmente já vêm ordenados; nesse caso a ordenação é linear
+    order = sorted(range(len(chords)), key=lambda index: chords[index]['time'])
+
+    position = 0
+    intro = []
+    if lyrics:
+        first_time = lyrics[0]['time']
+        while position < len(order) and chords[order[position]]['time'] < first_time:
+            intro.append(order[position])
+            position += 1
+    else:
+        intro = order
+
+    lines = []
+    for number, line in enumerate(lyrics):
+        start = line['time']
+        end = lyrics[number + 1]['time'] if number + 1 < len(lyrics) else None
+
+        line_chords = []
+        while position < len(order) and (end is None or chords[order[position]]['time'] < end):
+            line_chords.append(order[position])
+            position += 1
+
+        if line.get('words'):
+            placed = _place_on_words(line, line_chords, chords)
+        else:
+            placed = _place_on_text(line, start, end, line_chords, chords)
+
+        lines.append({'start': start, 'end': end, 'chords': placed})
+
+    return {'version': ALIGNMENT_VERSION, 'intro': intro, 'lines': lines}
+
+
+def is_current(alignment):
+    """Indica se um alinhamento guardado está no formato atual."""
+    return isinstance(alignment, dict) and alignment.get('version') == ALIGNMENT_VERSION
+
+
+def _place_on_words(line, line_chords, chords):
+    """Cada acorde fica sobre a palavra que está sendo cantada quando ele começa."""
+    words = line['words']
+
+    # Posição de cada palavra em 'text' (o texto da linha é a junção das
+    # palavras sem os espaços das pontas)
+    joined = ''.join(word['text'] for word in words)
+    leading = len(joined) - len(joined.lstrip())
+    starts = []
+    offset = 0
+    for word in words:
+        text = word['text']
+        starts.append(max(offset + len(text) - len(text.lstrip()) - leading, 0))
+        offset += len(text)
+
+    placed = []
+    word_index = 0
+    for chord_index in line_chords:
+        time = chords[chord_index]['time']
+        while word_index + 1 < len(words) and words[word_index + 1]['time'] <= time:
+            word_index += 1
+        placed.append({'index': chord_index, 'offset': starts[word_index], 'word': word_index})
+    return placed
+
+
+def _place_on_text(line, start, end, line_chords, chords):
+    """
+    Sem marcas de palavra, a posição é proporcional ao tempo decorrido na
+    linha, recuada até o início da palavra.
+    """
+    text = line['text']
+    if not line_chords:
+        return []
+
+    if end is None:
+        # Última linha: vai até o fim do último acorde
+        last = chords[line_chords[-1]]
+        end = last.get('end') or last['time']
+
+    word_starts = [match.start() for match in _WORD_START.finditer(text)] or [0]
+    duration = end - start
+
+    placed = []
+    for chord_index in line_chords:
+        if duration > 0:
+            elapsed = max(chords[chord_index]['time'] - start, 0)
+            target = int(len(text) * elapsed / duration)
+        else:
+            target = 0
+        offset = word_starts[max(bisect_right(word_starts, target) - 1, 0)]
+        placed.append({'index': chord_index, 'offset': offset, 'word': None})
+    return placed
@@ -1,27 +1,106 @@
-from flask import Flask, request, jsonify
+from flask import Flask, request, jsonify, Response, g
 from flask_cors import CORS
+import base64
+from datetime import datetime
+from functools import lru_cache
 import os
+import threading
 from werkzeug.utils import secure_filename
 import json
-from music21 import converter, chord
-from pychord import Chord
 import backend.database as database
-import config
+import backend.config as config
+import backend.midi_reader as midi_reader
+import backend.onset_chords as onset_chords
+import backend.lyrics_parser as lyrics_parser
+import backend.alignment as alignment
+import backend.song_codec as song_codec
+import backend.http_cache as http_cache
+import backend.uploads as uploads
+import backend.metrics as metrics
+import backend.profiling as profiling
+from backend.jobs import JobQueue, DONE, FAILED
+from backend.chord_cache import ChordCache, hash_midi, remember_hash, cache_key
+from backend.search_index import SearchIndex
 
 # Inicializar a aplicação Flask
 app = Flask(__name__)
 CORS(app)
 
+# Arquivos enviados são gravados em partes, com o hash calculado durante o envio
+app.request_class = uploads.UploadRequest
+
 # Configurações da aplicação
 app.config['UPLOAD_FOLDER'] = config.DATA_DIR
 app.config['MAX_CONTENT_LENGTH'] = config.MAX_CONTENT_LENGTH
 
+# Fila de extração de acordes em segundo plano
+chord_jobs = JobQueue(config.JOBS_FOLDER, max_workers=config.JOB_WORKERS)
+
+# Cache das análises de acordes, endereçado pelo conteúdo do MIDI
+chord_cache = ChordCache(config.CHORD_CACHE_FOLDER, max_entries=config.CHORD_CACHE_SIZE)
+
+# Versão e configurações de extract_chords_from_midi; alterar invalida o cache.
+# Incrementar a versão sempre que a saída da extração mudar (2: acordes pelos
+# ticks reais das notas, sem o music21)
+CHORD_EXTRACTION_SETTINGS = {'extractor': 'onsets', 'version': 2}
+
+# Arquivos do frontend lidos e comprimidos (gzip/brotli) na inicialização
+static_files = http_cache.StaticFiles(config.FRONTEND_FOLDER, config.CACHE_CONTROL['static'])
+static_files.warm()
+
+# Documentos pré-calculados já lidos de SONGS_FOLDER: caminho -> (mtime, documento)
+_song_documents = {}
+
+# Índice de busca em memória, usado quando o PostgreSQL não responde
+song_index = SearchIndex()
+_song_index_loaded = False
+_song_index_lock = threading.Lock()
+
+@app.before_request
+def _begin_measurement():
+    # Sorteio da amostragem; fora dela as etapas não medem nada
+    g.metrics_token = metrics.begin()
+
+@app.after_request
+def _finish_measurement(response):
+    """Conta o pedido e, se ele foi medido, acrescenta o Server-Timing e soma a medição em /metrics"""
+    endpoint = request.endpoint or 'not_found'
+    metrics.count_request(endpoint, request.method, response.status_code)
+    
+    token = g.pop('metrics_token', None)
+    if token is not None:
+        measurement = metrics.end(token)
+        if measurement is not None:
+            response.headers['Server-Timing'] = metrics.server_timing(measurement)
+            metrics.record(endpoint, measurement)
+    return response
+
+@app.teardown_request
+def _discard_measurement(error=None):
+    # Pedidos interrompidos por exceção não passam pelo after_request
+    token = g.pop('metrics_token', None)
+    if token is not None:
+        metrics.end(token)
+
+@app.route('/metrics', methods=['GET'])
+def get_metrics():
+    """
+    Endpoint de métricas no formato texto do Prometheus (backend/metrics.py)
+    Retorna: contagem de pedidos e, dos pedidos e tarefas medidos pela amostragem
+             (METRICS_SAMPLE_RATE), tempo por etapa, idas ao banco e acertos de cache
+    """
+    return Response(metrics.render(), content_type=metrics.CONTENT_TYPE,
+                    headers={'Cache-Control': 'no-store'})
+
 @app.route('/api/upload_song', methods=['POST'])
 def upload_song():
     """
     Endpoint para upload de arquivos MIDI e letras
     Recebe: arquivos 'midi' e 'lyrics' via multipart/form-data, e metadados 'title' e 'artist'
-    Retorna: JSON com caminhos dos arquivos salvos e ID da música
+    Retorna: JSON com caminhos dos arquivos salvos, ID da música, hash do MIDI
+             (se o mesmo MIDI já havia sido enviado, 'duplicate' é true; se a
+             música inteira já existia, 'existing' é true e o ID é o dela) e a
+             extração de acordes já iniciada ('chords_job' ou 'chords_cached')
     """
     if 'midi' not in request.files or 'lyrics' not in request.files:
         return jsonify({'error': 'Arquivos MIDI e letra são obrigatórios'}), 400
@@ -43,38 +122,103 @@ def upload_song():
     if not allowed_file(lyrics_file.filename, config.ALLOWED_EXTENSIONS['lyrics']):
         return jsonify({'error': 'Formato de arquivo de letra não permitido'}), 400
     
-    # Salvar os arquivos
-    midi_filename = secure_filename(midi_file.filename)
-    lyrics_filename = secure_filename(lyrics_file.filename)
+    # Ler a letra antes de gravar os arquivos, para que uma letra inválida não
+    # deixe arquivos órfãos; as leituras seguintes usam o resultado gravado
+    try:
+        with metrics.stage('lyrics.parse'):
+            lyrics_data, _ = _parse_uploaded_lyrics(lyrics_file)
+    except Exception as e:
+        return jsonify({'error': f'Erro ao ler arquivo de letra: {str(e)}'}), 400
     
-    # Usar o mesmo nome base para ambos os arquivos
-    base_name = os.path.splitext(midi_filename)[0]
+    # Os arquivos chegaram gravados em partes, com o hash já calculado: só
+    # falta renomeá-los para o caminho definido pelo conteúdo
+    try:
+        with metrics.stage('upload.store'):
+            midi_path, midi_hash, duplicate = uploads.store(midi_file, config.MIDI_FOLDER, '.mid')
+            lyrics_path, _, lyrics_duplicate = uploads.store(lyrics_file, config.LYRICS_FOLDER, '.txt')
+    except Exception as e:
+        return jsonify({'error': f'Erro ao salvar arquivos: {str(e)}'}), 500
     
-    midi_path = os.path.join(config.MIDI_FOLDER, f"{base_name}.mid")
-    lyrics_path = os.path.join(config.LYRICS_FOLDER, f"{base_name}.txt")
+    # O hash conhecido evita reler o MIDI para montar a chave do cache de acordes
+    remember_hash(midi_path, midi_hash)
     
-    midi_file.save(midi_path)
-    lyrics_file.save(lyrics_path)
+    # Um reenvio idêntico (mesmos arquivos, título e artista) reaproveita a música já gravada
+    song_id = None
+    if duplicate and lyrics_duplicate:
+        song_id = database.find_song(title, artist, midi_path, lyrics_path)
+    existing = song_id is not None
     
-    # Salvar no banco de dados
-    song_id = database.save_song_to_db(title, artist, midi_path, lyrics_path)
+    if not existing:
+        # Salvar no banco de dados
+        song_id = database.save_song_to_db(title, artist, midi_path, lyrics_path)
+        
+        if not song_id:
+            return jsonify({'error': 'Erro ao salvar música no banco de dados'}), 500
+        
+        if not database.save_lyrics_to_db(song_id, lyrics_data):
+            return jsonify({'error': 'Erro ao salvar letra no banco de dados'}), 500
     
-    if not song_id:
-        return jsonify({'error': 'Erro ao salvar música no banco de dados'}), 500
+    # O documento e o índice de busca são da música, não do MIDI: o mesmo MIDI
+    # pode ter sido enviado com outra letra ou outro título
+    document_id = str(song_id)
+    if not existing or _load_song_document(document_id) is None:
+        # Documento pré-calculado para leitura sem banco (acordes entram quando forem gerados)
+        _save_song_document(document_id, {
+            'song_id': song_id,
+            'title': title,
+            'artist': artist,
+            'lyrics': lyrics_data,
+            'chords': []
+        })
+    
+    # Manter o índice de busca em memória atualizado
+    song_index.add_song(document_id, title, artist, [line['text'] for line in lyrics_data])
+    
+    # Iniciar a extração de acordes a partir do arquivo verificado; um MIDI
+    # repetido normalmente já tem a análise no cache
+    analysis_key = cache_key(midi_hash, CHORD_EXTRACTION_SETTINGS)
+    profile_requested = profiling.requested(request.headers)
+    chords_data = None if profile_requested else _cached_chords(analysis_key)
+    job = None
+    if chords_data is not None:
+        if not _chords_stored(song_id, analysis_key):
+            _store_chords(midi_path, song_id, chords_data, analysis_key)
+    else:
+        job = _submit_chords_job(midi_path, song_id, midi_hash, analysis_key, profile_requested)
     
     return jsonify({
         'success': True,
         'midi_path': midi_path,
         'lyrics_path': lyrics_path,
-        'song_id': song_id
+        'song_id': song_id,
+        'midi_hash': midi_hash,
+        'duplicate': duplicate,
+        'existing': existing,
+        'chords_job': job['id'] if job else None,
+        'chords_cached': chords_data is not None
     })
 
+def _parse_uploaded_lyrics(lyrics_file):
+    """
+    Lê a letra enviada direto do arquivo recebido, antes de ele ser gravado
+    Retorna: (linhas, metadados), como em lyrics_parser.parse_lyrics
+    """
+    stream = lyrics_file.stream
+    stream.seek(0)
+    try:
+        text = stream.read().decode('utf-8')
+    finally:
+        # uploads.store lê o arquivo desde o início
+        stream.seek(0)
+    return lyrics_parser.parse_lyrics(text.splitlines())
+
 @app.route('/api/generate_chords', methods=['POST'])
 def generate_chords():
     """
-    Endpoint para extrair acordes de um arquivo MIDI
+    Endpoint para enfileirar a extração de acordes de um arquivo MIDI
     Recebe: JSON com 'song_id' ou 'midi_path'
-    Retorna: JSON com acordes extraídos e seus timestamps
+    Retorna: JSON com os acordes, se a análise já estiver no cache, ou com o ID
+             da tarefa; o resultado da tarefa é obtido em /api/jobs/<id>/result
     """
     data = request.json
     
@@ -101,29 +245,274 @@ def generate_chords():
     if not os.path.exists(midi_path):
         return jsonify({'error': f'Arquivo MIDI não encontrado: {midi_path}'}), 404
     
-    try:
-        # Extrair acordes do arquivo MIDI
-        chords_data = extract_chords_from_midi(midi_path)
-        
-        # Salvar os acordes extraídos
-        file_base_name = os.path.splitext(os.path.basename(midi_path))[0]
-        chords_path = os.path.join(config.CHORDS_FOLDER, f"{file_base_name}.json")
-        
-        with open(chords_path, 'w') as f:
-            json.dump(chords_data, f)
-        
-        # Salvar acordes no banco de dados se tiver song_id
-        if song_id:
-            database.save_chords_to_db(song_id, chords_data)
+    # O mesmo conteúdo (mesmo com outro nome de arquivo) reaproveita a análise
+    with metrics.stage('hash'):
+        midi_hash = hash_midi(midi_path)
+        analysis_key = cache_key(midi_hash, CHORD_EXTRACTION_SETTINGS)
+    
+    # Com o perfil pedido (X-Profile), a extração roda de novo mesmo com a análise no cache
+    profile_requested = profiling.requested(request.headers)
+    chords_data = None if profile_requested else _cached_chords(analysis_key)
+    
+    if chords_data is not None:
+        chords_path = _chords_path(midi_path)
+        # Uma música que já tem os acordes desta análise não é regravada
+        if (song_id and not _chords_stored(song_id, analysis_key)) or not os.path.exists(chords_path):
+            _store_chords(midi_path, song_id, chords_data, analysis_key)
         
         return jsonify({
             'success': True,
+            'cached': True,
             'chords': chords_data,
             'chords_path': chords_path
         })
     
+    # Pedidos para o mesmo conteúdo reaproveitam a tarefa em andamento
+    job = _submit_chords_job(midi_path, song_id, midi_hash, analysis_key, profile_requested)
+    
+    return jsonify({
+        'success': True,
+        'job_id': job['id'],
+        'status': job['status'],
+        'status_url': f"/api/jobs/{job['id']}",
+        'result_url': f"/api/jobs/{job['id']}/result"
+    }), 202
+
+@app.route('/api/jobs/<job_id>', methods=['GET'])
+def get_job_status(job_id):
+    """
+    Endpoint para consultar o andamento de uma tarefa
+    Retorna: JSON com estado ('queued', 'running', 'done', 'failed'), etapa e progresso (0 a 1)
+    """
+    job = chord_jobs.get(job_id)
+    
+    if not job:
+        return jsonify({'error': f'Tarefa não encontrada: {job_id}'}), 404
+    
+    return jsonify({
+        'job_id': job['id'],
+        'status': job['status'],
+        'stage': job['stage'],
+        'progress': job['progress'],
+        'error': job['error']
+    })
+
+@app.route('/api/jobs/<job_id>/result', methods=['GET'])
+def get_job_result(job_id):
+    """
+    Endpoint para obter o resultado de uma tarefa de extração de acordes
+    Retorna: JSON com acordes extraídos e seus timestamps (202 se ainda não terminou)
+    """
+    job = chord_jobs.get(job_id)
+    
+    if not job:
+        return jsonify({'error': f'Tarefa não encontrada: {job_id}'}), 404
+    
+    if job['status'] == FAILED:
+        return jsonify({'error': f"Erro ao extrair acordes: {job['error']}"}), 500
+    
+    if job['status'] != DONE:
+        return jsonify({
+            'success': False,
+            'job_id': job['id'],
+            'status': job['status'],
+            'progress': job['progress']
+        }), 202
+    
+    # Etapas da tarefa (se ela foi medida) no Server-Timing deste pedido
+    job_metrics = job['result'].get('metrics')
+    if job_metrics:
+        for stage, (_, seconds) in job_metrics['stages'].items():
+            metrics.annotate(f"job.{stage}", seconds)
+        metrics.annotate('job.total', job_metrics['seconds'], metrics.round_trips_text(job_metrics['db_round_trips']))
+    
+    chords_path = job['result']['chords_path']
+    chords_data = _cached_chords(job['result'].get('cache_key'))
+    
+    if chords_data is None:
+        try:
+            with open(chords_path, 'r') as f:
+                chords_data = json.load(f)
+        except Exception as e:
+            return jsonify({'error': f'Erro ao ler acordes extraídos: {str(e)}'}), 500
+    
+    return jsonify({
+        'success': True,
+        'chords': chords_data,
+        'chords_path': chords_path,
+        'profile': job['result'].get('profile')
+    })
+
+def _submit_chords_job(midi_path, song_id, midi_hash, analysis_key, profile_requested):
+    """
+    Enfileira a extração de acordes. Com PROFILE_EXTRACTION ou o perfil pedido
+    no cabeçalho, a extração é perfilada e gravada com o hash do MIDI; tarefas
+    perfiladas têm chave própria, para não se juntarem a uma extração comum
+    """
+    profile_hash = midi_hash if profile_requested or config.PROFILE_EXTRACTION else None
+    key = f"{analysis_key}:profile" if profile_requested else analysis_key
+    return chord_jobs.submit('generate_chords', key, midi_path, song_id, analysis_key, profile_hash)
+
+def _generate_chords_task(reporter, midi_path, song_id, analysis_key, profile_hash=None):
+    """
+    Tarefa executada no pool de processos: extrai, salva em arquivo, no cache e no banco
+    Com profile_hash, a leitura e a extração são perfiladas (backend/profiling.py)
+    Retorna: dicionário com o caminho do JSON de acordes, a quantidade de acordes,
+             a chave da análise no cache e o perfil gravado (ou None)
+    """
+    with profiling.profile(profile_hash, 'generate_chords') as profile:
+        # Ler as notas com o leitor leve e extrair os acordes da tabela
+        reporter.update('parsing', 0.1)
+        with metrics.stage('parse'):
+            note_table = midi_reader.read_midi(midi_path)
+        
+        reporter.update('extracting', 0.3)
+        with metrics.stage('extract'):
+            chords_data = extract_chords_from_midi(midi_path, note_table)
+    
+    # Salvar os acordes extraídos
+    reporter.update('saving', 0.8)
+    chords_path = _store_chords(midi_path, song_id, chords_data, analysis_key)
+    with metrics.stage('cache.put'):
+        chord_cache.put(analysis_key, chords_data)
+    
+    return {
+        'chords_path': chords_path,
+        'chord_count': len(chords_data),
+        'cache_key': analysis_key,
+        'profile': profile['name']
+    }
+
+chord_jobs.register('generate_chords', _generate_chords_task)
+
+def _cached_chords(analysis_key):
+    """Consulta o cache de análises, contando acerto ou falha na medição do pedido"""
+    with metrics.stage('cache.get'):
+        chords_data = chord_cache.get(analysis_key)
+    metrics.cache_lookup('chords', chords_data is not None)
+    return chords_data
+
+def _chords_path(midi_path):
+    """Caminho do JSON de acordes de um arquivo MIDI (mesmo nome base)"""
+    file_base_name = os.path.splitext(os.path.basename(midi_path))[0]
+    return os.path.join(config.CHORDS_FOLDER, f"{file_base_name}.json")
+
+def _store_chords(midi_path, song_id, chords_data, analysis_key=None):
+    """
+    Grava os acordes de uma música: JSON de acordes, documento pré-calculado e,
+    se houver song_id, banco de dados (que recalcula o documento da música).
+    O documento guarda a chave da análise ('chords_key') quando a gravação no
+    banco deu certo, para que _chords_stored evite regravar a mesma análise
+    Retorna: caminho do JSON de acordes
+    """
+    chords_path = _chords_path(midi_path)
+    with metrics.stage('json_dump'):
+        with open(chords_path, 'w') as f:
+            json.dump(chords_data, f)
+    
+    stored = True
+    if song_id:
+        stored = database.save_chords_to_db(song_id, chords_data)
+    
+    # Documentos de músicas enviadas são do ID da música; os anteriores, do nome do arquivo
+    document_id = str(song_id) if song_id else os.path.splitext(os.path.basename(midi_path))[0]
+    document = _load_song_document(document_id)
+    if document is not None:
+        document = dict(document, chords=chords_data)
+        document.pop('chords_key', None)
+        if stored and analysis_key:
+            document['chords_key'] = analysis_key
+        _save_song_document(document_id, document)
+    
+    return chords_path
+
+def _chords_stored(song_id, analysis_key):
+    """Se a música já tem gravados os acordes da análise (mesmo MIDI e mesma versão do extrator)"""
+    if not song_id:
+        return False
+    document = _load_song_document(str(song_id))
+    return document is not None and document.get('chords_key') == analysis_key
+
+def _save_song_document(base_name, document):
+    """
+    Grava o documento pré-calculado de uma música (letra + acordes) em
+    SONGS_FOLDER, com o alinhamento entre letra e acordes recalculado
+    Retorna: o documento gravado
+    """
+    document_path = os.path.join(config.SONGS_FOLDER, f"{base_name}.json")
+    tmp_path = f"{document_path}.{os.getpid()}.tmp"
+    with metrics.stage('alignment'):
+        document = dict(document, alignment=alignment.align_song(document['lyrics'], document['chords']))
+    try:
+        with metrics.stage('json_dump'):
+            with open(tmp_path, 'w') as f:
+                json.dump(document, f)
+            os.replace(tmp_path, document_path)
     except Exception as e:
-        return jsonify({'error': f'Erro ao extrair acordes: {str(e)}'}), 500
+        print(f"Erro ao salvar documento da música {base_name}: {e}")
+    return document
+
+def _load_song_document(base_name):
+    """
+    Lê o documento pré-calculado de uma música, reaproveitando a leitura anterior
+    enquanto o arquivo não mudar
+    Retorna: dicionário do documento ou None se não existir
+    """
+    document_path = os.path.join(config.SONGS_FOLDER, f"{base_name}.json")
+    try:
+        mtime = os.stat(document_path).st_mtime_ns
+    except OSError:
+        return None
+    
+    cached = _song_documents.get(document_path)
+    metrics.cache_lookup('song_documents', bool(cached and cached[0] == mtime))
+    if cached and cached[0] == mtime:
+        return cached[1]
+    
+    try:
+        with metrics.stage('json_load'):
+            with open(document_path, 'r') as f:
+                document = json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"Erro ao ler documento da música {base_name}: {e}")
+        return None
+    
+    _song_documents[document_path] = (mtime, document)
+    return document
+
+@app.route('/api/profiles/report', methods=['GET'])
+def get_profile_report():
+    """
+    Endpoint do relatório de pontos quentes dos perfis de extração (backend/profiling.py)
+    Recebe: parâmetros opcionais 'hash' (só os perfis de um MIDI), 'limit' (funções, padrão 20)
+            e 'sort' ('tottime', 'cumulative' ou 'calls'); exige o cabeçalho X-Profile
+            igual a PROFILE_TOKEN (sem PROFILE_TOKEN definido, o acesso é sempre negado)
+    Retorna: JSON com as funções que mais consomem tempo, somadas em todos os perfis
+    """
+    if not profiling.authorized(request.headers):
+        return jsonify({'error': 'Acesso aos perfis não autorizado'}), 403
+    
+    song_hash = request.args.get('hash')
+    if song_hash is not None and not profiling.is_song_hash(song_hash):
+        return jsonify({'error': 'hash inválido'}), 400
+    
+    try:
+        limit = int(request.args.get('limit', 20))
+    except ValueError:
+        return jsonify({'error': 'limit deve ser um número inteiro'}), 400
+    limit = max(1, min(limit, config.SONGS_PAGE_MAX))
+    
+    sort = request.args.get('sort', 'tottime')
+    if sort not in profiling.SORT_KEYS:
+        return jsonify({'error': f"sort deve ser um de: {', '.join(profiling.SORT_KEYS)}"}), 400
+    
+    report = profiling.hotspots(song_hash, limit, sort)
+    if report is None:
+        return jsonify({'error': 'Nenhum perfil encontrado'}), 404
+    
+    response = jsonify(report)
+    response.headers['Cache-Control'] = 'no-store'
+    return response
 
 @app.route('/api/get_song_data', methods=['GET'])
 def get_song_data():
@@ -141,9 +530,24 @@ def get_song_data():
     song_data = database.get_song_by_id(song_id)
     
     if song_data:
-        return jsonify(song_data)
+        # Os caminhos dos arquivos no servidor não fazem parte da resposta
+        song_data.pop('midi_path', None)
+        song_data.pop('lyrics_path', None)
+        if not alignment.is_current(song_data.get('alignment')):
+            # Músicas gravadas antes do alinhamento (ou com formato antigo)
+            with metrics.stage('alignment'):
+                song_data['alignment'] = alignment.align_song(song_data['lyrics'], song_data['chords'])
+        return _song_response(song_data)
     
-    # Se não encontrou no banco, tentar ler dos arquivos
+    # Se não encontrou no banco, usar o documento pré-calculado no upload
+    document = _load_song_document(secure_filename(song_id))
+    
+    if document is not None:
+        if not alignment.is_current(document.get('alignment')):
+            document = _save_song_document(secure_filename(song_id), document)
+        return _song_response(document)
+    
+    # Músicas anteriores aos documentos: montar a partir dos arquivos de letra e acordes
     lyrics_path = os.path.join(config.LYRICS_FOLDER, f"{song_id}.txt")
     chords_path = os.path.join(config.CHORDS_FOLDER, f"{song_id}.json")
     
@@ -154,164 +558,277 @@ def get_song_data():
         return jsonify({'error': f'Arquivo de acordes não encontrado para o ID: {song_id}'}), 404
     
     try:
-        # Ler o arquivo de letra
-        with open(lyrics_path, 'r') as f:
-            lyrics_content = f.readlines()
-        
-        # Processar as linhas da letra com timestamps
-        lyrics_data = []
-        for line in lyrics_content:
-            line = line.strip()
-            if line:
-                # Verificar se a linha tem formato de timestamp [00:00:00]
-                if line.startswith('[') and ']' in line:
-                    time_str = line[1:line.index(']')]
-                    text = line[line.index(']')+1:].strip()
-                    
-                    # Converter timestamp para milissegundos
-                    try:
-                        parts = time_str.split(':')
-                        if len(parts) == 3:  # hh:mm:ss
-                            hours, minutes, seconds = map(float, parts)
-                            time_ms = int((hours * 3600 + minutes * 60 + seconds) * 1000)
-                        elif len(parts) == 2:  # mm:ss
-                            minutes, seconds = map(float, parts)
-                            time_ms = int((minutes * 60 + seconds) * 1000)
-                        else:
-                            time_ms = 0
-                        
-                        lyrics_data.append({
-                            'time': time_ms,
-                            'text': text
-                        })
-                    except:
-                        # Se falhar na conversão, adicionar com tempo 0
-                        lyrics_data.append({
-                            'time': 0,
-                            'text': line
-                        })
-                else:
-                    # Linha sem timestamp, adicionar com tempo 0
-                    lyrics_data.append({
-                        'time': 0,
-                        'text': line
-                    })
+        # Ler o arquivo de letra (já ordenado por tempo; memorizado pelo mtime)
+        lyrics_data, lyrics_metadata = lyrics_parser.parse_lyrics_file(lyrics_path)
         
         # Ler o arquivo de acordes
         with open(chords_path, 'r') as f:
             chords_data = json.load(f)
         
-        # Ordenar os dados por tempo
-        lyrics_data.sort(key=lambda x: x['time'])
-        
         # Montar resposta
         response = {
             'song_id': song_id,
-            'title': 'Desconhecido',  # Não temos essa informação nos arquivos
-            'artist': 'Desconhecido',  # Não temos essa informação nos arquivos
+            # Título e artista só existem nos arquivos LRC com cabeçalhos [ti:] e [ar:]
+            'title': lyrics_metadata.get('ti', 'Desconhecido'),
+            'artist': lyrics_metadata.get('ar', 'Desconhecido'),
             'lyrics': lyrics_data,
             'chords': chords_data
         }
         
-        return jsonify(response)
+        # As próximas leituras usam o documento
+        response = _save_song_document(secure_filename(song_id), response)
+        
+        return _song_response(response)
     
     except Exception as e:
         return jsonify({'error': f'Erro ao processar dados da música: {str(e)}'}), 500
 
+def _song_response(document):
+    """
+    Responde com o documento de uma música em JSON ou, se o cliente preferir
+    pelo cabeçalho Accept, no formato binário compacto (backend/song_codec.py)
+    """
+    preferred = request.accept_mimetypes.best_match(['application/json', song_codec.MEDIA_TYPE])
+    with metrics.stage('encode'):
+        if preferred == song_codec.MEDIA_TYPE:
+            response = Response(song_codec.encode_song(document), mimetype=song_codec.MEDIA_TYPE)
+        else:
+            response = jsonify(document)
+    response.vary.add('Accept')
+    with metrics.stage('http_cache'):
+        return http_cache.cacheable(response, config.CACHE_CONTROL['song'])
+
 @app.route('/api/songs', methods=['GET'])
 def get_songs():
     """
-    Endpoint para listar todas as músicas disponíveis
-    Retorna: JSON com lista de músicas
+    Endpoint para listar as músicas disponíveis, da mais nova para a mais antiga
+    Recebe: parâmetros opcionais 'limit' e 'cursor' (o 'next_cursor' da página anterior)
+    Retorna: JSON com a página de músicas e o cursor da próxima página (null na última)
     """
-    # Implementar busca no banco de dados
-    # Por enquanto, retornar lista vazia
-    return jsonify([])
+    try:
+        limit = int(request.args.get('limit', config.SONGS_PAGE_SIZE))
+    except ValueError:
+        return jsonify({'error': 'limit deve ser um número inteiro'}), 400
+    limit = max(1, min(limit, config.SONGS_PAGE_MAX))
+    
+    after = None
+    if request.args.get('cursor'):
+        after = _decode_songs_cursor(request.args['cursor'])
+        if after is None:
+            return jsonify({'error': 'Cursor inválido'}), 400
+    
+    # Buscar uma música a mais indica se existe próxima página
+    songs = database.list_songs(limit + 1, after)
+    
+    if songs is None:
+        return jsonify({'error': 'Erro ao listar músicas'}), 500
+    
+    next_cursor = None
+    if len(songs) > limit:
+        songs = songs[:limit]
+        next_cursor = _encode_songs_cursor(songs[-1])
+    
+    response = jsonify({
+        'songs': [
+            {
+                'id': song['id'],
+                'title': song['title'],
+                'artist': song['artist'],
+                'created_at': song['created_at'].isoformat()
+            }
+            for song in songs
+        ],
+        'next_cursor': next_cursor
+    })
+    
+    # ETag do conteúdo da página: o navegador revalida com If-None-Match e recebe 304
+    return http_cache.cacheable(response, config.CACHE_CONTROL['songs'])
+
+@app.route('/api/search', methods=['GET'])
+def search_songs():
+    """
+    Endpoint para buscar músicas por título, artista ou trecho da letra
+    Recebe: parâmetro 'q' (texto da busca) e, opcionalmente, 'limit'
+    Retorna: JSON com as músicas encontradas, da mais relevante para a menos,
+             com a pontuação e a linha da letra que correspondeu (se houver)
+    """
+    query = request.args.get('q', '').strip()
+    
+    if not query:
+        return jsonify({'error': 'O parâmetro q é obrigatório'}), 400
+    
+    try:
+        limit = int(request.args.get('limit', 20))
+    except ValueError:
+        return jsonify({'error': 'limit deve ser um número inteiro'}), 400
+    limit = max(1, min(limit, config.SONGS_PAGE_MAX))
+    
+    results = database.search_songs(query, limit)
+    
+    if results is None:
+        # Sem PostgreSQL: buscar no índice em memória montado a partir das letras em disco
+        results = _get_song_index().search(query, limit)
+    
+    return jsonify({
+        'query': query,
+        'results': [
+            {
+                'id': result['id'],
+                'title': result['title'],
+                'artist': result['artist'],
+                'score': round(float(result['score']), 4),
+                'snippet': result['snippet']
+            }
+            for result in results
+        ]
+    })
+
+def _get_song_index():
+    """
+    Índice em memória, preenchido na primeira busca com os documentos de
+    SONGS_FOLDER e as letras antigas de LYRICS_FOLDER (sem documento)
+    """
+    global _song_index_loaded
+    
+    with _song_index_lock:
+        if not _song_index_loaded:
+            for file_name in sorted(os.listdir(config.SONGS_FOLDER)):
+                base_name, extension = os.path.splitext(file_name)
+                if extension != '.json' or base_name in song_index:
+                    continue
+                document = _load_song_document(base_name)
+                if document is not None:
+                    song_index.add_song(base_name, document.get('title', base_name), document.get('artist', ''),
+                                        [line['text'] for line in document.get('lyrics', [])])
+            
+            # Os arquivos enviados ficam em subpastas pelo hash; os soltos são anteriores a isso
+            for file_name in sorted(os.listdir(config.LYRICS_FOLDER)):
+                base_name, extension = os.path.splitext(file_name)
+                # Músicas enviadas nesta execução já estão indexadas com título e artista
+                if extension != '.txt' or base_name in song_index:
+                    continue
+                lines = _read_lyric_lines(os.path.join(config.LYRICS_FOLDER, file_name))
+                song_index.add_song(base_name, base_name, '', lines)
+            _song_index_loaded = True
+    
+    return song_index
+
+def _read_lyric_lines(lyrics_path):
+    """Textos das linhas de um arquivo de letra, sem os timestamps"""
+    try:
+        lyrics_data, _ = lyrics_parser.parse_lyrics_file(lyrics_path)
+        return [line['text'] for line in lyrics_data]
+    except Exception as e:
+        print(f"Erro ao ler letra para o índice de busca: {e}")
+        return []
+
+def _encode_songs_cursor(song):
+    """Cursor opaco com a posição (created_at, id) da última música da página"""
+    raw = f"{song['created_at'].isoformat()}|{song['id']}"
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii').rstrip('=')
+
+def _decode_songs_cursor(value):
+    """Lê um cursor de _encode_songs_cursor; retorna (created_at, id) ou None se for inválido"""
+    try:
+        raw = base64.urlsafe_b64decode(value + '=' * (-len(value) % 4)).decode('utf-8')
+        created_at, song_id = raw.rsplit('|', 1)
+        return datetime.fromisoformat(created_at), int(song_id)
+    except ValueError:
+        return None
 
 def allowed_file(filename, allowed_extensions):
     """Verifica se o arquivo tem uma extensão permitida"""
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in allowed_extensions
 
-def extract_chords_from_midi(midi_path):
+def extract_chords_from_midi(midi_path, note_table=None):
     """
     Função para extrair acordes de um arquivo MIDI
-    Retorna: Lista de dicionários com nome do acorde e timestamp
+    Recebe: caminho do arquivo MIDI e, opcionalmente, a tabela de notas já lida
+            por midi_reader.read_midi
+    Retorna: Lista de dicionários com nome do acorde e 'time', 'start' e 'end' em
+             milissegundos, calculados pelo mapa de andamentos do arquivo
     """
-    # Carregar o arquivo MIDI com music21
-    midi = converter.parse(midi_path)
+    if note_table is None:
+        note_table = midi_reader.read_midi(midi_path)
     
-    # Lista para armazenar os acordes extraídos
-    extracted_chords = []
-    
-    # Extrair todos os elementos que são acordes
-    for element in midi.recurse():
-        if isinstance(element, chord.Chord):
-            # Obter o tempo em milissegundos
-            time_in_ms = int(element.offset * 1000)  # Converter para milissegundos
-            
-            try:
-                # Obter a nota raiz e a qualidade do acorde
-                root = element.root().name
-                quality = element.quality
-                
-                # Formatar o símbolo do acorde
-                if quality == 'major':
-                    symbol = root
-                elif quality == 'minor':
-                    symbol = f"{root}m"
-                else:
-                    # Tentar criar um símbolo mais genérico
-                    symbol = f"{root}{quality[0] if quality else ''}"
-                
-                # Criar objeto Chord para validar e obter componentes
-                try:
-                    ch = Chord(symbol)
-                    components = ch.components()
-                    
-                    # Adicionar à lista de acordes extraídos
-                    extracted_chords.append({
-                        'time': time_in_ms,
-                        'chord': symbol,
-                        'components': components
-                    })
-                except:
-                    # Se falhar ao criar o objeto Chord, usar apenas o símbolo básico
-                    extracted_chords.append({
-                        'time': time_in_ms,
-                        'chord': symbol,
-                        'components': []
-                    })
-            
-            except Exception as e:
-                # Se houver erro na extração, registrar o tempo e um acorde genérico
-                extracted_chords.append({
-                    'time': time_in_ms,
-                    'chord': 'N/C',  # No Chord
-                    'components': []
-                })
+    # Acordes pelos ataques simultâneos, com os tempos reais das notas
+    # (ver backend/onset_chords.py)
+    extracted_chords = [_describe_chord(root, quality, start_ms, end_ms)
+                        for start_ms, end_ms, root, quality in onset_chords.onset_chords(note_table)]
     
     # Ordenar os acordes por tempo
     extracted_chords.sort(key=lambda x: x['time'])
     
     return extracted_chords
-from flask import send_from_directory
+
+def _describe_chord(root, quality, start_ms, end_ms):
+    """Monta o dicionário de saída (símbolo e componentes) a partir da fundamental e da qualidade"""
+    # Formatar o símbolo do acorde
+    if quality == 'major':
+        symbol = root
+    elif quality == 'minor':
+        symbol = f"{root}m"
+    else:
+        # Tentar criar um símbolo mais genérico
+        symbol = f"{root}{quality[0] if quality else ''}"
+    
+    return {
+        'time': start_ms,
+        'start': start_ms,
+        'end': end_ms,
+        'chord': symbol,
+        'components': list(_chord_components(symbol))
+    }
+
+@lru_cache(maxsize=None)
+def _chord_components(symbol):
+    """Notas do acorde pelo pychord; vazio se o pychord não reconhecer o símbolo"""
+    # pychord é carregado no primeiro acorde (ou por warm_extraction)
+    from pychord import Chord
+    
+    try:
+        return tuple(Chord(symbol).components())
+    except:
+        return ()
+
+def warm_extraction():
+    """
+    Carrega o pychord e descreve um acorde, para que a primeira extração não
+    pague a importação. Chamada por backend/gunicorn_conf.py: com PRELOAD_APP,
+    no processo principal antes de criar os workers, que herdam os módulos já
+    carregados; sem, em cada worker
+    """
+    _describe_chord(*onset_chords.root_and_quality((0, 4, 7)), 0, 0)
 
 @app.route('/')
+@app.route('/index.html')
 def serve_index():
-    return send_from_directory('../frontend', 'index.html')
+    return static_files.response('index.html', config.CACHE_CONTROL['index'])
+
+@app.route('/service-worker.js')
+def serve_service_worker():
+    # Servido na raiz para controlar todo o site
+    return static_files.response('js/service-worker.js', config.CACHE_CONTROL['index'])
+
+@app.route('/manifest.json')
+def serve_manifest():
+    return _root_files.response('manifest.json', config.CACHE_CONTROL['index'])
 
 @app.route('/css/<path:filename>')
 def serve_css(filename):
-    return send_from_directory('../frontend/css', filename)
+    return static_files.response(f"css/{filename}")
 
 @app.route('/js/<path:filename>')
 def serve_js(filename):
-    return send_from_directory('../frontend/js', filename)
+    return static_files.response(f"js/{filename}")
+
+# Raiz do repositório: só o manifest é servido dela
+_root_files = http_cache.StaticFiles(os.path.dirname(config.FRONTEND_FOLDER), config.CACHE_CONTROL['index'])
 
 
 if __name__ == '__main__':
     # Criar banco de dados e tabelas se não existirem
-    database.create_database_if_not_exists()
+    database.create_tables()
     
     # Iniciar a aplicação
     app.run(host=config.HOST, port=config.PORT, debug=config.DEBUG)
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Benchmark das métricas de avaliação de acordes (ChordDetectionTester).
+
+Gera pares sintéticos (referência e estimativa com fronteiras deslocadas,
+acordes trocados e segmentos divididos) e mede, para um acervo de N arquivos,
+a contagem antiga de verdadeiros positivos (nome na lista do ground truth,
+O(n·m)) e chord_metrics.evaluate (WCSR nos três níveis e segmentação).
+
+Uso (a partir da raiz do repositório):
+    python -m backend.benchmarks.chord_metrics
+    python -m backend.benchmarks.chord_metrics --files 10000 --chords 300
+"""
+import argparse
+import random
+import time
+
+import backend.chord_metrics as chord_metrics
+
+NAMES = ['C', 'Cm', 'C7', 'Dm7', 'E-maj7', 'F', 'F#dim', 'G7', 'Am', 'Bbsus4', 'N']
+
+
+def generate_pair(chord_count, rng):
+    """Referência e estimativa sintéticas (tempos em milissegundos)."""
+    reference = []
+    position = 0
+    for _ in range(chord_count):
+        duration = rng.choice([500, 1000, 2000])
+        reference.append({'name': rng.choice(NAMES), 'start': position, 'end': position + duration})
+        position += duration
+
+    estimated = []
+    for chord in reference:
+        start = max(0, chord['start'] + rng.randint(-80, 80))
+        name = chord['name'] if rng.random() < 0.7 else rng.choice(NAMES)
+        if rng.random() < 0.1:
+            middle = (start + chord['end']) // 2
+            estimated.append({'name': name, 'start': start, 'end': middle})
+            estimated.append({'name': rng.choice(NAMES), 'start': middle, 'end': chord['end']})
+        else:
+            estimated.append({'name': name, 'start': start, 'end': chord['end']})
+    return reference, estimated
+
+
+def legacy_true_positives(reference, estimated):
+    """Contagem anterior de _calculate_metrics (busca em lista)."""
+    reference_names = [chord['name'] for chord in reference]
+    return sum(1 for chord in estimated if chord['name'] in reference_names)
+
+
+def run(file_count, chord_count, seed=0):
+    rng = random.Random(seed)
+    corpus = [generate_pair(chord_count, rng) for _ in range(file_count)]
+
+    started = time.perf_counter()
+    for reference, estimated in corpus:
+        legacy_true_positives(reference, estimated)
+    legacy = time.perf_counter() - started
+
+    started = time.perf_counter()
+    results = [chord_metrics.evaluate(reference, estimated) for reference, estimated in corpus]
+    aligned = time.perf_counter() - started
+
+    print(f"{file_count} arquivos, {chord_count} acordes por arquivo")
+    print(f"  contagem por nome (antiga): {legacy:.2f} s")
+    print(f"  alinhada no tempo:          {aligned:.2f} s ({aligned / file_count * 1000:.3f} ms/arquivo)")
+    for name in ('wcsr_root', 'wcsr_majmin', 'wcsr_sevenths', 'segmentation'):
+        print(f"  {name:<17} média {sum(r[name] for r in results) / len(results):.3f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--files', type=int, default=10000, help='Arquivos no acervo')
+    parser.add_argument('--chords', type=int, default=200, help='Acordes por arquivo')
+    args = parser.parse_args()
+    run(args.files, args.chords)
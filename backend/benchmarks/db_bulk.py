@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Benchmark das gravações em lote de acordes no PostgreSQL.
+
+Grava N acordes de uma música de teste de três formas — um INSERT por linha
+(comportamento antigo de save_chords_to_db), INSERT multi-linha com
+execute_values e COPY FROM STDIN — e mostra o tempo e as linhas por segundo.
+A música de teste é apagada no fim.
+
+O servidor é o de backend/config.py (variáveis DB_HOST, DB_PORT, DB_USER,
+DB_PASSWORD e DB_NAME); veja backend/benchmarks/db_pool.py para subir um
+servidor local descartável.
+
+Uso (a partir da raiz do repositório):
+    python -m backend.benchmarks.db_bulk
+    python -m backend.benchmarks.db_bulk --sizes 100 10000 --row-limit 10000
+"""
+import argparse
+import json
+import random
+import time
+
+import backend.database as database
+
+CHORD_NAMES = ['C', 'G', 'Am', 'F', 'Dm7', 'G7', 'Cmaj7', 'E7']
+
+
+def generate_rows(song_id, row_count, seed=0):
+    """Gera linhas (song_id, chord_name, start_time, components) sintéticas."""
+    rng = random.Random(seed)
+    return [
+        (song_id, rng.choice(CHORD_NAMES), i * 250, json.dumps(['C', 'E', 'G']))
+        for i in range(row_count)
+    ]
+
+
+def insert_row_by_row(cursor, rows):
+    for row in rows:
+        cursor.execute("""
+        INSERT INTO chords (song_id, chord_name, start_time, components)
+        VALUES (%s, %s, %s, %s)
+        """, row)
+
+
+def insert_values(cursor, rows):
+    database.extras.execute_values(cursor, """
+    INSERT INTO chords (song_id, chord_name, start_time, components) VALUES %s
+    """, rows, page_size=database.BULK_PAGE_SIZE)
+
+
+def insert_copy(cursor, rows):
+    # Força o caminho do COPY mesmo abaixo de BULK_COPY_THRESHOLD
+    threshold = database.BULK_COPY_THRESHOLD
+    database.BULK_COPY_THRESHOLD = 0
+    try:
+        database.bulk_insert(cursor, 'chords', ('song_id', 'chord_name', 'start_time', 'components'), rows)
+    finally:
+        database.BULK_COPY_THRESHOLD = threshold
+
+
+def measure(connection, song_id, strategy, rows):
+    """Substitui os acordes da música na mesma transação e devolve o tempo em segundos."""
+    cursor = connection.cursor()
+    started = time.perf_counter()
+    cursor.execute("DELETE FROM chords WHERE song_id = %s", (song_id,))
+    strategy(cursor, rows)
+    connection.commit()
+    elapsed = time.perf_counter() - started
+
+    cursor.execute("SELECT COUNT(*) FROM chords WHERE song_id = %s", (song_id,))
+    count = cursor.fetchone()[0]
+    cursor.close()
+    if count != len(rows):
+        raise RuntimeError(f"Esperadas {len(rows)} linhas, gravadas {count}")
+    return elapsed
+
+
+def run(sizes, row_limit):
+    database.create_tables()
+    song_id = database.save_song_to_db('benchmark', 'benchmark', '', '')
+    if not song_id:
+        raise SystemExit("Não foi possível criar a música de teste")
+
+    connection = database.get_connection()
+    try:
+        strategies = (('por linha', insert_row_by_row), ('values', insert_values), ('copy', insert_copy))
+        print(f"{'linhas':>8} {'modo':>10} {'tempo (s)':>10} {'linhas/s':>10}")
+        for size in sizes:
+            rows = generate_rows(song_id, size)
+            for label, strategy in strategies:
+                if strategy is insert_row_by_row and size > row_limit:
+                    print(f"{size:>8} {label:>10} {'-':>10} {'-':>10}  omitido (> --row-limit)")
+                    continue
+                elapsed = measure(connection, song_id, strategy, rows)
+                print(f"{size:>8} {label:>10} {elapsed:>10.3f} {size / elapsed:>10.0f}")
+    finally:
+        cursor = connection.cursor()
+        cursor.execute("DELETE FROM songs WHERE id = %s", (song_id,))
+        connection.commit()
+        cursor.close()
+        database.release_connection(connection)
+        database.close_pool()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100, 10000, 100000],
+                        help='Quantidades de linhas a gravar')
+    parser.add_argument('--row-limit', type=int, default=100000,
+                        help='Maior quantidade de linhas para o modo um INSERT por linha')
+    args = parser.parse_args()
+    run(args.sizes, args.row_limit)
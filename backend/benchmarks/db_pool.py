@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Benchmark do pool de conexões do PostgreSQL.
+
+Executa a mesma consulta curta com várias threads simultâneas, abrindo uma
+conexão nova a cada chamada (comportamento antigo de backend/database.py) e
+usando o pool compartilhado, e mostra a latência média, o p95 e a vazão.
+
+O servidor é o de backend/config.py (variáveis DB_HOST, DB_PORT, DB_USER,
+DB_PASSWORD e DB_NAME). Para um servidor local descartável:
+    docker run --rm -e POSTGRES_USER=kplay -e POSTGRES_PASSWORD=kplay \\
+        -e POSTGRES_DB=kplay -p 5432:5432 postgres:16
+
+Uso (a partir da raiz do repositório):
+    DB_HOST=localhost DB_USER=kplay DB_PASSWORD=kplay DB_NAME=kplay \\
+        python -m backend.benchmarks.db_pool --threads 1 8 32 --calls 200
+"""
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+import time
+
+import backend.config as config
+import backend.database as database
+
+
+def query_unpooled():
+    """Abre uma conexão, executa a consulta e fecha a conexão."""
+    connection = database.create_db_connection()
+    try:
+        cursor = connection.cursor()
+        cursor.execute("SELECT 1")
+        cursor.fetchone()
+        cursor.close()
+    finally:
+        connection.close()
+
+
+def query_pooled():
+    """Executa a consulta com uma conexão emprestada do pool."""
+    connection = database.get_connection()
+    try:
+        cursor = connection.cursor()
+        cursor.execute("SELECT 1")
+        cursor.fetchone()
+        cursor.close()
+    finally:
+        database.release_connection(connection)
+
+
+def _timed_call(function):
+    started = time.perf_counter()
+    function()
+    return time.perf_counter() - started
+
+
+def measure(function, threads, calls):
+    """
+    Executa `calls` chamadas distribuídas entre `threads` threads.
+
+    Returns:
+        tuple: (latência média em ms, p95 em ms, chamadas por segundo)
+    """
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        latencies = sorted(executor.map(lambda _: _timed_call(function), range(calls)))
+    elapsed = time.perf_counter() - started
+
+    mean_ms = sum(latencies) / len(latencies) * 1000
+    p95_ms = latencies[min(int(len(latencies) * 0.95), len(latencies) - 1)] * 1000
+    return mean_ms, p95_ms, calls / elapsed
+
+
+def run(thread_counts, calls):
+    # Aquecer o pool antes de medir
+    query_pooled()
+
+    print(f"Servidor: {config.DB_CONFIG['host']}:{config.DB_CONFIG['port']}, "
+          f"pool {config.DB_POOL_MIN}-{config.DB_POOL_MAX}")
+    print(f"{'threads':>8} {'modo':>10} {'média (ms)':>12} {'p95 (ms)':>10} {'chamadas/s':>12}")
+    for threads in thread_counts:
+        for label, function in (('sem pool', query_unpooled), ('pool', query_pooled)):
+            mean_ms, p95_ms, rate = measure(function, threads, calls)
+            print(f"{threads:>8} {label:>10} {mean_ms:>12.2f} {p95_ms:>10.2f} {rate:>12.0f}")
+
+    database.close_pool()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--threads', type=int, nargs='+', default=[1, 8, 32],
+                        help='Quantidades de threads simultâneas')
+    parser.add_argument('--calls', type=int, default=200,
+                        help='Chamadas por medição')
+    args = parser.parse_args()
+    run(args.threads, args.calls)
@@ -0,0 +1,422 @@
+#!/usr/bin/env python3
+"""
+Suíte de desempenho da extração de acordes, com comparação contra uma linha de base.
+
+Cada etapa roda sobre o acervo inteiro (por padrão o acervo fixo de
+backend/benchmarks/synthetic_midi.py, ou os .mid de --corpus) em um processo
+novo, para que o pico de memória de uma etapa não contamine a seguinte. Para
+cada etapa são registrados:
+    wall_ms        - mediana (e mínimo) do tempo de uma passada pelo acervo,
+                     depois de uma passada de aquecimento; são feitas até
+                     --repeat passadas, parando quando as medidas somam mais
+                     que --max-seconds (as etapas lentas do music21 ficam
+                     com uma ou duas);
+    peak_rss_mb    - pico de memória residente do processo da etapa;
+    alloc_peak_kb  - pico de memória alocada pelo Python durante uma passada
+                     (tracemalloc, em uma passada separada, fora da medição de tempo);
+    alloc_net_kb   - memória que continuou alocada depois da passada.
+
+O resultado vai para um JSON (--output). Se existir uma linha de base
+(--baseline), cada etapa é comparada com ela e o comando termina com código 1
+quando alguma piora além do limite (--threshold para tempo, --memory-threshold
+para memória). --save-baseline grava o resultado como a nova linha de base.
+
+As etapas de banco de dados (save_songs_batch e get_song_by_id) só rodam com
+--db e usam o servidor de backend/config.py; as músicas de teste são apagadas.
+
+Uso (a partir da raiz do repositório):
+    python -m backend.benchmarks.extraction --save-baseline
+    python -m backend.benchmarks.extraction
+    python -m backend.benchmarks.extraction --stages read_midi sweep numpy --repeat 10
+"""
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+import hashlib
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import backend.config as config
+from backend.benchmarks.synthetic_midi import write_corpus
+
+RESULTS_FOLDER = os.path.join(config.DATA_DIR, 'benchmarks')
+DEFAULT_OUTPUT = os.path.join(RESULTS_FOLDER, 'extraction.json')
+DEFAULT_BASELINE = os.path.join(RESULTS_FOLDER, 'extraction_baseline.json')
+
+# Diferenças de tempo menores que isso são ruído, qualquer que seja a proporção
+MIN_TIME_DELTA_MS = 5.0
+
+
+# Etapas: cada uma tem prepare(caminhos) -> entradas (fora da medição),
+# run(entradas) -> saída (uma passada pelo acervo) e cleanup(entradas, saída)
+# opcional, executado depois de cada passada e também fora da medição.
+
+def _read_files(paths):
+    data = []
+    for path in paths:
+        with open(path, 'rb') as f:
+            data.append(f.read())
+    return data
+
+
+def _note_tables(paths):
+    import backend.midi_reader as midi_reader
+    return [midi_reader.read_midi(path) for path in paths]
+
+
+def _prepare_read_midi(paths):
+    return _read_files(paths)
+
+
+def _run_read_midi(data):
+    import backend.midi_reader as midi_reader
+    return [midi_reader.read_midi(content) for content in data]
+
+
+def _prepare_app_note_table(paths):
+    import backend.app as app
+    return app.extract_chords_from_midi, [(path, table) for path, table in zip(paths, _note_tables(paths))]
+
+
+def _music21_chords(midi_path, tempo_map):
+    """
+    Referência: os acordes como a extração os lia antes de onset_chords, pela
+    partitura do music21 (converter.parse e os acordes do fluxo achatado).
+    """
+    import backend.app as app
+    from music21 import converter, chord
+
+    chords = []
+    for element in converter.parse(midi_path).flatten().getElementsByClass(chord.Chord):
+        start_ms = round(tempo_map.quarters_to_ms(element.offset))
+        end_ms = round(tempo_map.quarters_to_ms(element.offset + element.duration.quarterLength))
+        try:
+            chords.append(app._describe_chord(element.root().name, element.quality, start_ms, end_ms))
+        except Exception:
+            chords.append({'time': start_ms, 'start': start_ms, 'end': end_ms, 'chord': 'N/C', 'components': []})
+    return chords
+
+
+def _prepare_app_music21(paths):
+    return _music21_chords, [(path, table.tempo_map) for path, table in zip(paths, _note_tables(paths))]
+
+
+def _run_app(inputs):
+    extract, sources = inputs
+    return [extract(*source) for source in sources]
+
+
+def _extractor(engine):
+    from backend.advanced_chord_extractor import AdvancedChordExtractor
+    return AdvancedChordExtractor(engine=engine)
+
+
+def _prepare_sweep(paths):
+    return _extractor('sweep'), _note_tables(paths)
+
+
+def _prepare_numpy(paths):
+    return _extractor('numpy'), _note_tables(paths)
+
+
+def _run_extractor(inputs):
+    extractor, tables = inputs
+    return [extractor.extract_chords(table) for table in tables]
+
+
+def _prepare_analyze_key(paths):
+    extractor = _extractor('sweep')
+    return extractor, [extractor.extract_chords(table) for table in _note_tables(paths)]
+
+
+def _run_analyze_key(inputs):
+    extractor, chord_lists = inputs
+    return [extractor.analyze_key(chords) for chords in chord_lists]
+
+
+def _benchmark_songs(paths):
+    """Músicas no formato de database.save_songs_batch, com letra sintética."""
+    import backend.app as app
+    songs = []
+    for path, table in zip(paths, _note_tables(paths)):
+        chords = app.extract_chords_from_midi(path, table)
+        lyrics = [{'time': chord['time'], 'text': f"linha {i}"} for i, chord in enumerate(chords[::4])]
+        songs.append({
+            'title': f"benchmark {os.path.basename(path)}", 'artist': 'benchmark',
+            'midi_path': path, 'lyrics_path': '', 'lyrics': lyrics, 'chords': chords
+        })
+    return songs
+
+
+def _delete_songs(song_ids):
+    import backend.database as database
+    connection = database.get_connection()
+    try:
+        cursor = connection.cursor()
+        cursor.execute("DELETE FROM songs WHERE id = ANY(%s)", (list(song_ids),))
+        connection.commit()
+        cursor.close()
+    finally:
+        database.release_connection(connection)
+
+
+def _prepare_save_batch(paths):
+    import backend.database as database
+    database.create_tables()
+    return _benchmark_songs(paths)
+
+
+def _run_save_batch(songs):
+    import backend.database as database
+    song_ids = database.save_songs_batch(songs)
+    if song_ids is None:
+        raise RuntimeError("Falha ao gravar o lote no banco de dados")
+    return song_ids
+
+
+def _cleanup_save_batch(songs, song_ids):
+    _delete_songs(song_ids)
+
+
+def _prepare_get_song(paths):
+    import backend.database as database
+    database.create_tables()
+    song_ids = database.save_songs_batch(_benchmark_songs(paths))
+    if song_ids is None:
+        raise RuntimeError("Falha ao gravar as músicas de teste no banco de dados")
+    return song_ids
+
+
+def _run_get_song(song_ids):
+    import backend.database as database
+    return [database.get_song_by_id(song_id) for song_id in song_ids]
+
+
+# nome -> (descrição, prepare, run, cleanup, precisa do banco)
+STAGES = {
+    'read_midi': ('midi_reader.read_midi', _prepare_read_midi, _run_read_midi, None, False),
+    'app_note_table': ('app.extract_chords_from_midi (NoteTable)', _prepare_app_note_table, _run_app, None, False),
+    'app_music21': ('converter.parse do music21 (referência)', _prepare_app_music21, _run_app, None, False),
+    'sweep': ('AdvancedChordExtractor.extract_chords (sweep)', _prepare_sweep, _run_extractor, None, False),
+    'numpy': ('AdvancedChordExtractor.extract_chords (numpy)', _prepare_numpy, _run_extractor, None, False),
+    'analyze_key': ('AdvancedChordExtractor.analyze_key', _prepare_analyze_key, _run_analyze_key, None, False),
+    'db_save_batch': ('database.save_songs_batch', _prepare_save_batch, _run_save_batch, _cleanup_save_batch, True),
+    'db_get_song': ('database.get_song_by_id', _prepare_get_song, _run_get_song, None, True),
+}
+
+
+def _current_rss_mb():
+    """Memória residente atual (Linux); None onde /proc não existe."""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 2 ** 20
+    except (OSError, ValueError):
+        return None
+
+
+def _peak_rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss é em KB no Linux e em bytes no macOS
+    return peak / 2 ** 20 if sys.platform == 'darwin' else peak / 1024
+
+
+def measure_stage(name, paths, repeat, max_seconds):
+    """
+    Mede uma etapa (executado em um processo novo).
+
+    Returns:
+        dict: Métricas da etapa
+    """
+    _, prepare, run, cleanup, _ = STAGES[name]
+    inputs = prepare(paths)
+    rss_before = _current_rss_mb()
+
+    # Aquecimento: caches, importações tardias, tabelas montadas na primeira chamada
+    output = run(inputs)
+    if cleanup:
+        cleanup(inputs, output)
+
+    times = []
+    while len(times) < repeat and sum(times) < max_seconds * 1000:
+        started = time.perf_counter()
+        output = run(inputs)
+        times.append((time.perf_counter() - started) * 1000)
+        if cleanup:
+            cleanup(inputs, output)
+    peak_rss = _peak_rss_mb()
+
+    tracemalloc.start()
+    output = run(inputs)
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    if cleanup:
+        cleanup(inputs, output)
+    del output
+
+    return {
+        'wall_ms': statistics.median(times),
+        'wall_ms_min': min(times),
+        'peak_rss_mb': peak_rss,
+        'rss_before_mb': rss_before,
+        'alloc_peak_kb': peak / 1024,
+        'alloc_net_kb': current / 1024,
+        'repeat': len(times),
+        'files': len(paths)
+    }
+
+
+def _corpus_info(paths):
+    files = []
+    digest = hashlib.sha256()
+    for path in paths:
+        with open(path, 'rb') as f:
+            content = f.read()
+        digest.update(content)
+        files.append({'name': os.path.basename(path), 'bytes': len(content)})
+    return {'files': files, 'sha256': digest.hexdigest()}
+
+
+def _environment():
+    import numpy
+    return {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'numpy': numpy.__version__,
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S')
+    }
+
+
+def run_suite(paths, stage_names, repeat, max_seconds):
+    """
+    Executa as etapas, cada uma em um processo novo (spawn).
+
+    Returns:
+        dict: {'environment', 'corpus', 'stages': {nome: métricas}}
+    """
+    context = multiprocessing.get_context('spawn')
+    stages = {}
+    for name in stage_names:
+        description = STAGES[name][0]
+        print(f"{description}...", flush=True)
+        with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+            stages[name] = executor.submit(measure_stage, name, paths, repeat, max_seconds).result()
+        stages[name]['description'] = description
+    return {'environment': _environment(), 'corpus': _corpus_info(paths), 'stages': stages}
+
+
+def compare(result, baseline, threshold, memory_threshold):
+    """
+    Compara o resultado com a linha de base.
+
+    Args:
+        result (dict): Resultado de run_suite
+        baseline (dict): Resultado anterior
+        threshold (float): Piora máxima de tempo (0.2 = 20%)
+        memory_threshold (float): Piora máxima de memória
+
+    Returns:
+        list: Descrição das pioras acima do limite (vazia se não houver)
+    """
+    if result['corpus']['sha256'] != baseline.get('corpus', {}).get('sha256'):
+        print("Aviso: o acervo é diferente do usado na linha de base")
+
+    regressions = []
+    print(f"\n{'etapa':<16} {'métrica':<14} {'base':>10} {'atual':>10} {'variação':>9}")
+    for name, current in result['stages'].items():
+        previous = baseline.get('stages', {}).get(name)
+        if not previous:
+            print(f"{name:<16} (sem linha de base)")
+            continue
+
+        for metric, limit in (('wall_ms', threshold), ('peak_rss_mb', memory_threshold),
+                              ('alloc_peak_kb', memory_threshold)):
+            before, after = previous.get(metric), current.get(metric)
+            if not before or after is None:
+                continue
+            change = after / before - 1
+            regressed = change > limit and not (metric == 'wall_ms' and after - before < MIN_TIME_DELTA_MS)
+            print(f"{name:<16} {metric:<14} {before:>10.1f} {after:>10.1f} {change:>+8.1%}"
+                  f"{'  PIOROU' if regressed else ''}")
+            if regressed:
+                regressions.append(f"{name} {metric}: {before:.1f} -> {after:.1f} ({change:+.1%})")
+    return regressions
+
+
+def _write_json(path, data):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, 'w') as f:
+        json.dump(data, f, indent=2)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--corpus', help='Pasta com arquivos .mid (padrão: acervo fixo sintético)')
+    parser.add_argument('--stages', nargs='+', choices=list(STAGES),
+                        help='Etapas a medir (padrão: todas, menos as de banco sem --db)')
+    parser.add_argument('--repeat', type=int, default=5, help='Máximo de passadas medidas por etapa')
+    parser.add_argument('--max-seconds', type=float, default=10,
+                        help='Tempo de medição por etapa; ao passar dele, não começa nova passada')
+    parser.add_argument('--db', action='store_true', help='Inclui as etapas de banco de dados')
+    parser.add_argument('--output', default=DEFAULT_OUTPUT, help='Arquivo JSON do resultado')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help='Arquivo JSON da linha de base')
+    parser.add_argument('--save-baseline', action='store_true', help='Grava o resultado como linha de base')
+    parser.add_argument('--threshold', type=float, default=0.2,
+                        help='Piora de tempo tolerada (0.2 = 20%%)')
+    parser.add_argument('--memory-threshold', type=float, default=0.2,
+                        help='Piora de memória tolerada (0.2 = 20%%)')
+    args = parser.parse_args(argv)
+
+    stage_names = args.stages or [name for name, stage in STAGES.items() if args.db or not stage[4]]
+
+    with tempfile.TemporaryDirectory() as directory:
+        if args.corpus:
+            paths = sorted(
+                os.path.join(args.corpus, name) for name in os.listdir(args.corpus)
+                if name.lower().endswith(('.mid', '.midi', '.kar'))
+            )
+            if not paths:
+                parser.error(f"Nenhum arquivo MIDI em {args.corpus}")
+        else:
+            paths = write_corpus(directory)
+
+        result = run_suite(paths, stage_names, max(1, args.repeat), args.max_seconds)
+
+    print(f"\n{'etapa':<16} {'tempo (ms)':>11} {'mín (ms)':>9} {'pico RSS (MB)':>14} {'pico alloc (KB)':>16}")
+    for name, stage in result['stages'].items():
+        print(f"{name:<16} {stage['wall_ms']:>11.1f} {stage['wall_ms_min']:>9.1f} "
+              f"{stage['peak_rss_mb']:>14.1f} {stage['alloc_peak_kb']:>16.0f}")
+
+    _write_json(args.output, result)
+    print(f"\nResultado gravado em {args.output}")
+
+    if args.save_baseline:
+        _write_json(args.baseline, result)
+        print(f"Linha de base gravada em {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print("Sem linha de base para comparar (use --save-baseline)")
+        return 0
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    regressions = compare(result, baseline, args.threshold, args.memory_threshold)
+    if regressions:
+        print("\nPioras acima do limite:")
+        for regression in regressions:
+            print(f"  {regression}")
+        return 1
+    print("\nNenhuma piora acima do limite")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
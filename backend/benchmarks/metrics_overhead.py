@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Custo da instrumentação (backend/metrics.py) com a amostragem desligada e ligada.
+
+Mede o custo por chamada das funções usadas nos caminhos quentes (stage,
+timed, db_round_trip, cache_lookup) fora e dentro de uma medição, a extração
+do AdvancedChordExtractor sobre um MIDI sintético e um pedido completo pelo
+cliente de testes do Flask, com METRICS_SAMPLE_RATE em 0 e em 1.
+
+Uso (a partir da raiz do repositório):
+    python -m backend.benchmarks.metrics_overhead
+    python -m backend.benchmarks.metrics_overhead --calls 200000 --requests 2000
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import backend.config as config
+import backend.metrics as metrics
+from backend.benchmarks.synthetic_midi import generate_midi
+
+
+@metrics.timed('benchmark.timed')
+def _noop():
+    return None
+
+
+def _per_call(function, calls):
+    """Nanossegundos por chamada, descontado o laço vazio."""
+    started = time.perf_counter()
+    for _ in range(calls):
+        pass
+    empty = time.perf_counter() - started
+
+    started = time.perf_counter()
+    for _ in range(calls):
+        function()
+    return max(0.0, time.perf_counter() - started - empty) / calls * 1e9
+
+
+def _stage():
+    with metrics.stage('benchmark.stage'):
+        pass
+
+
+PRIMITIVES = {
+    'stage': _stage,
+    'timed': _noop,
+    'db_round_trip': lambda: metrics.db_round_trip(0.0),
+    'cache_lookup': lambda: metrics.cache_lookup('benchmark', True),
+}
+
+
+def _best(function, repeat):
+    """Menor tempo de 'repeat' execuções (s)."""
+    times = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - started)
+    return min(times)
+
+
+def run(calls, requests, repeat):
+    print(f"Primitivas ({calls} chamadas, ns por chamada)")
+    print(f"  {'função':<14} {'desligada':>10} {'ligada':>10}")
+    for name, function in PRIMITIVES.items():
+        off = _per_call(function, calls)
+        with metrics.collect(sampled=True):
+            on = _per_call(function, calls)
+        print(f"  {name:<14} {off:>10.0f} {on:>10.0f}")
+
+    # Extração completa: poucas etapas por arquivo, então o custo some no total
+    from backend.advanced_chord_extractor import AdvancedChordExtractor
+    from backend import midi_reader
+
+    extractor = AdvancedChordExtractor(engine='numpy')
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'benchmark.mid')
+        with open(path, 'wb') as f:
+            f.write(generate_midi(600, 3, 2, 4, 7))
+        note_table = midi_reader.read_midi(path)
+
+    extractor.extract_chords(note_table)
+
+    def extract(sampled):
+        with metrics.collect(sampled=sampled):
+            extractor.extract_chords(note_table)
+
+    off = _best(lambda: extract(False), repeat)
+    on = _best(lambda: extract(True), repeat)
+    print(f"\nAdvancedChordExtractor.extract_chords (600 notas, melhor de {repeat})")
+    print(f"  desligada {off * 1000:.2f} ms   ligada {on * 1000:.2f} ms")
+
+    # Pedido completo: sorteio, Server-Timing e registro no after_request
+    import backend.app as app_module
+
+    client = app_module.app.test_client()
+    results = {}
+    for rate in (0, 1):
+        config.METRICS_SAMPLE_RATE = rate
+        client.get('/api/jobs/0')
+
+        def batch():
+            for _ in range(requests):
+                client.get('/api/jobs/0')
+
+        results[rate] = _best(batch, repeat) / requests
+    config.METRICS_SAMPLE_RATE = 0
+    print(f"\nGET /api/jobs/<id> ({requests} pedidos, melhor de {repeat}, µs por pedido)")
+    print(f"  desligada {results[0] * 1e6:.1f} µs   ligada {results[1] * 1e6:.1f} µs")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--calls', type=int, default=100000, help='Chamadas por primitiva')
+    parser.add_argument('--requests', type=int, default=500, help='Pedidos por rodada')
+    parser.add_argument('--repeat', type=int, default=5, help='Rodadas (vale a melhor)')
+    args = parser.parse_args()
+    run(args.calls, args.requests, args.repeat)
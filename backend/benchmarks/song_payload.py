@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""
+Benchmark do formato compacto das músicas (backend/song_codec.py) contra o JSON.
+
+Monta documentos sintéticos com N acordes (e uma linha de letra a cada cinco
+acordes, metade delas com marcas de palavra) e mostra, para o JSON de
+/api/get_song_data e para application/x-kplay-song: o tamanho sem compressão e
+com gzip, e o tempo de leitura em Python. Se o Node estiver instalado, mede
+também JSON.parse contra o decodificador de frontend/js/song-codec.js, que é o
+que o player usa, de duas formas:
+
+- 1ª leitura: mediana de várias execuções, cada uma em um processo novo que lê
+  a música uma única vez, como o player faz ao abrir uma música;
+- JIT: média de --repeat leituras seguidas no mesmo processo, já otimizadas.
+
+Na primeira leitura, que é a que importa para o player, o JSON.parse (nativo)
+é mais rápido que o decodificador; o ganho do formato compacto é o tamanho
+transferido, não o tempo de leitura.
+
+Uso (a partir da raiz do repositório):
+    python -m backend.benchmarks.song_payload
+    python -m backend.benchmarks.song_payload --chords 200 2000 --repeat 50 --first-runs 21
+"""
+import argparse
+import gzip
+import json
+import os
+import random
+import shutil
+import statistics
+import subprocess
+import tempfile
+import time
+
+import backend.alignment as alignment
+import backend.song_codec as song_codec
+
+CHORD_NAMES = {
+    'C': ['C', 'E', 'G'], 'G': ['G', 'B', 'D'], 'Am': ['A', 'C', 'E'], 'F': ['F', 'A', 'C'],
+    'Dm7': ['D', 'F', 'A', 'C'], 'G7': ['G', 'B', 'D', 'F'], 'E7': ['E', 'G#', 'B', 'D']
+}
+WORDS = ['quando', 'você', 'vem', 'o', 'meu', 'mundo', 'muda', 'de', 'cor', 'coração']
+
+CODEC_SCRIPT = os.path.join(os.path.dirname(__file__), '..', '..', 'frontend', 'js', 'song-codec.js')
+
+# Lê o JSON e o binário gravados pelo benchmark e mede as leituras no Node.
+# Com repeat 0, mede só a primeira leitura do formato pedido (o TextDecoder é
+# aquecido antes: no Node a primeira decodificação carrega o ICU, o que no
+# navegador já aconteceu)
+NODE_BENCHMARK = """
+const fs = require('fs');
+const SongCodec = require(process.argv[1]);
+const text = fs.readFileSync(process.argv[2], 'utf-8');
+const file = fs.readFileSync(process.argv[3]);
+const buffer = file.buffer.slice(file.byteOffset, file.byteOffset + file.length);
+const repeat = Number(process.argv[4]);
+const parsers = {
+    json: () => JSON.parse(text),
+    binary: () => SongCodec.decode(buffer)
+};
+function measure(parse, warm) {
+    if (warm) parse();
+    const count = warm ? repeat : 1;
+    const started = process.hrtime.bigint();
+    for (let i = 0; i < count; i++) parse();
+    return Number(process.hrtime.bigint() - started) / 1e6 / count;
+}
+if (repeat === 0) {
+    new TextDecoder('utf-8').decode(new Uint8Array([0xC3, 0xA9]));
+    const format = process.argv[5];
+    console.log(JSON.stringify({ [format]: measure(parsers[format], false) }));
+} else {
+    console.log(JSON.stringify({
+        json: measure(parsers.json, true),
+        binary: measure(parsers.binary, true)
+    }));
+}
+"""
+
+
+def generate_song(chord_count, seed=0):
+    """Documento sintético no formato de /api/get_song_data, com alinhamento."""
+    rng = random.Random(seed)
+    chords = []
+    position = 0
+    for _ in range(chord_count):
+        name = rng.choice(list(CHORD_NAMES))
+        duration = rng.choice([500, 1000, 2000])
+        chords.append({'time': position, 'start': position, 'end': position + duration,
+                       'chord': name, 'components': CHORD_NAMES[name]})
+        position += duration
+
+    lyrics = []
+    for number, start in enumerate(chord['time'] for chord in chords[::5]):
+        words = rng.sample(WORDS, 5)
+        if number % 2:
+            word_times = [start + i * 300 for i in range(len(words))]
+            lyrics.append({
+                'time': start,
+                'text': ' '.join(words),
+                'words': [
+                    {'time': t, 'end': t + 300, 'text': word + (' ' if i < len(words) - 1 else '')}
+                    for i, (t, word) in enumerate(zip(word_times, words))
+                ]
+            })
+        else:
+            lyrics.append({'time': start, 'text': ' '.join(words)})
+
+    return {
+        'song_id': 1, 'title': 'Benchmark', 'artist': 'kplay',
+        'lyrics': lyrics, 'chords': chords,
+        'alignment': alignment.align_song(lyrics, chords)
+    }
+
+
+def _time_ms(function, repeat):
+    function()
+    started = time.perf_counter()
+    for _ in range(repeat):
+        function()
+    return (time.perf_counter() - started) / repeat * 1000
+
+
+def _node_times(json_text, binary, repeat, first_runs):
+    """
+    Tempos de leitura no Node (ms) ou None se o Node não estiver disponível.
+
+    Returns:
+        dict: 'json' e 'binary' com a média das leituras já otimizadas pelo
+              JIT; 'first_json' e 'first_binary' com a mediana da primeira
+              leitura em first_runs processos novos
+    """
+    node = shutil.which('node')
+    if not node:
+        return None
+
+    with tempfile.TemporaryDirectory() as directory:
+        json_path = os.path.join(directory, 'song.json')
+        binary_path = os.path.join(directory, 'song.bin')
+        with open(json_path, 'w', encoding='utf-8') as f:
+            f.write(json_text)
+        with open(binary_path, 'wb') as f:
+            f.write(binary)
+
+        def run_node(repeat, *extra):
+            result = subprocess.run(
+                [node, '-e', NODE_BENCHMARK, os.path.abspath(CODEC_SCRIPT), json_path, binary_path,
+                 str(repeat), *extra],
+                capture_output=True, text=True, check=True
+            )
+            return json.loads(result.stdout)
+
+        times = run_node(repeat)
+        for format_name in ('json', 'binary'):
+            firsts = [run_node(0, format_name)[format_name] for _ in range(first_runs)]
+            times[f'first_{format_name}'] = statistics.median(firsts)
+    return times
+
+
+def run(chord_counts, repeat, first_runs):
+    print(f"{'acordes':>8} {'formato':>8} {'bytes':>10} {'gzip':>10} {'py (ms)':>9} "
+          f"{'node 1ª (ms)':>13} {'node JIT (ms)':>14}")
+    for chord_count in chord_counts:
+        document = generate_song(chord_count)
+
+        # Mesmo JSON compacto que o jsonify do Flask produz
+        json_text = json.dumps(document, separators=(',', ':'))
+        binary = song_codec.encode_song(document)
+        if song_codec.decode_song(binary) != json.loads(json_text):
+            raise RuntimeError("O formato compacto não reproduziu o documento")
+
+        node = _node_times(json_text, binary, repeat, first_runs)
+        rows = (
+            ('json', json_text.encode('utf-8'), _time_ms(lambda: json.loads(json_text), repeat)),
+            ('binário', binary, _time_ms(lambda: song_codec.decode_song(binary), repeat))
+        )
+        for label, data, python_ms in rows:
+            key = 'json' if label == 'json' else 'binary'
+            if node:
+                node_ms = f"{node[f'first_{key}']:>13.3f} {node[key]:>14.3f}"
+            else:
+                node_ms = f"{'-':>13} {'-':>14}"
+            print(f"{chord_count:>8} {label:>8} {len(data):>10} {len(gzip.compress(data)):>10} "
+                  f"{python_ms:>9.3f} {node_ms}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--chords', type=int, nargs='+', default=[200, 2000, 20000],
+                        help='Quantidades de acordes por música')
+    parser.add_argument('--repeat', type=int, default=100,
+                        help='Repetições de cada leitura')
+    parser.add_argument('--first-runs', type=int, default=11,
+                        help='Processos do Node para a mediana da primeira leitura')
+    args = parser.parse_args()
+    run(args.chords, args.repeat, args.first_runs)
@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+"""
+Tempo de partida do backend, da importação do app ao primeiro pedido.
+
+Cada rodada é um interpretador novo (python -c), para que nada já importado
+pelo benchmark entre na medida. Para cada modo são registrados, em mediana
+de --repeat rodadas:
+    import_ms     - import backend.app (Flask, banco, rotas e arquivos estáticos);
+    warm_ms       - warm_extraction (só no modo 'warm', como o processo
+                    principal do gunicorn com PRELOAD_APP);
+    request_ms    - primeiro pedido pelo cliente de testes do Flask;
+    extract_ms    - primeira extração de acordes de um MIDI sintético (no modo
+                    'lazy' inclui a importação do pychord);
+    steady_ms     - a mesma extração repetida, para comparação.
+Também é listado quais dependências pesadas já estão carregadas depois da
+importação do app (o esperado é nenhuma).
+
+Com --gunicorn o gunicorn é iniciado de verdade com backend/gunicorn_conf.py,
+com e sem PRELOAD_APP, e é medido o tempo até a primeira resposta HTTP e a
+memória dos workers.
+
+Uso (a partir da raiz do repositório):
+    python -m backend.benchmarks.startup
+    python -m backend.benchmarks.startup --repeat 5 --gunicorn --workers 4
+"""
+import argparse
+import json
+import os
+import signal
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.request
+
+import backend.config as config
+from backend.benchmarks.synthetic_midi import generate_midi
+
+MODES = ('lazy', 'warm')
+
+# Módulos que não devem ser carregados pela importação do app
+HEAVY_MODULES = ('music21', 'pychord', 'numpy', 'matplotlib')
+
+# Executado em um interpretador novo: argv[1] é o modo e argv[2] o MIDI
+_PROBE = """
+import json, sys, time
+started = time.perf_counter()
+import backend.app as app_module
+result = {'import_ms': (time.perf_counter() - started) * 1000,
+          'loaded': [name for name in %(heavy)r if name in sys.modules]}
+if sys.argv[1] == 'warm':
+    started = time.perf_counter()
+    app_module.warm_extraction()
+    result['warm_ms'] = (time.perf_counter() - started) * 1000
+client = app_module.app.test_client()
+started = time.perf_counter()
+client.get('/api/jobs/0')
+result['request_ms'] = (time.perf_counter() - started) * 1000
+started = time.perf_counter()
+app_module.extract_chords_from_midi(sys.argv[2])
+result['extract_ms'] = (time.perf_counter() - started) * 1000
+started = time.perf_counter()
+app_module.extract_chords_from_midi(sys.argv[2])
+result['steady_ms'] = (time.perf_counter() - started) * 1000
+print(json.dumps(result))
+""" % {'heavy': HEAVY_MODULES}
+
+PHASES = ('import_ms', 'warm_ms', 'request_ms', 'extract_ms', 'steady_ms')
+
+
+def _repo_root():
+    return os.path.dirname(config.BASE_DIR)
+
+
+def _probe(mode, midi_path):
+    """Uma rodada do modo em um interpretador novo."""
+    env = dict(os.environ, PYTHONPATH=_repo_root())
+    output = subprocess.run([sys.executable, '-c', _PROBE, mode, midi_path], cwd=_repo_root(), env=env,
+                            capture_output=True, text=True, check=True).stdout
+    # A última linha é o resultado; as anteriores são mensagens do app
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def run_modes(repeat, midi_path):
+    results = {}
+    for mode in MODES:
+        runs = [_probe(mode, midi_path) for _ in range(repeat)]
+        results[mode] = {phase: statistics.median(run[phase] for run in runs)
+                         for phase in PHASES if phase in runs[0]}
+        results[mode]['loaded'] = runs[0]['loaded']
+    return results
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def _rss_kb(pid):
+    """VmRSS do processo em kB (Linux), ou None."""
+    try:
+        with open(f'/proc/{pid}/status') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return None
+
+
+def _gunicorn_once(preload, workers, timeout):
+    """Inicia o gunicorn e mede o tempo até a primeira resposta HTTP."""
+    port = _free_port()
+    env = dict(os.environ, PRELOAD_APP='true' if preload else 'false')
+    started = time.perf_counter()
+    process = subprocess.Popen([sys.executable, '-m', 'gunicorn', '-c', os.path.join('backend', 'gunicorn_conf.py'),
+                                '-w', str(workers), '-b', f'127.0.0.1:{port}', 'backend.app:app'],
+                               cwd=_repo_root(), env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                               start_new_session=True)
+    try:
+        first_response = None
+        while time.perf_counter() - started < timeout and process.poll() is None:
+            try:
+                urllib.request.urlopen(f'http://127.0.0.1:{port}/api/jobs/0', timeout=1)
+            except urllib.error.HTTPError:
+                pass  # 404 também é uma resposta
+            except OSError:
+                time.sleep(0.01)
+                continue
+            first_response = time.perf_counter() - started
+            break
+        if first_response is None:
+            return None
+
+        # Espera todos os workers aquecerem antes de medir a memória
+        time.sleep(1)
+        children = subprocess.run(['pgrep', '-P', str(process.pid)], capture_output=True, text=True).stdout.split()
+        worker_rss = [_rss_kb(int(pid)) for pid in children]
+        return {
+            'first_response_ms': first_response * 1000,
+            'master_rss_mb': (_rss_kb(process.pid) or 0) / 1024,
+            'worker_rss_mb': statistics.mean(rss for rss in worker_rss if rss) / 1024 if any(worker_rss) else 0.0
+        }
+    finally:
+        os.killpg(process.pid, signal.SIGTERM)
+        process.wait()
+
+
+def run_gunicorn(repeat, workers, timeout):
+    results = {}
+    for preload in (False, True):
+        runs = [run for run in (_gunicorn_once(preload, workers, timeout) for _ in range(repeat)) if run]
+        if not runs:
+            print(f"Erro ao iniciar o gunicorn (PRELOAD_APP={preload})")
+            continue
+        results[preload] = {key: statistics.median(run[key] for run in runs) for key in runs[0]}
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=3, help='Rodadas por modo (vale a mediana)')
+    parser.add_argument('--notes', type=int, default=600, help='Notas do MIDI sintético')
+    parser.add_argument('--gunicorn', action='store_true', help='Mede também o gunicorn com e sem PRELOAD_APP')
+    parser.add_argument('--workers', type=int, default=2, help='Workers do gunicorn')
+    parser.add_argument('--timeout', type=float, default=60, help='Espera máxima pela primeira resposta (s)')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        midi_path = os.path.join(directory, 'startup.mid')
+        with open(midi_path, 'wb') as f:
+            f.write(generate_midi(args.notes, 3, 2, 4, 7))
+        results = run_modes(args.repeat, midi_path)
+
+    print(f"Partida em interpretador novo ({args.notes} notas, mediana de {args.repeat}, ms)")
+    print(f"  {'modo':<6}" + ''.join(f" {phase[:-3]:>9}" for phase in PHASES) + "  total")
+    for mode, phases in results.items():
+        total = sum(phases.get(phase, 0.0) for phase in PHASES if phase != 'steady_ms')
+        print(f"  {mode:<6}" + ''.join(f" {phases[phase]:>9.1f}" if phase in phases else f" {'-':>9}"
+                                       for phase in PHASES) + f"  {total:.1f}")
+    loaded = results['lazy']['loaded']
+    print(f"  carregados pela importação do app: {', '.join(loaded) if loaded else 'nenhum'}")
+
+    if args.gunicorn:
+        print(f"\ngunicorn ({args.workers} workers, mediana de {args.repeat})")
+        print(f"  {'PRELOAD_APP':<12} {'1ª resposta (ms)':>17} {'principal (MB)':>15} {'worker (MB)':>12}")
+        for preload, result in run_gunicorn(args.repeat, args.workers, args.timeout).items():
+            print(f"  {str(preload).lower():<12} {result['first_response_ms']:>17.1f} "
+                  f"{result['master_rss_mb']:>15.1f} {result['worker_rss_mb']:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
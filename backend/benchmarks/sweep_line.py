@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Benchmark da varredura de janelas do AdvancedChordExtractor.
+
+Compara a varredura antiga (todas as notas reexaminadas a cada janela) com a
+varredura por eventos (sweep line) e com o motor vetorizado 'numpy' em listas de
+notas sintéticas de 1k, 10k e 100k notas, verificando que todos produzem
+exatamente os mesmos acordes.
+
+Uso (a partir da raiz do repositório):
+    python -m backend.benchmarks.sweep_line
+    python -m backend.benchmarks.sweep_line --sizes 1000 10000 --naive-limit 10000
+"""
+import argparse
+import random
+import time
+
+from backend.advanced_chord_extractor import AdvancedChordExtractor
+
+
+def generate_notes(note_count, seed=0):
+    """
+    Gera notas sintéticas parecidas com um MIDI de karaokê multi-faixa.
+
+    Args:
+        note_count (int): Número de notas a gerar
+        seed (int): Semente do gerador aleatório
+
+    Returns:
+        list: Notas com 'pitch', 'start', 'duration' e 'end' (em quartos de nota)
+    """
+    rng = random.Random(seed)
+    durations = [0.25, 0.5, 1.0, 1.5, 2.0, 4.0]
+    notes = []
+    time_position = 0.0
+    while len(notes) < note_count:
+        # Cada "batida" dispara algumas notas simultâneas (acorde + melodia)
+        root = rng.randrange(48, 60)
+        pitches = [root, root + rng.choice([3, 4]), root + 7, rng.randrange(60, 84)]
+        for pitch in pitches[:note_count - len(notes)]:
+            duration = rng.choice(durations)
+            notes.append({
+                'pitch': pitch,
+                'start': time_position,
+                'duration': duration,
+                'end': time_position + duration
+            })
+        time_position += rng.choice([0.25, 0.5, 1.0])
+    return notes
+
+
+def scan_windows_naive(extractor, all_notes):
+    """Varredura original: O(janelas × notas)."""
+    all_notes = sorted(all_notes, key=lambda x: x['start'])
+    unique_times = sorted(list(set([note['start'] for note in all_notes] +
+                                   [note['end'] for note in all_notes])))
+    chords = []
+    for i in range(len(unique_times) - 1):
+        start_time = unique_times[i]
+        end_time = unique_times[i+1]
+        if end_time - start_time < extractor.time_window:
+            continue
+        active_notes = []
+        for note in all_notes:
+            if note['start'] <= start_time and note['end'] > start_time:
+                active_notes.append(note['pitch'])
+        active_notes = sorted(list(set(active_notes)))
+        if len(active_notes) < extractor.min_notes_for_chord:
+            continue
+        chord_info = extractor._identify_chord(active_notes)
+        if chord_info:
+            chord_info['start'] = start_time
+            chord_info['end'] = end_time
+            chord_info['duration'] = end_time - start_time
+            chords.append(chord_info)
+    return chords
+
+
+def _timed(function, *args):
+    started = time.perf_counter()
+    result = function(*args)
+    return result, time.perf_counter() - started
+
+
+def run(sizes, naive_limit):
+    extractor = AdvancedChordExtractor()
+    numpy_extractor = AdvancedChordExtractor(engine='numpy')
+
+    print(f"{'notas':>8} {'antigo (s)':>12} {'sweep (s)':>12} {'numpy (s)':>12} {'ganho':>8}  resultado")
+    for size in sizes:
+        notes = generate_notes(size)
+        new_chords, new_time = _timed(extractor._scan_windows, notes)
+        numpy_chords, numpy_time = _timed(numpy_extractor._scan_windows_numpy, notes)
+        status = 'idêntico' if numpy_chords == new_chords else 'DIFERENTE (numpy)'
+
+        if size > naive_limit:
+            print(f"{size:>8} {'-':>12} {new_time:>12.3f} {numpy_time:>12.3f} {'-':>8}  {status}, antigo omitido (> --naive-limit)")
+            continue
+
+        old_chords, old_time = _timed(scan_windows_naive, extractor, notes)
+        if old_chords != new_chords:
+            status = 'DIFERENTE (sweep)'
+        print(f"{size:>8} {old_time:>12.3f} {new_time:>12.3f} {numpy_time:>12.3f} {old_time / new_time:>7.1f}x  {status}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000],
+                        help='Quantidades de notas a testar')
+    parser.add_argument('--naive-limit', type=int, default=100000,
+                        help='Maior quantidade de notas para rodar a varredura antiga')
+    args = parser.parse_args()
+    run(args.sizes, args.naive_limit)
@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Arquivos MIDI sintéticos de tamanho controlado para os benchmarks.
+
+generate_midi monta um SMF formato 1 diretamente em bytes (sem dependências):
+uma faixa de andamentos e N faixas de notas, cada uma tocando acordes de
+'polyphony' notas simultâneas. A mesma semente sempre gera os mesmos bytes.
+
+CORPUS é o acervo fixo usado por backend/benchmarks/extraction.py: poucos
+arquivos, pequenos o bastante para a suíte rodar em poucos minutos (o
+caminho do music21 no app leva ~15 ms por acorde), cobrindo os
+casos que mudam o custo da extração (muitas notas, polifonia alta, muitas
+faixas, muitas mudanças de andamento).
+
+Uso (a partir da raiz do repositório):
+    python -m backend.benchmarks.synthetic_midi /tmp/corpus
+    python -m backend.benchmarks.synthetic_midi /tmp/grande.mid --notes 50000 --tracks 8
+"""
+import argparse
+import os
+import random
+import struct
+
+TICKS_PER_BEAT = 480
+
+# Acordes de base (intervalos a partir da fundamental)
+CHORD_SHAPES = [(0, 4, 7), (0, 3, 7), (0, 4, 7, 10), (0, 3, 7, 10), (0, 4, 7, 11), (0, 5, 7)]
+
+# Acervo fixo: (nome, notas, polifonia, faixas, mudanças de andamento, semente)
+CORPUS = [
+    ('simples', 300, 3, 1, 0, 1),
+    ('faixas', 1200, 3, 8, 2, 2),
+    ('polifonico', 400, 6, 2, 0, 3),
+    ('andamentos', 900, 3, 2, 100, 4),
+    ('longo', 2400, 4, 4, 8, 5),
+]
+
+PERCUSSION_CHANNEL = 9
+
+
+def _varlen(value):
+    """Quantidade de comprimento variável do SMF."""
+    data = bytearray([value & 0x7F])
+    value >>= 7
+    while value:
+        data.insert(0, (value & 0x7F) | 0x80)
+        value >>= 7
+    return bytes(data)
+
+
+def _track_chunk(events):
+    """Bloco MTrk a partir de eventos (tick, ordem, bytes), já com o fim de faixa."""
+    events.sort(key=lambda event: (event[0], event[1]))
+    data = bytearray()
+    last_tick = 0
+    for tick, _, message in events:
+        data += _varlen(tick - last_tick) + message
+        last_tick = tick
+    data += _varlen(0) + b'\xff\x2f\x00'
+    return b'MTrk' + struct.pack('>I', len(data)) + bytes(data)
+
+
+def generate_midi(note_count, polyphony=3, tracks=2, tempo_changes=0, seed=0):
+    """
+    Gera um arquivo MIDI sintético.
+
+    Args:
+        note_count (int): Total de notas, divididas entre as faixas
+        polyphony (int): Notas simultâneas em cada acorde
+        tracks (int): Faixas de notas (além da faixa de andamentos)
+        tempo_changes (int): Mudanças de andamento ao longo da música
+        seed (int): Semente do gerador aleatório
+
+    Returns:
+        bytes: Conteúdo do arquivo (SMF formato 1)
+    """
+    rng = random.Random(seed)
+    polyphony = max(1, polyphony)
+    tracks = max(1, tracks)
+
+    chunks = []
+    end_tick = 0
+    for track in range(tracks):
+        channel = track % 15
+        if channel >= PERCUSSION_CHANNEL:
+            channel += 1
+
+        events = []
+        tick = 0
+        remaining = note_count // tracks + (1 if track < note_count % tracks else 0)
+        while remaining > 0:
+            root = rng.randrange(40, 64)
+            shape = rng.choice(CHORD_SHAPES)
+            # Polifonia acima do acorde: dobras em outras oitavas
+            pitches = [root + shape[i % len(shape)] + 12 * (i // len(shape)) for i in range(polyphony)]
+            duration = rng.choice((1, 2, 4)) * TICKS_PER_BEAT // 2
+            for pitch in pitches[:remaining]:
+                velocity = rng.randrange(60, 110)
+                events.append((tick, 1, bytes((0x90 | channel, min(pitch, 127), velocity))))
+                events.append((tick + duration, 0, bytes((0x80 | channel, min(pitch, 127), 0))))
+            remaining -= min(len(pitches), remaining)
+            end_tick = max(end_tick, tick + duration)
+            tick += rng.choice((1, 2)) * TICKS_PER_BEAT // 2
+        chunks.append(_track_chunk(events))
+
+    # Faixa de andamentos: 120 bpm e mudanças espalhadas até o fim da música
+    tempo_events = [(0, 0, b'\xff\x51\x03' + (500000).to_bytes(3, 'big'))]
+    for i in range(tempo_changes):
+        tick = (i + 1) * end_tick // (tempo_changes + 1)
+        tempo = rng.randrange(300000, 1000000)
+        tempo_events.append((tick, 0, b'\xff\x51\x03' + tempo.to_bytes(3, 'big')))
+    chunks.insert(0, _track_chunk(tempo_events))
+
+    header = b'MThd' + struct.pack('>IHHH', 6, 1, len(chunks), TICKS_PER_BEAT)
+    return header + b''.join(chunks)
+
+
+def write_corpus(directory):
+    """
+    Grava o acervo fixo em uma pasta.
+
+    Returns:
+        list: Caminhos dos arquivos, na ordem de CORPUS
+    """
+    os.makedirs(directory, exist_ok=True)
+    paths = []
+    for name, notes, polyphony, tracks, tempo_changes, seed in CORPUS:
+        path = os.path.join(directory, f"{name}.mid")
+        with open(path, 'wb') as f:
+            f.write(generate_midi(notes, polyphony, tracks, tempo_changes, seed))
+        paths.append(path)
+    return paths
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('destination', help='Pasta para o acervo fixo, ou arquivo .mid com --notes')
+    parser.add_argument('--notes', type=int, help='Gera um único arquivo com esta quantidade de notas')
+    parser.add_argument('--polyphony', type=int, default=3, help='Notas simultâneas por acorde')
+    parser.add_argument('--tracks', type=int, default=2, help='Faixas de notas')
+    parser.add_argument('--tempo-changes', type=int, default=0, help='Mudanças de andamento')
+    parser.add_argument('--seed', type=int, default=0, help='Semente do gerador aleatório')
+    args = parser.parse_args()
+
+    if args.notes:
+        with open(args.destination, 'wb') as f:
+            f.write(generate_midi(args.notes, args.polyphony, args.tracks, args.tempo_changes, args.seed))
+        print(f"Arquivo gravado em {args.destination}")
+    else:
+        for path in write_corpus(args.destination):
+            print(path)
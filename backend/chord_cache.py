@@ -0,0 +1,194 @@
+"""
+Cache de análises de acordes endereçado pelo conteúdo do arquivo MIDI.
+
+A chave é o SHA-256 dos bytes do MIDI combinado com a versão e as configurações
+do extrator, então o mesmo arquivo enviado com outro nome reaproveita a análise
+e qualquer mudança no extrator invalida as entradas antigas. Há duas camadas:
+um LRU limitado em memória e um diretório em disco compartilhado pelos
+processos do servidor e pelos processos de trabalho.
+"""
+from collections import OrderedDict
+import hashlib
+import json
+import os
+import tempfile
+import threading
+
+# Versão do formato das entradas; alterar invalida todo o cache
+CACHE_FORMAT_VERSION = 1
+
+# Tamanho dos blocos lidos ao calcular o hash de um arquivo
+HASH_CHUNK_SIZE = 1024 * 1024
+
+# Hashes já calculados neste processo: (caminho, mtime, tamanho) -> hash
+_path_hashes = OrderedDict()
+_path_hashes_lock = threading.Lock()
+_PATH_HASHES_LIMIT = 4096
+
+
+def hash_midi(source):
+    """
+    Calcula o SHA-256 de um arquivo MIDI.
+
+    O hash de um caminho é memorizado enquanto o arquivo não mudar (mesmo
+    mtime e tamanho), então pedidos repetidos não releem o arquivo.
+
+    Args:
+        source (str | bytes): Caminho do arquivo ou seu conteúdo
+
+    Returns:
+        str: Hash hexadecimal do conteúdo
+    """
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return hashlib.sha256(source).hexdigest()
+
+    stat = os.stat(source)
+    memo_key = (os.path.abspath(source), stat.st_mtime_ns, stat.st_size)
+    with _path_hashes_lock:
+        cached = _path_hashes.get(memo_key)
+        if cached is not None:
+            _path_hashes.move_to_end(memo_key)
+            return cached
+
+    # A leitura fica fora da trava: outras threads seguem usando a memória
+    digest = hashlib.sha256()
+    with open(source, 'rb') as f:
+        for block in iter(lambda: f.read(HASH_CHUNK_SIZE), b''):
+            digest.update(block)
+
+    midi_hash = digest.hexdigest()
+    _memorize_hash(memo_key, midi_hash)
+    return midi_hash
+
+
+def remember_hash(path, midi_hash):
+    """
+    Registra o hash já conhecido de um arquivo (calculado durante o upload),
+    para que hash_midi não precise lê-lo.
+
+    Args:
+        path (str): Caminho do arquivo
+        midi_hash (str): SHA-256 do conteúdo
+    """
+    stat = os.stat(path)
+    _memorize_hash((os.path.abspath(path), stat.st_mtime_ns, stat.st_size), midi_hash)
+
+
+def _memorize_hash(memo_key, midi_hash):
+    # Chamado por threads diferentes do servidor: a trava protege o LRU
+    with _path_hashes_lock:
+        _path_hashes[memo_key] = midi_hash
+        _path_hashes.move_to_end(memo_key)
+        if len(_path_hashes) > _PATH_HASHES_LIMIT:
+            _path_hashes.popitem(last=False)
+
+
+def cache_key(midi_hash, settings):
+    """
+    Monta a chave de uma análise.
+
+    Args:
+        midi_hash (str): SHA-256 do conteúdo do MIDI
+        settings (dict): Versão e configurações do extrator (serializáveis em JSON)
+
+    Returns:
+        str: Chave hexadecimal
+    """
+    payload = json.dumps([CACHE_FORMAT_VERSION, midi_hash, settings], sort_keys=True)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class ChordCache:
+    """
+    Cache de duas camadas (memória e disco) de listas de acordes.
+
+    As listas devolvidas pela camada de memória são compartilhadas entre as
+    chamadas e não devem ser modificadas por quem as recebe.
+    """
+
+    def __init__(self, directory, max_entries=256):
+        """
+        Args:
+            directory (str): Pasta da camada em disco
+            max_entries (int): Número máximo de análises mantidas em memória
+        """
+        self.directory = directory
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """
+        Busca uma análise, primeiro em memória e depois em disco.
+
+        Args:
+            key (str): Chave montada por cache_key
+
+        Returns:
+            list: Acordes da análise ou None se não estiver no cache
+        """
+        if not key:
+            return None
+
+        with self._lock:
+            chords = self._memory.get(key)
+            if chords is not None:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return chords
+
+        try:
+            with open(self._entry_path(key), 'r') as f:
+                chords = json.load(f)
+        except (OSError, ValueError):
+            with self._lock:
+                self.misses += 1
+            return None
+
+        with self._lock:
+            self.hits += 1
+            self._remember(key, chords)
+        return chords
+
+    def put(self, key, chords):
+        """
+        Guarda uma análise nas duas camadas.
+
+        Args:
+            key (str): Chave montada por cache_key
+            chords (list): Acordes extraídos
+        """
+        with self._lock:
+            self._remember(key, chords)
+
+        entry_path = self._entry_path(key)
+        try:
+            os.makedirs(os.path.dirname(entry_path), exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(entry_path), suffix='.tmp')
+            try:
+                with os.fdopen(fd, 'w') as f:
+                    json.dump(chords, f)
+                os.replace(tmp_path, entry_path)
+            except Exception:
+                os.remove(tmp_path)
+                raise
+        except Exception as e:
+            print(f"Erro ao gravar cache de acordes: {e}")
+
+    def clear_memory(self):
+        """Esvazia a camada em memória (a camada em disco é mantida)."""
+        with self._lock:
+            self._memory.clear()
+
+    def _remember(self, key, chords):
+        self._memory[key] = chords
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def _entry_path(self, key):
+        # Subpastas pelo prefixo da chave evitam diretórios com milhares de arquivos
+        return os.path.join(self.directory, key[:2], f"{key}.json")
@@ -1,10 +1,20 @@
-import music21
 import numpy as np
 import json
 import os
-import matplotlib.pyplot as plt
-from matplotlib.colors import LinearSegmentedColormap
 import tempfile
+import argparse
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+import backend.chord_metrics as chord_metrics
+from backend.advanced_chord_extractor import AdvancedChordExtractor
+
+# matplotlib só é importado pelos métodos _visualize_*: a avaliação sem
+# visualizações (e os processos de trabalho de test_directory) não o carregam
+
+# Métricas alinhadas no tempo (chord_metrics.evaluate) guardadas por arquivo
+TIME_METRICS = ('wcsr_root', 'wcsr_majmin', 'wcsr_sevenths', 'oversegmentation',
+                'undersegmentation', 'segmentation', 'duration')
 
 class ChordDetectionTester:
     """
@@ -52,6 +62,29 @@ class ChordDetectionTester:
         Returns:
             dict: Resultados do teste
         """
+        result = self.evaluate_file(midi_file_path)
+        if 'error' in result:
+            return result
+        
+        self.results[result['file_name']] = result
+        
+        # Criar visualizações se solicitado
+        if save_visualization:
+            self._create_visualizations(result, output_dir)
+        
+        return result
+    
+    def evaluate_file(self, midi_file_path):
+        """
+        Extrai os acordes de um arquivo MIDI e calcula as métricas, sem guardar
+        o resultado nem criar visualizações (usado pelos processos de test_directory).
+        
+        Args:
+            midi_file_path (str): Caminho para o arquivo MIDI
+            
+        Returns:
+            dict: Resultados do teste, ou com 'error' se o arquivo falhar
+        """
         try:
             # Extrair acordes usando o extrator fornecido
             detected_chords = self.extractor.extract_chords(midi_file_path)
@@ -65,22 +98,13 @@ class ChordDetectionTester:
             # Calcular métricas
             metrics = self._calculate_metrics(detected_chords, ground_truth_chords)
             
-            # Salvar resultados
-            result = {
+            return {
                 'file_name': file_name,
                 'detected_chords': detected_chords,
                 'ground_truth_chords': ground_truth_chords,
                 'metrics': metrics
             }
             
-            self.results[file_name] = result
-            
-            # Criar visualizações se solicitado
-            if save_visualization:
-                self._create_visualizations(result, output_dir)
-            
-            return result
-            
         except Exception as e:
             print(f"Erro ao testar arquivo {midi_file_path}: {e}")
             return {
@@ -88,13 +112,36 @@ class ChordDetectionTester:
                 'error': str(e)
             }
     
-    def test_directory(self, save_visualization=False, output_dir=None):
+    def find_midi_files(self):
+        """
+        Lista os arquivos MIDI do diretório de teste, em ordem alfabética de
+        caminho (a mesma ordem em qualquer sistema de arquivos).
+        
+        Returns:
+            list: Caminhos dos arquivos MIDI
+        """
+        midi_files = []
+        for root, dirs, files in os.walk(self.test_files_dir):
+            dirs.sort()
+            for file in sorted(files):
+                if file.lower().endswith(('.mid', '.midi', '.kar')):
+                    midi_files.append(os.path.join(root, file))
+        return midi_files
+    
+    def test_directory(self, save_visualization=False, output_dir=None, jobs=1):
         """
         Testa a detecção de acordes em todos os arquivos MIDI no diretório de teste.
         
+        Com jobs > 1 os arquivos são avaliados em paralelo, em processos
+        separados; os resultados são guardados na ordem dos arquivos, então as
+        métricas agregadas não dependem da ordem em que os processos terminam.
+        As visualizações são criadas depois, numa etapa própria
+        (render_visualizations).
+        
         Args:
             save_visualization (bool): Se deve salvar visualizações dos resultados
             output_dir (str, optional): Diretório para salvar visualizações
+            jobs (int): Número de processos (1 = no próprio processo)
             
         Returns:
             dict: Resultados agregados dos testes
@@ -106,24 +153,63 @@ class ChordDetectionTester:
         # Limpar resultados anteriores
         self.results = {}
         
-        # Encontrar todos os arquivos MIDI no diretório
-        midi_files = []
-        for root, _, files in os.walk(self.test_files_dir):
-            for file in files:
-                if file.lower().endswith(('.mid', '.midi', '.kar')):
-                    midi_files.append(os.path.join(root, file))
+        midi_files = self.find_midi_files()
         
-        # Testar cada arquivo
-        for midi_file in midi_files:
-            self.test_file(midi_file, save_visualization, output_dir)
+        if jobs > 1 and len(midi_files) > 1:
+            # O extrator e o ground truth vão uma vez para cada processo; map
+            # devolve os resultados na ordem dos arquivos. Blocos pequenos
+            # equilibram a carga entre arquivos curtos e longos.
+            chunksize = max(1, min(16, len(midi_files) // (jobs * 8)))
+            with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker,
+                                     initargs=(self.extractor, self.ground_truth)) as executor:
+                results = list(executor.map(_evaluate_file, midi_files, chunksize=chunksize))
+        else:
+            results = [self.evaluate_file(midi_file) for midi_file in midi_files]
+        
+        for result in results:
+            if 'error' not in result:
+                self.results[result['file_name']] = result
+        
+        if save_visualization:
+            self.render_visualizations(output_dir, jobs)
         
         # Calcular métricas agregadas
         return self._aggregate_results()
     
+    def render_visualizations(self, output_dir=None, jobs=1):
+        """
+        Cria as visualizações de todos os resultados guardados.
+        
+        Args:
+            output_dir (str, optional): Diretório para salvar visualizações
+            jobs (int): Número de processos (1 = no próprio processo)
+            
+        Returns:
+            int: Número de arquivos com visualizações criadas
+        """
+        results = list(self.results.values())
+        
+        if jobs > 1 and len(results) > 1:
+            with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker,
+                                     initargs=(self.extractor, {})) as executor:
+                list(executor.map(_render_result, results, [output_dir] * len(results)))
+        else:
+            for result in results:
+                self._create_visualizations(result, output_dir)
+        
+        return len(results)
+    
     def _calculate_metrics(self, detected_chords, ground_truth_chords):
         """
         Calcula métricas de precisão para os acordes detectados.
         
+        As métricas por nome ('precision', 'recall', ...) só verificam se o
+        nome detectado aparece no ground truth; as alinhadas no tempo
+        (chord_metrics.evaluate: 'wcsr_root', 'wcsr_majmin', 'wcsr_sevenths',
+        'segmentation', ...) comparam os acordes pela duração em que coincidem
+        e precisam de 'start' e 'end' no ground truth, na mesma unidade do
+        extrator (milissegundos).
+        
         Args:
             detected_chords (list): Acordes detectados pelo extrator
             ground_truth_chords (list): Acordes corretos para comparação
@@ -139,7 +225,8 @@ class ChordDetectionTester:
                 'f1_score': None,
                 'accuracy': None,
                 'error_rate': None,
-                'confidence': sum(chord.get('confidence', 0) for chord in detected_chords) / len(detected_chords) if detected_chords else 0
+                'confidence': sum(chord.get('confidence', 0) for chord in detected_chords) / len(detected_chords) if detected_chords else 0,
+                **dict.fromkeys(TIME_METRICS)
             }
         
         # Simplificar para comparação (apenas nomes de acordes)
@@ -147,7 +234,8 @@ class ChordDetectionTester:
         ground_truth_names = [chord['name'] for chord in ground_truth_chords if 'name' in chord]
         
         # Calcular verdadeiros positivos, falsos positivos e falsos negativos
-        true_positives = sum(1 for chord in detected_names if chord in ground_truth_names)
+        ground_truth_set = set(ground_truth_names)
+        true_positives = sum(1 for chord in detected_names if chord in ground_truth_set)
         false_positives = len(detected_names) - true_positives
         false_negatives = len(ground_truth_names) - true_positives
         
@@ -158,6 +246,9 @@ class ChordDetectionTester:
         accuracy = true_positives / (true_positives + false_positives + false_negatives) if (true_positives + false_positives + false_negatives) > 0 else 0
         error_rate = 1 - accuracy
         
+        # Métricas alinhadas no tempo
+        time_metrics = chord_metrics.evaluate(ground_truth_chords, detected_chords) or dict.fromkeys(TIME_METRICS)
+        
         return {
             'precision': precision,
             'recall': recall,
@@ -167,7 +258,8 @@ class ChordDetectionTester:
             'true_positives': true_positives,
             'false_positives': false_positives,
             'false_negatives': false_negatives,
-            'confidence': sum(chord.get('confidence', 0) for chord in detected_chords) / len(detected_chords) if detected_chords else 0
+            'confidence': sum(chord.get('confidence', 0) for chord in detected_chords) / len(detected_chords) if detected_chords else 0,
+            **time_metrics
         }
     
     def _aggregate_results(self):
@@ -191,6 +283,8 @@ class ChordDetectionTester:
                 'average_accuracy': None,
                 'average_error_rate': None,
                 'average_confidence': None,
+                **{f'average_{name}': None for name in TIME_METRICS if name != 'duration'},
+                **{f'weighted_{name}': None for name in TIME_METRICS if name.startswith('wcsr_')},
                 'file_count': len(self.results),
                 'valid_file_count': 0
             }
@@ -210,10 +304,38 @@ class ChordDetectionTester:
             'average_accuracy': avg_accuracy,
             'average_error_rate': avg_error_rate,
             'average_confidence': avg_confidence,
+            **self._aggregate_time_metrics(valid_results),
             'file_count': len(self.results),
             'valid_file_count': len(valid_results)
         }
     
+    def _aggregate_time_metrics(self, valid_results):
+        """
+        Agrega as métricas alinhadas no tempo: média por arquivo ('average_*')
+        e, para o WCSR, média ponderada pela duração de cada arquivo
+        ('weighted_*'), que é a forma usual de reportar um acervo.
+        
+        Args:
+            valid_results (list): Resultados com ground truth
+            
+        Returns:
+            dict: Métricas agregadas (None quando nenhum arquivo tem a métrica)
+        """
+        aggregated = {}
+        for name in TIME_METRICS:
+            if name == 'duration':
+                continue
+            
+            scored = [r['metrics'] for r in valid_results if r['metrics'].get(name) is not None]
+            values = np.array([m[name] for m in scored], dtype=np.float64)
+            aggregated[f'average_{name}'] = float(values.mean()) if len(values) else None
+            
+            if name.startswith('wcsr_'):
+                weights = np.array([m['duration'] for m in scored], dtype=np.float64)
+                aggregated[f'weighted_{name}'] = float(np.average(values, weights=weights)) if weights.sum() > 0 else None
+        
+        return aggregated
+    
     def _create_visualizations(self, result, output_dir=None):
         """
         Cria visualizações dos resultados do teste.
@@ -246,6 +368,8 @@ class ChordDetectionTester:
             result (dict): Resultado do teste para um arquivo
             output_path (str): Caminho para salvar a visualização
         """
+        import matplotlib.pyplot as plt
+        
         detected_chords = result['detected_chords']
         ground_truth_chords = result['ground_truth_chords']
         
@@ -340,6 +464,8 @@ class ChordDetectionTester:
             result (dict): Resultado do teste para um arquivo
             output_path (str): Caminho para salvar a visualização
         """
+        import matplotlib.pyplot as plt
+        
         metrics = result['metrics']
         
         # Se não temos métricas válidas, pular
@@ -352,6 +478,12 @@ class ChordDetectionTester:
         metric_names = ['Precisão', 'Recall', 'F1-Score', 'Acurácia']
         metric_values = [metrics['precision'], metrics['recall'], metrics['f1_score'], metrics['accuracy']]
         
+        # Métricas alinhadas no tempo, quando o ground truth tem duração
+        for label, key in (('WCSR (maj/min)', 'wcsr_majmin'), ('Segmentação', 'segmentation')):
+            if metrics.get(key) is not None:
+                metric_names.append(label)
+                metric_values.append(metrics[key])
+        
         # Criar barras
         bars = ax.bar(metric_names, metric_values, color='#ff8c00')
         
@@ -388,5 +520,107 @@ class ChordDetectionTester:
         Cria uma visualização da confiança dos acordes detectados.
         
         Args:
+            result (dict): Resultado do teste para um arquivo
+            output_path (str): Caminho para salvar a visualização
+        """
+        import matplotlib.pyplot as plt
+        from matplotlib.colors import LinearSegmentedColormap
+        
+        detected_chords = [chord for chord in result['detected_chords'] if 'start' in chord]
+        
+        # Sem acordes detectados, não há o que plotar
+        if not detected_chords:
+            return
+        
+        fig, ax = plt.subplots(figsize=(12, 6))
+        
+        times = [chord['start'] for chord in detected_chords]
+        confidences = [chord.get('confidence', 0) for chord in detected_chords]
         
-(Content truncated due to size limit. Use line ranges to read in chunks)
\ No newline at end of file
+        # Cor de cada ponto conforme a confiança (branco = baixa, laranja = alta)
+        cmap = LinearSegmentedColormap.from_list('confidence', ['#ffffff', '#ff8c00'])
+        ax.plot(times, confidences, color='#444', linewidth=1)
+        ax.scatter(times, confidences, c=confidences, cmap=cmap, vmin=0, vmax=1, s=30, zorder=3)
+        
+        # Limiar de confiança do extrator, se houver
+        threshold = getattr(self.extractor, 'confidence_threshold', None)
+        if threshold is not None:
+            ax.axhline(threshold, color='#ff8c00', linestyle='--', alpha=0.5, label='Limiar')
+            ax.legend()
+        
+        ax.set_ylim(0, 1.05)
+        ax.set_xlabel('Tempo (ms)')
+        ax.set_ylabel('Confiança')
+        ax.set_title(f'Confiança dos Acordes: {result["file_name"]}')
+        ax.grid(True, alpha=0.3)
+        
+        # Definir cores do tema escuro
+        ax.set_facecolor('#222')
+        fig.patch.set_facecolor('#111')
+        ax.xaxis.label.set_color('white')
+        ax.yaxis.label.set_color('white')
+        ax.title.set_color('white')
+        ax.tick_params(colors='white')
+        for spine in ax.spines.values():
+            spine.set_color('#444')
+        
+        plt.tight_layout()
+        plt.savefig(output_path, dpi=150, bbox_inches='tight')
+        plt.close()
+
+
+# Testador de cada processo de trabalho (o extrator é recebido uma única vez)
+_tester = None
+
+
+def _init_worker(extractor, ground_truth):
+    global _tester
+    _tester = ChordDetectionTester(extractor)
+    _tester.ground_truth = ground_truth
+
+
+def _evaluate_file(midi_file_path):
+    return _tester.evaluate_file(midi_file_path)
+
+
+def _render_result(result, output_dir):
+    _tester._create_visualizations(result, output_dir)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Testa a detecção de acordes em uma pasta de arquivos MIDI')
+    parser.add_argument('directory', help='Pasta com os arquivos MIDI')
+    parser.add_argument('--ground-truth', help='Arquivo JSON com os acordes corretos por arquivo')
+    parser.add_argument('--jobs', type=int, default=os.cpu_count() or 1,
+                        help='Processos em paralelo (padrão: número de CPUs)')
+    parser.add_argument('--engine', choices=('sweep', 'numpy'), default='sweep',
+                        help='Motor de varredura do AdvancedChordExtractor')
+    parser.add_argument('--visualize', action='store_true',
+                        help='Cria as visualizações de cada arquivo depois da avaliação')
+    parser.add_argument('--output-dir', help='Pasta das visualizações')
+    parser.add_argument('--report', help='Arquivo JSON para salvar os resultados por arquivo e agregados')
+    args = parser.parse_args(argv)
+    
+    if not os.path.isdir(args.directory):
+        parser.error(f"Pasta não encontrada: {args.directory}")
+    
+    tester = ChordDetectionTester(AdvancedChordExtractor(engine=args.engine),
+                                  args.directory, args.ground_truth)
+    jobs = max(1, args.jobs)
+    summary = tester.test_directory(jobs=jobs)
+    
+    # Etapa opcional: as figuras só são criadas depois de todas as métricas
+    if args.visualize:
+        count = tester.render_visualizations(args.output_dir, jobs)
+        print(f"Visualizações criadas para {count} arquivos")
+    
+    if args.report:
+        with open(args.report, 'w') as f:
+            json.dump({'summary': summary, 'results': tester.results}, f, indent=2)
+    
+    print(json.dumps(summary, indent=2))
+    return 0 if summary else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
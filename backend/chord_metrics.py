@@ -0,0 +1,247 @@
+"""
+Métricas de avaliação de acordes alinhadas no tempo.
+
+Compara duas sequências de acordes (referência e estimada) pelo tempo em que
+elas concordam, e não pela simples presença dos nomes:
+
+    WCSR (weighted chord symbol recall): fração da duração da referência em
+    que o acorde estimado é equivalente ao correto, em três níveis:
+        root      - mesma fundamental;
+        majmin    - mesma fundamental e mesma terça (maior/menor); acordes que
+                    não são maiores nem menores ficam fora da conta;
+        sevenths  - maj, min, 7, maj7 e min7; os demais ficam fora da conta.
+    Trechos sem acorde nas duas sequências contam como acerto.
+
+    Segmentação: quanto as fronteiras coincidem (distância de Hamming
+    direcional). 'oversegmentation' cai quando a estimativa divide os
+    segmentos da referência; 'undersegmentation' cai quando junta segmentos;
+    'segmentation' é o menor dos dois. 1 é perfeito.
+
+As duas sequências são convertidas em intervalos contíguos (buracos viram
+"sem acorde") e intercaladas em um único passo sobre os vetores ordenados de
+fronteiras; todas as contas seguintes são operações NumPy sobre os trechos
+elementares resultantes, sem laços em Python por acorde.
+"""
+from operator import itemgetter
+import re
+
+import numpy as np
+
+# Níveis de equivalência avaliados
+LEVELS = ('root', 'majmin', 'sevenths')
+
+# Rótulos especiais
+NO_CHORD = -1
+EXCLUDED = -2
+
+NOTE_CLASSES = {'C': 0, 'D': 2, 'E': 4, 'F': 5, 'G': 7, 'A': 9, 'B': 11}
+
+# Qualidade (sufixo do nome) -> intervalos a partir da fundamental
+QUALITY_INTERVALS = {
+    '': (0, 4, 7), 'maj': (0, 4, 7), 'M': (0, 4, 7),
+    'm': (0, 3, 7), 'min': (0, 3, 7),
+    '7': (0, 4, 7, 10), 'dom7': (0, 4, 7, 10), '9': (0, 4, 7, 10), '13': (0, 4, 7, 10),
+    'maj7': (0, 4, 7, 11), 'M7': (0, 4, 7, 11), 'maj9': (0, 4, 7, 11),
+    'm7': (0, 3, 7, 10), 'min7': (0, 3, 7, 10), 'm9': (0, 3, 7, 10), 'm11': (0, 3, 7, 10),
+    'mmaj7': (0, 3, 7, 11), 'minmaj7': (0, 3, 7, 11),
+    '6': (0, 4, 7, 9), 'maj6': (0, 4, 7, 9), 'm6': (0, 3, 7, 9), 'min6': (0, 3, 7, 9),
+    'dim': (0, 3, 6), 'o': (0, 3, 6), 'dim7': (0, 3, 6, 9), 'o7': (0, 3, 6, 9),
+    'm7b5': (0, 3, 6, 10), 'hdim7': (0, 3, 6, 10),
+    'aug': (0, 4, 8), '+': (0, 4, 8),
+    'sus4': (0, 5, 7), 'sus': (0, 5, 7), 'sus2': (0, 2, 7), '7sus4': (0, 5, 7, 10),
+    '5': (0, 7),
+}
+
+# Qualidades do nível sevenths, por intervalos
+SEVENTHS = {(0, 4, 7): 0, (0, 3, 7): 1, (0, 4, 7, 10): 2, (0, 4, 7, 11): 3, (0, 3, 7, 10): 4}
+
+NO_CHORD_NAMES = {'', 'N', 'NC', 'N.C.', 'N/C', 'X'}
+
+_CHORD_NAME = re.compile(r'^([A-G])([#b\-]*):?([^/]*)')
+
+# Nome do acorde -> rótulos por nível
+_labels_cache = {}
+
+_START = itemgetter('start')
+_NAME = itemgetter('name')
+
+
+def chord_labels(name):
+    """
+    Rótulos inteiros de um nome de acorde em cada nível de equivalência.
+
+    Aceita os nomes do extrator ("C#m7", "B-maj7"), do pychord ("Dbmaj7") e
+    do MIREX ("C#:min7"); o baixo ("/E") é ignorado.
+
+    Returns:
+        tuple: (root, majmin, sevenths) — NO_CHORD para "sem acorde" e
+               EXCLUDED quando o acorde não entra naquele nível
+    """
+    labels = _labels_cache.get(name)
+    if labels is not None:
+        return labels
+
+    text = (name or '').strip()
+    match = _CHORD_NAME.match(text)
+    if text.upper() in NO_CHORD_NAMES or not match:
+        labels = (NO_CHORD, NO_CHORD, NO_CHORD)
+    else:
+        letter, accidentals, quality = match.groups()
+        root = (NOTE_CLASSES[letter] + accidentals.count('#')
+                - accidentals.count('b') - accidentals.count('-')) % 12
+        intervals = QUALITY_INTERVALS.get(quality.strip())
+
+        if intervals is None:
+            majmin = sevenths = EXCLUDED
+        else:
+            triad = intervals[:3]
+            majmin = root * 2 + (0 if triad == (0, 4, 7) else 1) if triad in ((0, 4, 7), (0, 3, 7)) else EXCLUDED
+            sevenths = root * 5 + SEVENTHS[intervals] if intervals in SEVENTHS else EXCLUDED
+        labels = (root, majmin, sevenths)
+
+    _labels_cache[name] = labels
+    return labels
+
+
+def chord_intervals(chords):
+    """
+    Converte uma lista de acordes em vetores ordenados.
+
+    Cada acorde precisa de 'name' e 'start'; sem 'end', o acorde dura até o
+    início do seguinte (o último é descartado).
+
+    Returns:
+        tuple: (starts, ends, labels) — labels com uma coluna por nível
+    """
+    chords = [chord for chord in chords if 'name' in chord and chord.get('start') is not None]
+    if not chords:
+        return np.empty(0), np.empty(0), np.empty((0, len(LEVELS)), dtype=np.int64)
+
+    # Colunas montadas em C (map/itemgetter); 'end' ausente vira NaN
+    count = len(chords)
+    starts = np.fromiter(map(_START, chords), dtype=np.float64, count=count)
+    ends = np.array([chord.get('end') for chord in chords], dtype=np.float64)
+
+    # Rótulos: uma consulta por nome distinto, depois indexação
+    names = list(map(_NAME, chords))
+    distinct = {name: i for i, name in enumerate(dict.fromkeys(names))}
+    table = np.array([chord_labels(name) for name in distinct], dtype=np.int64)
+    labels = table[np.fromiter(map(distinct.__getitem__, names), dtype=np.intp, count=count)]
+
+    order = np.argsort(starts, kind='stable')
+    starts, ends, labels = starts[order], ends[order], labels[order]
+
+    missing = np.isnan(ends)
+    if missing.any():
+        ends[missing] = np.append(starts[1:], np.nan)[missing]
+        keep = ~np.isnan(ends)
+        return starts[keep], ends[keep], labels[keep]
+    return starts, ends, labels
+
+
+def _contiguous(starts, ends, labels, span_start, span_end):
+    """
+    Cobre [span_start, span_end] sem buracos: acordes sobrepostos são cortados
+    no início do seguinte e os buracos viram trechos sem acorde.
+
+    Returns:
+        tuple: (fronteiras, rótulos) — len(fronteiras) == len(rótulos) + 1
+    """
+    # Só o que cai dentro do intervalo avaliado
+    inside = (ends > span_start) & (starts < span_end) & (ends > starts)
+    starts = np.clip(starts[inside], span_start, span_end)
+    ends = np.clip(ends[inside], span_start, span_end)
+    labels = labels[inside]
+
+    # Sobreposição: o acorde termina onde o próximo começa
+    ends = np.minimum(ends, np.append(starts[1:], np.inf))
+
+    gap_after = np.append(starts[1:], span_end) > ends
+    no_chord = np.full((1, len(LEVELS)), NO_CHORD, dtype=np.int64)
+
+    seg_starts = np.concatenate(([span_start], starts, ends[gap_after]))
+    seg_labels = np.concatenate((no_chord, labels, np.repeat(no_chord, gap_after.sum(), axis=0)))
+    order = np.argsort(seg_starts, kind='stable')
+    seg_starts = seg_starts[order]
+    seg_labels = seg_labels[order]
+
+    # Trechos vazios (acorde no início do intervalo, acordes com o mesmo início)
+    boundaries = np.append(seg_starts, span_end)
+    keep = np.diff(boundaries) > 0
+    return np.append(seg_starts[keep], span_end), seg_labels[keep]
+
+
+def _segmentation(ref_index, est_index, durations, total):
+    """
+    Distância de Hamming direcional nos dois sentidos: para cada segmento de
+    um lado, a maior sobreposição com um segmento do outro.
+
+    Returns:
+        tuple: (oversegmentation, undersegmentation)
+    """
+    # Os trechos elementares estão em ordem de tempo, então cada par
+    # (referência, estimativa) ocupa posições consecutivas, e os pares ficam
+    # agrupados por segmento dos dois lados
+    pair_starts = np.flatnonzero(np.diff(ref_index, prepend=-1) | np.diff(est_index, prepend=-1))
+    pair_overlap = np.add.reduceat(durations, pair_starts)
+
+    scores = []
+    for index in (ref_index, est_index):
+        side = index[pair_starts]
+        groups = np.flatnonzero(np.diff(side, prepend=-1))
+        scores.append(float(np.maximum.reduceat(pair_overlap, groups).sum() / total))
+    return tuple(scores)
+
+
+def evaluate(reference, estimated):
+    """
+    Compara os acordes estimados com a referência ao longo do tempo.
+
+    O intervalo avaliado é o da referência; a estimativa fora dele é ignorada.
+    As duas listas precisam usar a mesma unidade de tempo.
+
+    Args:
+        reference (list): Acordes corretos ('name', 'start' e, de preferência, 'end')
+        estimated (list): Acordes estimados, no mesmo formato
+
+    Returns:
+        dict: 'wcsr_root', 'wcsr_majmin', 'wcsr_sevenths', 'oversegmentation',
+              'undersegmentation', 'segmentation' e 'duration' (duração avaliada),
+              ou None se a referência não tiver duração
+    """
+    ref_starts, ref_ends, ref_labels = chord_intervals(reference)
+    if not len(ref_starts):
+        return None
+    span_start = float(ref_starts[0])
+    span_end = float(ref_ends.max())
+    if span_end <= span_start:
+        return None
+
+    est_starts, est_ends, est_labels = chord_intervals(estimated)
+    ref_bounds, ref_labels = _contiguous(ref_starts, ref_ends, ref_labels, span_start, span_end)
+    est_bounds, est_labels = _contiguous(est_starts, est_ends, est_labels, span_start, span_end)
+
+    # Intercalação das fronteiras: cada trecho elementar tem um único acorde
+    # de cada lado
+    bounds = np.union1d(ref_bounds, est_bounds)
+    durations = np.diff(bounds)
+    ref_index = np.searchsorted(ref_bounds, bounds[:-1], side='right') - 1
+    est_index = np.searchsorted(est_bounds, bounds[:-1], side='right') - 1
+
+    ref_segment = ref_labels[ref_index]
+    est_segment = est_labels[est_index]
+
+    total = span_end - span_start
+    # Duração avaliada e acertada em cada nível, de uma vez para os três
+    scored = ref_segment != EXCLUDED
+    scored_duration = durations @ scored
+    correct = durations @ (scored & (ref_segment == est_segment))
+
+    metrics = {}
+    for level, name in enumerate(LEVELS):
+        metrics[f'wcsr_{name}'] = float(correct[level] / scored_duration[level]) if scored_duration[level] > 0 else None
+
+    metrics['oversegmentation'], metrics['undersegmentation'] = _segmentation(ref_index, est_index, durations, total)
+    metrics['segmentation'] = min(metrics['oversegmentation'], metrics['undersegmentation'])
+    metrics['duration'] = total
+    return metrics
@@ -7,11 +7,18 @@ load_dotenv()
 # Configuração do banco de dados
 DB_CONFIG = {
     'host': os.getenv('DB_HOST', 'dpg-d03kh9idbo4c738frj3g-a'),
+    'port': int(os.getenv('DB_PORT', 5432)),
     'user': os.getenv('DB_USER', 'kplay_v2_user'),
     'password': os.getenv('DB_PASSWORD', '5z1XDigq8UyDvtZbyKCLXMXWSE12gnpp'),
     'database': os.getenv('DB_NAME', 'kplay_v2')
 }
 
+# Pool de conexões do banco de dados (por processo)
+DB_POOL_MIN = int(os.getenv('DB_POOL_MIN', 1))
+DB_POOL_MAX = int(os.getenv('DB_POOL_MAX', 10))
+DB_POOL_TIMEOUT = float(os.getenv('DB_POOL_TIMEOUT', 30))  # Espera máxima por uma conexão livre (s)
+DB_POOL_CHECK_INTERVAL = float(os.getenv('DB_POOL_CHECK_INTERVAL', 30))  # Ociosidade que dispara o teste da conexão (s)
+
 # Configuração de pastas
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 DATA_DIR = os.path.join(os.path.dirname(BASE_DIR), 'data')
@@ -20,16 +27,60 @@ DATA_DIR = os.path.join(os.path.dirname(BASE_DIR), 'data')
 MIDI_FOLDER = os.path.join(DATA_DIR, 'midi')
 LYRICS_FOLDER = os.path.join(DATA_DIR, 'lyrics')
 CHORDS_FOLDER = os.path.join(DATA_DIR, 'chords')
+SONGS_FOLDER = os.path.join(DATA_DIR, 'songs')
+JOBS_FOLDER = os.path.join(DATA_DIR, 'jobs')
+CHORD_CACHE_FOLDER = os.path.join(DATA_DIR, 'cache', 'chords')
+UPLOAD_TMP_FOLDER = os.path.join(DATA_DIR, 'tmp')  # Uploads em andamento (mesmo disco dos destinos)
+PROFILES_FOLDER = os.path.join(DATA_DIR, 'profiles')  # Perfis da extração, por hash do MIDI
 
 # Criar diretórios se não existirem
-for folder in [MIDI_FOLDER, LYRICS_FOLDER, CHORDS_FOLDER]:
+for folder in [MIDI_FOLDER, LYRICS_FOLDER, CHORDS_FOLDER, SONGS_FOLDER, JOBS_FOLDER, CHORD_CACHE_FOLDER,
+               UPLOAD_TMP_FOLDER, PROFILES_FOLDER]:
     os.makedirs(folder, exist_ok=True)
 
+# Arquivos do frontend servidos pelo backend
+FRONTEND_FOLDER = os.path.join(os.path.dirname(BASE_DIR), 'frontend')
+
+# Cache-Control por tipo de resposta. Com 'no-cache' o navegador (e o service
+# worker) guarda a resposta mas revalida a cada uso pelo ETag, recebendo 304
+# sem corpo quando nada mudou
+CACHE_CONTROL = {
+    'index': 'no-cache',  # index.html, service worker e manifest
+    'static': os.getenv('STATIC_CACHE_CONTROL', 'public, no-cache'),  # CSS e JS
+    'song': 'private, no-cache',  # /api/get_song_data
+    'songs': 'no-cache'  # /api/songs
+}
+
 # Configuração da aplicação
 DEBUG = os.getenv('DEBUG', 'True').lower() in ('true', '1', 't')
 PORT = int(os.getenv('PORT', 5000))
 HOST = os.getenv('HOST', '0.0.0.0')
 
+# Carregar o app (e o pychord) no processo principal do gunicorn antes de criar
+# os workers, que herdam os módulos já carregados (backend/gunicorn_conf.py)
+PRELOAD_APP = os.getenv('PRELOAD_APP', 'False').lower() in ('true', '1', 't')
+
+# Processos de trabalho para a extração de acordes em segundo plano
+JOB_WORKERS = int(os.getenv('JOB_WORKERS', 2))
+
+# Análises de acordes mantidas em memória (o cache em disco não tem limite)
+CHORD_CACHE_SIZE = int(os.getenv('CHORD_CACHE_SIZE', 256))
+
+# Fração dos pedidos e tarefas medidos por etapa (Server-Timing e /metrics);
+# 0 desliga a medição e 1 mede todos
+METRICS_SAMPLE_RATE = float(os.getenv('METRICS_SAMPLE_RATE', 0))
+
+# Perfis (cProfile) da extração de acordes: todas as extrações com
+# PROFILE_EXTRACTION, ou só os pedidos com o cabeçalho X-Profile igual a
+# PROFILE_TOKEN; PROFILE_KEEP perfis guardados por música
+PROFILE_EXTRACTION = os.getenv('PROFILE_EXTRACTION', 'False').lower() in ('true', '1', 't')
+PROFILE_TOKEN = os.getenv('PROFILE_TOKEN', '')
+PROFILE_KEEP = int(os.getenv('PROFILE_KEEP', 20))
+
+# Paginação da listagem de músicas (/api/songs)
+SONGS_PAGE_SIZE = int(os.getenv('SONGS_PAGE_SIZE', 50))
+SONGS_PAGE_MAX = int(os.getenv('SONGS_PAGE_MAX', 200))
+
 # Tamanho máximo de upload (16MB)
 MAX_CONTENT_LENGTH = 16 * 1024 * 1024
 
@@ -1,27 +1,293 @@
 from flask import Flask
 from flask_cors import CORS
 import backend.config as config
+import backend.alignment as alignment
+import backend.metrics as metrics
+import atexit
+import functools
+import io
 import os
 import json
+import threading
+import time
 import psycopg2
-from psycopg2 import sql, extras
+from psycopg2 import sql, extras, pool
+
+# Pool de conexões compartilhado pelas threads do processo (criado sob demanda)
+_pool = None
+_pool_pid = None
+_pool_slots = None
+_pool_lock = threading.Lock()
+
+# Momento em que cada conexão voltou ao pool, para decidir quando testá-la
+_last_used = {}
+
+# Documento de uma música (o que /api/get_song_data devolve), com letra e
+# acordes agregados em JSON pelo PostgreSQL. É materializado em songs.payload a
+# cada gravação de letra ou acordes, então a leitura é uma consulta por chave
+SONG_PAYLOAD_SQL = """
+jsonb_build_object(
+    'song_id', s.id,
+    'title', s.title,
+    'artist', s.artist,
+    'lyrics', COALESCE((
+        SELECT jsonb_agg(CASE WHEN l.words IS NULL
+                              THEN jsonb_build_object('time', l.start_time, 'text', l.text)
+                              ELSE jsonb_build_object('time', l.start_time, 'text', l.text,
+                                                      'words', l.words::jsonb)
+                         END
+                         ORDER BY l.start_time, l.id)
+        FROM lyrics l
+        WHERE l.song_id = s.id
+    ), '[]'::jsonb),
+    'chords', COALESCE((
+        SELECT jsonb_agg(jsonb_build_object(
+                             'time', c.start_time,
+                             'start', c.start_time,
+                             'end', c.end_time,
+                             'chord', c.chord_name,
+                             'components', COALESCE(NULLIF(c.components, '')::jsonb, '[]'::jsonb))
+                         ORDER BY c.start_time, c.id)
+        FROM chords c
+        WHERE c.song_id = s.id
+    ), '[]'::jsonb)
+)
+"""
+
+# Recalcula o documento materializado de músicas; devolve letra e acordes
+# para o alinhamento, que é calculado em Python (backend/alignment.py)
+REFRESH_SONG_PAYLOAD = f"""
+UPDATE songs s SET payload = {SONG_PAYLOAD_SQL}
+WHERE s.id = ANY(%s)
+RETURNING s.id, s.payload->'lyrics', s.payload->'chords'
+"""
+
+# Acrescenta o alinhamento letra/acordes aos documentos materializados
+SET_SONG_ALIGNMENT = """
+UPDATE songs s SET payload = s.payload || jsonb_build_object('alignment', v.alignment::jsonb)
+FROM (VALUES %s) AS v(id, alignment)
+WHERE s.id = v.id
+"""
+
+# Documento materializado (ou montado na hora, para músicas anteriores a ele)
+# mais os caminhos dos arquivos
+SONG_DOCUMENT_QUERY = f"""
+SELECT COALESCE(s.payload, {SONG_PAYLOAD_SQL})
+       || jsonb_build_object('midi_path', s.midi_path, 'lyrics_path', s.lyrics_path)
+FROM songs s
+WHERE s.id = %s
+"""
+
+# Busca de músicas: correspondências de texto completo no título/artista e em
+# linhas da letra, mais semelhança de trigramas no título/artista. Cada música
+# fica com a sua melhor correspondência (e a linha da letra que a produziu).
+# Só as SEARCH_LYRIC_CANDIDATES linhas de letra de maior ts_rank entram na
+# disputa: com um termo muito comum, o resultado pode ficar truncado.
+# Os trigramas (e os índices idx_*_trgm) cobrem apenas título e artista; a
+# letra não tem busca aproximada, só por palavras inteiras
+SEARCH_QUERY = """
+WITH query AS (
+    SELECT plainto_tsquery('simple', %(query)s) AS tsquery
+),
+hits AS (
+    SELECT s.id AS song_id, ts_rank(s.search_vector, query.tsquery) + 1.0 AS score, NULL AS snippet
+    FROM songs s, query
+    WHERE s.search_vector @@ query.tsquery
+    UNION ALL
+    SELECT s.id, GREATEST(word_similarity(%(query)s, s.title),
+                          word_similarity(%(query)s, s.artist)), NULL
+    FROM songs s
+    WHERE %(query)s <%% s.title OR %(query)s <%% s.artist
+    UNION ALL
+    (SELECT l.song_id, ts_rank(l.search_vector, query.tsquery) + 0.5, l.text
+     FROM lyrics l, query
+     WHERE l.search_vector @@ query.tsquery
+     ORDER BY ts_rank(l.search_vector, query.tsquery) DESC
+     LIMIT %(candidates)s)
+)
+SELECT s.id, s.title, s.artist, best.score, best.snippet
+FROM (
+    SELECT DISTINCT ON (song_id) song_id, score, snippet
+    FROM hits
+    ORDER BY song_id, score DESC
+) best
+JOIN songs s ON s.id = best.song_id
+ORDER BY best.score DESC, s.id DESC
+LIMIT %(limit)s
+"""
+
+# Máximo de linhas de letra (as de maior ts_rank) consideradas por busca
+SEARCH_LYRIC_CANDIDATES = 2000
+
+# Gravações em lote: linhas por INSERT multi-linha e quantidade a partir da qual usar COPY
+BULK_PAGE_SIZE = 1000
+BULK_COPY_THRESHOLD = 5000
+
+def _round_trip(method):
+    """Mede uma operação que vai ao servidor como uma ida ao banco do pedido atual"""
+    @functools.wraps(method)
+    def measured(self, *args, **kwargs):
+        if metrics.current() is None:
+            return method(self, *args, **kwargs)
+        started = time.perf_counter()
+        try:
+            return method(self, *args, **kwargs)
+        finally:
+            metrics.db_round_trip(time.perf_counter() - started)
+    return measured
+
+# Classe de cursor -> subclasse medida (uma por cursor_factory usado)
+_measured_cursors = {}
+
+def _measured_cursor(cursor_class):
+    """Subclasse do cursor que conta execute, executemany (e execute_values) e COPY"""
+    measured = _measured_cursors.get(cursor_class)
+    if measured is None:
+        measured = type(cursor_class.__name__, (cursor_class,), {
+            name: _round_trip(getattr(cursor_class, name))
+            for name in ('execute', 'executemany', 'callproc', 'copy_expert', 'copy_from', 'copy_to')
+        })
+        _measured_cursors[cursor_class] = measured
+    return measured
+
+class MeasuredConnection(psycopg2.extensions.connection):
+    """
+    Conexão do pool que registra as idas ao servidor (consultas, COPY, commit
+    e rollback) na medição do pedido atual (backend/metrics.py). Fora da
+    amostragem, o custo é uma leitura de ContextVar por operação.
+    """
+    
+    def cursor(self, name=None, cursor_factory=None, **kwargs):
+        cursor_class = cursor_factory or self.cursor_factory or psycopg2.extensions.cursor
+        return super().cursor(name, cursor_factory=_measured_cursor(cursor_class), **kwargs)
+    
+    commit = _round_trip(psycopg2.extensions.connection.commit)
+    rollback = _round_trip(psycopg2.extensions.connection.rollback)
 
 def create_db_connection():
+    """Abre uma conexão avulsa, fora do pool"""
     try:
         connection = psycopg2.connect(
-            host=config.DB_CONFIG['dpg-d03kh9idbo4c738frj3g-a'],
-            user=config.DB_CONFIG['kplay_v2_user'],
-            password=config.DB_CONFIG['5z1XDigq8UyDvtZbyKCLXMXWSE12gnpp'],
-            database=config.DB_CONFIG['kplay_v2']
+            host=config.DB_CONFIG['host'],
+            port=config.DB_CONFIG['port'],
+            user=config.DB_CONFIG['user'],
+            password=config.DB_CONFIG['password'],
+            database=config.DB_CONFIG['database']
         )
         return connection
     except Exception as e:
         print(f"Erro ao conectar ao PostgreSQL: {e}")
         return None
 
+def _get_pool():
+    """Devolve o pool do processo atual, criando-o na primeira chamada"""
+    global _pool, _pool_pid, _pool_slots
+    
+    # Processos filhos (workers do gunicorn, pool de tarefas) não podem usar
+    # as conexões herdadas do processo pai: cada processo tem o seu pool
+    if _pool is not None and _pool_pid == os.getpid():
+        return _pool
+    
+    with _pool_lock:
+        if _pool is None or _pool_pid != os.getpid():
+            _last_used.clear()
+            _pool = pool.ThreadedConnectionPool(
+                config.DB_POOL_MIN, config.DB_POOL_MAX,
+                connection_factory=MeasuredConnection, **config.DB_CONFIG)
+            _pool_slots = threading.BoundedSemaphore(config.DB_POOL_MAX)
+            _pool_pid = os.getpid()
+    return _pool
+
+def get_connection():
+    """
+    Obtém uma conexão do pool, esperando até DB_POOL_TIMEOUT segundos se todas
+    estiverem em uso. Conexões fechadas são descartadas e conexões ociosas há
+    mais de DB_POOL_CHECK_INTERVAL segundos são testadas antes de serem entregues.
+    Retorna None se não for possível conectar.
+    """
+    try:
+        connection_pool = _get_pool()
+    except Exception as e:
+        print(f"Erro ao conectar ao PostgreSQL: {e}")
+        return None
+    
+    if not _pool_slots.acquire(timeout=config.DB_POOL_TIMEOUT):
+        print("Erro ao conectar ao PostgreSQL: pool de conexões esgotado")
+        return None
+    
+    # Uma tentativa por conexão possivelmente quebrada, mais uma conexão nova
+    for _ in range(config.DB_POOL_MAX + 1):
+        try:
+            connection = connection_pool.getconn()
+        except Exception as e:
+            print(f"Erro ao conectar ao PostgreSQL: {e}")
+            break
+        
+        if _is_healthy(connection):
+            return connection
+        connection_pool.putconn(connection, close=True)
+        _last_used.pop(id(connection), None)
+    
+    _pool_slots.release()
+    return None
+
+def _is_healthy(connection):
+    """Verifica uma conexão retirada do pool"""
+    if connection.closed:
+        return False
+    
+    # Conexões recém-abertas ou usadas há pouco dispensam a ida ao servidor
+    idle_since = _last_used.get(id(connection))
+    if idle_since is None or time.monotonic() - idle_since < config.DB_POOL_CHECK_INTERVAL:
+        return True
+    
+    try:
+        cursor = connection.cursor()
+        cursor.execute("SELECT 1")
+        cursor.close()
+        connection.rollback()
+        return True
+    except Exception:
+        return False
+
+def release_connection(connection):
+    """Devolve uma conexão ao pool, desfazendo transações não confirmadas"""
+    if connection is None:
+        return
+    
+    broken = bool(connection.closed)
+    if not broken and connection.get_transaction_status() != psycopg2.extensions.TRANSACTION_STATUS_IDLE:
+        try:
+            connection.rollback()
+        except Exception:
+            broken = True
+    
+    try:
+        _pool.putconn(connection, close=broken)
+    except Exception as e:
+        print(f"Erro ao devolver conexão ao pool: {e}")
+    
+    if broken:
+        _last_used.pop(id(connection), None)
+    else:
+        _last_used[id(connection)] = time.monotonic()
+    _pool_slots.release()
+
+def close_pool():
+    """Fecha todas as conexões do pool (chamado ao encerrar o processo)"""
+    global _pool
+    
+    with _pool_lock:
+        if _pool is not None and _pool_pid == os.getpid():
+            _pool.closeall()
+        _pool = None
+        _last_used.clear()
+
+atexit.register(close_pool)
+
 def create_tables():
     """Cria as tabelas necessárias no banco de dados"""
-    connection = create_db_connection()
+    connection = get_connection()
     if connection:
         try:
             cursor = connection.cursor()
@@ -33,7 +299,8 @@ def create_tables():
                 artist VARCHAR(255) NOT NULL,
                 midi_path VARCHAR(255) NOT NULL,
                 lyrics_path VARCHAR(255) NOT NULL,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                payload JSONB
             )
             """)
             
@@ -43,6 +310,7 @@ def create_tables():
                 song_id INT NOT NULL,
                 text TEXT NOT NULL,
                 start_time INT NOT NULL,
+                words TEXT,
                 FOREIGN KEY (song_id) REFERENCES songs(id) ON DELETE CASCADE
             )
             """)
@@ -53,18 +321,122 @@ def create_tables():
                 song_id INT NOT NULL,
                 chord_name VARCHAR(50) NOT NULL,
                 start_time INT NOT NULL,
+                end_time INT,
                 components TEXT,
                 FOREIGN KEY (song_id) REFERENCES songs(id) ON DELETE CASCADE
             )
             """)
 
+            # Colunas acrescentadas depois da criação das tabelas, para bancos existentes
+            cursor.execute("ALTER TABLE songs ADD COLUMN IF NOT EXISTS payload JSONB")
+            cursor.execute("ALTER TABLE lyrics ADD COLUMN IF NOT EXISTS words TEXT")
+            cursor.execute("ALTER TABLE chords ADD COLUMN IF NOT EXISTS end_time INT")
+
+            # Listagem do catálogo por cursor (created_at, id), da mais nova para a mais antiga
+            cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_songs_created_id ON songs (created_at DESC, id DESC)
+            """)
+            
+            # Letra e acordes são sempre lidos por música, em ordem de tempo
+            cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_lyrics_song_time ON lyrics (song_id, start_time)
+            """)
+            
+            cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_chords_song_time ON chords (song_id, start_time)
+            """)
+
             connection.commit()
             cursor.close()
-            connection.close()
+            release_connection(connection)
             print("Tabelas criadas com sucesso.")
         except Exception as e:
             print(f"Erro ao criar tabelas: {e}")
-            connection.close()
+            release_connection(connection)
+            return
+        
+        create_search_indexes()
+
+def create_search_indexes():
+    """
+    Cria as colunas e índices da busca: tsvector gerados (mantidos pelo próprio
+    PostgreSQL a cada INSERT/UPDATE) e índices de trigramas do pg_trgm.
+    Fica em uma transação separada porque a extensão pode exigir privilégios
+    que o banco não concede; nesse caso a busca usa o índice em memória.
+    """
+    connection = get_connection()
+    if connection:
+        try:
+            cursor = connection.cursor()
+            
+            cursor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+            
+            # Configuração 'simple': sem stemming, já que o catálogo mistura idiomas
+            cursor.execute("""
+            ALTER TABLE songs ADD COLUMN IF NOT EXISTS search_vector tsvector
+            GENERATED ALWAYS AS (
+                setweight(to_tsvector('simple', title), 'A') ||
+                setweight(to_tsvector('simple', artist), 'B')
+            ) STORED
+            """)
+            
+            cursor.execute("""
+            ALTER TABLE lyrics ADD COLUMN IF NOT EXISTS search_vector tsvector
+            GENERATED ALWAYS AS (to_tsvector('simple', text)) STORED
+            """)
+            
+            cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_songs_search ON songs USING GIN (search_vector)
+            """)
+            
+            cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_lyrics_search ON lyrics USING GIN (search_vector)
+            """)
+            
+            # Trigramas para nomes digitados com erro (só título e artista: a
+            # letra não tem busca aproximada)
+            cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_songs_title_trgm ON songs USING GIN (title gin_trgm_ops)
+            """)
+            
+            cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_songs_artist_trgm ON songs USING GIN (artist gin_trgm_ops)
+            """)
+
+            connection.commit()
+            cursor.close()
+            release_connection(connection)
+        except Exception as e:
+            print(f"Erro ao criar índices de busca: {e}")
+            release_connection(connection)
+
+def _copy_value(value):
+    """Formata um valor para o formato texto do COPY"""
+    if value is None:
+        return '\\N'
+    return (str(value).replace('\\', '\\\\').replace('\t', '\\t')
+            .replace('\n', '\\n').replace('\r', '\\r'))
+
+def bulk_insert(cursor, table, columns, rows):
+    """
+    Insere várias linhas com poucas idas ao servidor: INSERT multi-linha
+    (execute_values) para lotes pequenos e COPY FROM STDIN para lotes grandes
+    """
+    if len(rows) < BULK_COPY_THRESHOLD:
+        query = sql.SQL("INSERT INTO {} ({}) VALUES %s").format(
+            sql.Identifier(table), sql.SQL(', ').join(map(sql.Identifier, columns)))
+        extras.execute_values(cursor, query.as_string(cursor), rows, page_size=BULK_PAGE_SIZE)
+        return
+    
+    buffer = io.StringIO()
+    for row in rows:
+        buffer.write('\t'.join(_copy_value(value) for value in row))
+        buffer.write('\n')
+    buffer.seek(0)
+    
+    query = sql.SQL("COPY {} ({}) FROM STDIN").format(
+        sql.Identifier(table), sql.SQL(', ').join(map(sql.Identifier, columns)))
+    cursor.copy_expert(query.as_string(cursor), buffer)
 
 def init_app():
     """Inicializa a aplicação Flask"""
@@ -76,9 +448,10 @@ def init_app():
     
     return app
 
+@metrics.timed('db.save_song_to_db')
 def save_song_to_db(title, artist, midi_path, lyrics_path):
     """Salva informações da música no banco de dados"""
-    connection = create_db_connection()
+    connection = get_connection()
     if connection:
         try:
             cursor = connection.cursor()
@@ -95,117 +468,279 @@ def save_song_to_db(title, artist, midi_path, lyrics_path):
 
             connection.commit()
             cursor.close()
-            connection.close()
+            release_connection(connection)
             return song_id
         except Exception as e:
             print(f"Erro ao salvar música no banco de dados: {e}")
-            connection.close()
+            release_connection(connection)
+            return None
+    return None
+
+@metrics.timed('db.find_song')
+def find_song(title, artist, midi_path, lyrics_path):
+    """
+    Procura uma música já gravada com os mesmos metadados e arquivos (reenvio idêntico)
+    Retorna: ID da música mais antiga encontrada ou None
+    """
+    connection = get_connection()
+    if connection:
+        try:
+            cursor = connection.cursor()
+            cursor.execute("""
+                SELECT id FROM songs
+                WHERE title = %s AND artist = %s AND midi_path = %s AND lyrics_path = %s
+                ORDER BY id
+                LIMIT 1
+            """, (title, artist, midi_path, lyrics_path))
+            row = cursor.fetchone()
+
+            cursor.close()
+            release_connection(connection)
+            return row[0] if row else None
+        except Exception as e:
+            print(f"Erro ao procurar música no banco de dados: {e}")
+            release_connection(connection)
+            return None
+    return None
+
+def find_songs_by_files(files):
+    """
+    Procura as músicas já gravadas com os mesmos arquivos, em uma única consulta
+    (os caminhos são definidos pelo conteúdo: mesmo caminho, mesmo arquivo)
+    Args:
+        files: Pares (midi_path, lyrics_path)
+    Retorna: Dicionário {(midi_path, lyrics_path): ID da música mais antiga}
+             só com os pares encontrados, ou None em caso de erro
+    """
+    files = list(files)
+    if not files:
+        return {}
+    connection = get_connection()
+    if connection:
+        try:
+            cursor = connection.cursor()
+            cursor.execute("""
+                SELECT midi_path, lyrics_path, MIN(id) FROM songs
+                WHERE midi_path = ANY(%s)
+                GROUP BY midi_path, lyrics_path
+            """, (list({midi_path for midi_path, _ in files}),))
+            wanted = set(files)
+            found = {
+                (midi_path, lyrics_path): song_id
+                for midi_path, lyrics_path, song_id in cursor.fetchall()
+                if (midi_path, lyrics_path) in wanted
+            }
+
+            cursor.close()
+            release_connection(connection)
+            return found
+        except Exception as e:
+            print(f"Erro ao procurar músicas no banco de dados: {e}")
+            release_connection(connection)
+            return None
+    return None
+
+def refresh_song_payload(cursor, song_id):
+    """Recalcula o documento materializado da música, com o alinhamento, na transação do cursor"""
+    refresh_song_payloads(cursor, [song_id])
+
+def refresh_song_payloads(cursor, song_ids):
+    """Recalcula os documentos materializados de várias músicas na transação do cursor"""
+    cursor.execute(REFRESH_SONG_PAYLOAD, (list(song_ids),))
+    rows = [
+        (song_id, json.dumps(alignment.align_song(lyrics, chords)))
+        for song_id, lyrics, chords in cursor.fetchall()
+    ]
+    if rows:
+        extras.execute_values(cursor, SET_SONG_ALIGNMENT, rows, page_size=BULK_PAGE_SIZE)
+
+def _lyric_rows(song_id, lyrics_data):
+    return [
+        (song_id, lyric['text'], lyric['time'],
+         json.dumps(lyric['words']) if lyric.get('words') else None)
+        for lyric in lyrics_data
+    ]
+
+def _chord_rows(song_id, chords_data):
+    return [
+        (song_id, chord['chord'], chord['time'], chord.get('end'),
+         json.dumps(chord.get('components', [])))
+        for chord in chords_data
+    ]
+
+@metrics.timed('db.save_songs_batch')
+def save_songs_batch(songs):
+    """
+    Grava várias músicas completas (música, letra e acordes) em uma única
+    transação, com inserções em lote. Cada música é um dicionário com 'title',
+    'artist', 'midi_path', 'lyrics_path', 'lyrics' e 'chords'.
+    Retorna os IDs na mesma ordem das músicas, ou None em caso de erro
+    """
+    connection = get_connection()
+    if connection:
+        try:
+            cursor = connection.cursor()
+            
+            # INSERT ... VALUES ... RETURNING devolve os IDs na ordem das linhas
+            song_ids = [row[0] for row in extras.execute_values(cursor, """
+            INSERT INTO songs (title, artist, midi_path, lyrics_path) VALUES %s RETURNING id
+            """, [
+                (song['title'], song['artist'], song['midi_path'], song['lyrics_path'])
+                for song in songs
+            ], page_size=BULK_PAGE_SIZE, fetch=True)]
+            
+            lyric_rows = []
+            chord_rows = []
+            for song_id, song in zip(song_ids, songs):
+                lyric_rows.extend(_lyric_rows(song_id, song['lyrics']))
+                chord_rows.extend(_chord_rows(song_id, song['chords']))
+            bulk_insert(cursor, 'lyrics', ('song_id', 'text', 'start_time', 'words'), lyric_rows)
+            bulk_insert(cursor, 'chords', ('song_id', 'chord_name', 'start_time', 'end_time', 'components'), chord_rows)
+            refresh_song_payloads(cursor, song_ids)
+            
+            connection.commit()
+            cursor.close()
+            release_connection(connection)
+            return song_ids
+        except Exception as e:
+            print(f"Erro ao salvar lote de músicas no banco de dados: {e}")
+            release_connection(connection)
             return None
     return None
 
+@metrics.timed('db.save_lyrics_to_db')
 def save_lyrics_to_db(song_id, lyrics_data):
-    """Salva as linhas da letra no banco de dados"""
-    connection = create_db_connection()
+    """Salva as linhas da letra no banco de dados, substituindo as anteriores da música"""
+    connection = get_connection()
     if connection:
         try:
             cursor = connection.cursor()
-            query = """
-            INSERT INTO lyrics (song_id, text, start_time)
-            VALUES (%s, %s, %s)
-            """
-            for lyric in lyrics_data:
-                values = (song_id, lyric['text'], lyric['time'])
-                cursor.execute(query, values)
+            
+            # Apagar e regravar na mesma transação torna a gravação idempotente
+            cursor.execute("DELETE FROM lyrics WHERE song_id = %s", (song_id,))
+            bulk_insert(cursor, 'lyrics', ('song_id', 'text', 'start_time', 'words'),
+                        _lyric_rows(song_id, lyrics_data))
+            refresh_song_payload(cursor, song_id)
 
             connection.commit()
             cursor.close()
-            connection.close()
+            release_connection(connection)
             return True
         except Exception as e:
             print(f"Erro ao salvar letras no banco de dados: {e}")
-            connection.close()
+            release_connection(connection)
             return False
     return False
 
+@metrics.timed('db.save_chords_to_db')
 def save_chords_to_db(song_id, chords_data):
-    """Salva os acordes no banco de dados"""
-    connection = create_db_connection()
+    """Salva os acordes no banco de dados, substituindo os anteriores da música"""
+    connection = get_connection()
     if connection:
         try:
             cursor = connection.cursor()
-            query = """
-            INSERT INTO chords (song_id, chord_name, start_time, components)
-            VALUES (%s, %s, %s, %s)
-            """
-            for chord in chords_data:
-                components_json = json.dumps(chord.get('components', []))
-                values = (song_id, chord['chord'], chord['time'], components_json)
-                cursor.execute(query, values)
+            
+            # Apagar e regravar na mesma transação torna a gravação idempotente
+            cursor.execute("DELETE FROM chords WHERE song_id = %s", (song_id,))
+            bulk_insert(cursor, 'chords', ('song_id', 'chord_name', 'start_time', 'end_time', 'components'),
+                        _chord_rows(song_id, chords_data))
+            refresh_song_payload(cursor, song_id)
 
             connection.commit()
             cursor.close()
-            connection.close()
+            release_connection(connection)
             return True
         except Exception as e:
             print(f"Erro ao salvar acordes no banco de dados: {e}")
-            connection.close()
+            release_connection(connection)
             return False
     return False
 
-def get_song_by_id(song_id):
-    """Obtém informações de uma música pelo ID"""
-    connection = create_db_connection()
+@metrics.timed('db.list_songs')
+def list_songs(limit, after=None):
+    """
+    Lista músicas da mais nova para a mais antiga (id, title, artist, created_at).
+    `after` é o par (created_at, id) da última música da página anterior; a busca
+    continua a partir dele pelo índice, sem OFFSET, então toda página custa o mesmo
+    """
+    connection = get_connection()
     if connection:
         try:
-            cursor = connection.cursor(cursor_factory=psycopg2.extras.DictCursor)
+            cursor = connection.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
 
-            cursor.execute("SELECT * FROM songs WHERE id = %s", (song_id,))
-            song = cursor.fetchone()
-            if not song:
-                cursor.close()
-                connection.close()
-                return None
+            if after:
+                cursor.execute("""
+                    SELECT id, title, artist, created_at FROM songs
+                    WHERE (created_at, id) < (%s, %s)
+                    ORDER BY created_at DESC, id DESC
+                    LIMIT %s
+                """, (after[0], after[1], limit))
+            else:
+                cursor.execute("""
+                    SELECT id, title, artist, created_at FROM songs
+                    ORDER BY created_at DESC, id DESC
+                    LIMIT %s
+                """, (limit,))
+            songs = cursor.fetchall()
 
-            cursor.execute("""
-                SELECT text, start_time FROM lyrics
-                WHERE song_id = %s
-                ORDER BY start_time
-            """, (song_id,))
-            lyrics = cursor.fetchall()
+            cursor.close()
+            release_connection(connection)
+            return songs
+        except Exception as e:
+            print(f"Erro ao listar músicas do banco de dados: {e}")
+            release_connection(connection)
+            return None
+    return None
 
-            cursor.execute("""
-                SELECT chord_name, start_time, components FROM chords
-                WHERE song_id = %s
-                ORDER BY start_time
-            """, (song_id,))
-            chords = cursor.fetchall()
-
-            processed_lyrics = [
-                {'time': lyric['start_time'], 'text': lyric['text']} for lyric in lyrics
-            ]
-
-            processed_chords = [
-                {
-                    'time': chord['start_time'],
-                    'chord': chord['chord_name'],
-                    'components': json.loads(chord['components']) if chord['components'] else []
-                }
-                for chord in chords
-            ]
-
-            result = {
-                'song_id': song_id,
-                'title': song['title'],
-                'artist': song['artist'],
-                'lyrics': processed_lyrics,
-                'chords': processed_chords
-            }
+@metrics.timed('db.search_songs')
+def search_songs(query, limit):
+    """
+    Busca músicas por título, artista ou trecho da letra, da mais relevante para a menos.
+
+    Nomes digitados com erro são encontrados por trigramas no título e no
+    artista; na letra, só palavras inteiras. Para termos muito comuns, apenas
+    as SEARCH_LYRIC_CANDIDATES linhas de letra de maior ts_rank são consideradas,
+    então o resultado pode omitir músicas que só casariam por outras linhas.
+    Retorna None se o banco (ou a extensão pg_trgm) não estiver disponível
+    """
+    connection = get_connection()
+    if connection:
+        try:
+            cursor = connection.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
+
+            cursor.execute(SEARCH_QUERY, {
+                'query': query,
+                'limit': limit,
+                'candidates': SEARCH_LYRIC_CANDIDATES
+            })
+            results = cursor.fetchall()
+
+            cursor.close()
+            release_connection(connection)
+            return results
+        except Exception as e:
+            print(f"Erro ao buscar músicas no banco de dados: {e}")
+            release_connection(connection)
+            return None
+    return None
+
+@metrics.timed('db.get_song_by_id')
+def get_song_by_id(song_id):
+    """Obtém o documento de uma música (letra e acordes) em uma única consulta"""
+    connection = get_connection()
+    if connection:
+        try:
+            cursor = connection.cursor()
+
+            # O documento inteiro é montado no servidor; o psycopg2 já devolve o JSON decodificado
+            cursor.execute(SONG_DOCUMENT_QUERY, (song_id,))
+            row = cursor.fetchone()
 
             cursor.close()
-            connection.close()
-            return result
+            release_connection(connection)
+            return row[0] if row else None
         except Exception as e:
             print(f"Erro ao obter música do banco de dados: {e}")
-            connection.close()
+            release_connection(connection)
             return None
     return None
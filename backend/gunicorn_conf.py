@@ -0,0 +1,37 @@
+"""
+Configuração do gunicorn para o backend.
+
+Com PRELOAD_APP o processo principal importa o app e carrega o pychord uma
+vez (warm_extraction) antes de criar os workers: cada worker, e cada processo
+de extração criado por ele, nasce por fork com os módulos já carregados e
+atende o primeiro pedido sem pagar a importação. Sem PRELOAD_APP cada worker
+importa o app e aquece a extração ao iniciar, antes de aceitar pedidos.
+
+O endereço e o número de workers seguem os padrões do gunicorn (PORT e
+WEB_CONCURRENCY no ambiente, ou --bind e --workers na linha de comando).
+
+Uso (a partir da raiz do repositório):
+    gunicorn -c backend/gunicorn_conf.py backend.app:app
+    PRELOAD_APP=true gunicorn -c backend/gunicorn_conf.py -w 4 backend.app:app
+"""
+# Os nomes de nível de módulo são lidos como opções do gunicorn ('config' é uma
+# delas), por isso só PRELOAD_APP é importado
+from backend.config import PRELOAD_APP
+
+preload_app = PRELOAD_APP
+
+
+def when_ready(server):
+    """Processo principal pronto: com o app pré-carregado, aquece a extração antes do fork."""
+    if server.cfg.preload_app:
+        from backend.app import warm_extraction
+
+        warm_extraction()
+
+
+def post_worker_init(worker):
+    """Worker iniciado: sem pré-carga, aquece a extração antes do primeiro pedido."""
+    if not worker.cfg.preload_app:
+        from backend.app import warm_extraction
+
+        warm_extraction()
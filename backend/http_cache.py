@@ -0,0 +1,194 @@
+"""
+Cache HTTP e compressão das respostas.
+
+Todas as respostas que passam por aqui recebem:
+    ETag forte derivado do SHA-256 do conteúdo, com o sufixo da codificação
+    nas variantes comprimidas ("<hash>-gzip", "<hash>-br");
+    Cache-Control conforme a rota (config.CACHE_CONTROL);
+    resposta 304 sem corpo quando o If-None-Match do cliente coincide;
+    corpo em brotli ou gzip, conforme o Accept-Encoding, com Vary: Accept-Encoding.
+
+Os arquivos estáticos do frontend são lidos e comprimidos uma vez (na
+inicialização, por StaticFiles.warm) e servidos da memória; um arquivo
+alterado no disco é relido no pedido seguinte. As respostas dinâmicas
+(cacheable) só são comprimidas quando não terminam em 304.
+
+O brotli é opcional (pacote 'brotli'); sem ele, só gzip é oferecido.
+"""
+import gzip
+import hashlib
+import mimetypes
+import os
+import threading
+
+from flask import Response, abort, request
+from werkzeug.security import safe_join
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Tipos que valem a pena comprimir
+COMPRESSIBLE_TYPES = ('text/', 'application/javascript', 'application/json',
+                      'application/manifest+json', 'image/svg+xml')
+
+# Abaixo disso a compressão não compensa o cabeçalho extra
+MIN_COMPRESS_SIZE = 1024
+
+# Níveis de compressão: máximos para os estáticos (comprimidos uma vez) e
+# moderados para as respostas geradas a cada pedido
+STATIC_LEVELS = {'gzip': 9, 'br': 11}
+DYNAMIC_LEVELS = {'gzip': 6, 'br': 5}
+
+
+def content_etag(data):
+    """ETag forte do conteúdo (SHA-256 abreviado)."""
+    return hashlib.sha256(data).hexdigest()[:32]
+
+
+def available_encodings():
+    """Codificações oferecidas, da preferida para a menos preferida."""
+    return ('br', 'gzip') if brotli is not None else ('gzip',)
+
+
+def compress(data, encoding, level):
+    """Comprime os dados em 'gzip' ou 'br'."""
+    if encoding == 'br':
+        return brotli.compress(data, quality=level)
+    # mtime fixo: o mesmo conteúdo sempre gera os mesmos bytes
+    return gzip.compress(data, compresslevel=level, mtime=0)
+
+
+def is_compressible(mimetype, size):
+    return size >= MIN_COMPRESS_SIZE and bool(mimetype) and mimetype.startswith(COMPRESSIBLE_TYPES)
+
+
+def cacheable(response, cache_control):
+    """
+    Aplica ETag, Cache-Control, 304 e compressão a uma resposta gerada pela rota.
+
+    Args:
+        response (Response): Resposta com status 200
+        cache_control (str): Valor do cabeçalho Cache-Control
+
+    Returns:
+        Response: A mesma resposta, comprimida ou transformada em 304
+    """
+    data = response.get_data()
+    encodings = available_encodings() if is_compressible(response.mimetype, len(data)) else ()
+    encoding = _choose_encoding(encodings)
+
+    response.headers['Cache-Control'] = cache_control
+    response.vary.add('Accept-Encoding')
+    response.set_etag(_variant_etag(content_etag(data), encoding))
+
+    # Revalidação: responder 304 antes de gastar tempo comprimindo
+    if request.if_none_match.contains(response.get_etag()[0]):
+        return response.make_conditional(request)
+
+    if encoding != 'identity':
+        response.set_data(compress(data, encoding, DYNAMIC_LEVELS[encoding]))
+        response.content_encoding = encoding
+    return response
+
+
+class StaticFiles:
+    """
+    Arquivos de uma pasta servidos da memória, com as variantes comprimidas
+    calculadas uma única vez.
+    """
+
+    def __init__(self, directory, cache_control):
+        """
+        Args:
+            directory (str): Pasta dos arquivos
+            cache_control (str): Cache-Control das respostas
+        """
+        self.directory = directory
+        self.cache_control = cache_control
+
+        # caminho -> (mtime, tamanho, tipo, etag, {codificação: bytes})
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def warm(self):
+        """Lê e comprime todos os arquivos da pasta. Retorna a quantidade de arquivos."""
+        count = 0
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                relative_path = os.path.relpath(os.path.join(root, name), self.directory)
+                if self._entry(relative_path.replace(os.sep, '/')) is not None:
+                    count += 1
+        return count
+
+    def response(self, relative_path, cache_control=None):
+        """
+        Resposta para um arquivo da pasta (404 se não existir).
+
+        Args:
+            relative_path (str): Caminho relativo à pasta
+            cache_control (str): Substitui o Cache-Control padrão desta pasta
+        """
+        entry = self._entry(relative_path)
+        if entry is None:
+            abort(404)
+
+        _, _, mimetype, etag, variants = entry
+        encoding = _choose_encoding(tuple(e for e in available_encodings() if e in variants))
+
+        response = Response(variants[encoding], mimetype=mimetype)
+        response.headers['Cache-Control'] = cache_control or self.cache_control
+        response.vary.add('Accept-Encoding')
+        response.set_etag(_variant_etag(etag, encoding))
+        if encoding != 'identity':
+            response.content_encoding = encoding
+        return response.make_conditional(request)
+
+    def _entry(self, relative_path):
+        path = safe_join(self.directory, relative_path)
+        if path is None:
+            return None
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        if not os.path.isfile(path):
+            return None
+
+        entry = self._entries.get(path)
+        if entry and entry[0] == stat.st_mtime_ns and entry[1] == stat.st_size:
+            return entry
+
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+        except OSError as e:
+            print(f"Erro ao ler arquivo estático {relative_path}: {e}")
+            return None
+
+        mimetype = mimetypes.guess_type(path)[0] or 'application/octet-stream'
+        variants = {'identity': data}
+        if is_compressible(mimetype, len(data)):
+            for encoding in available_encodings():
+                compressed = compress(data, encoding, STATIC_LEVELS[encoding])
+                if len(compressed) < len(data):
+                    variants[encoding] = compressed
+
+        entry = (stat.st_mtime_ns, stat.st_size, mimetype, content_etag(data), variants)
+        with self._lock:
+            self._entries[path] = entry
+        return entry
+
+
+def _choose_encoding(encodings):
+    """Melhor codificação aceita pelo cliente entre as oferecidas, ou 'identity'."""
+    if not encodings:
+        return 'identity'
+    accepted = request.accept_encodings
+    best = max(encodings, key=lambda encoding: accepted[encoding])
+    return best if accepted[best] > 0 else 'identity'
+
+
+def _variant_etag(etag, encoding):
+    return etag if encoding == 'identity' else f"{etag}-{encoding}"
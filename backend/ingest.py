@@ -0,0 +1,346 @@
+#!/usr/bin/env python3
+"""
+Ingestão em lote de um acervo de músicas (MIDI + letra).
+
+Percorre uma pasta, junta cada arquivo MIDI (.mid, .midi, .kar) com a letra
+de mesmo nome na mesma pasta (.txt, .lrc) e distribui o trabalho pesado entre
+processos: cada processo lê o MIDI uma única vez (hash, cópia para o caminho
+definido pelo conteúdo em data/midi e tabela de notas), lê a letra e extrai
+os acordes com o AdvancedChordExtractor. O processo principal grava as
+músicas no banco em lotes (database.save_songs_batch: uma transação e
+inserções em lote por lote) e registra cada música gravada no arquivo de
+progresso, então uma ingestão interrompida continua de onde parou. Antes de
+gravar um lote, as músicas que já estão no banco com os mesmos arquivos
+(interrupção entre a gravação do lote e o registro no progresso) só são
+registradas no progresso, sem serem inseridas de novo.
+
+Título e artista vêm dos cabeçalhos [ti:] e [ar:] da letra ou do nome do
+arquivo no formato "Artista - Título".
+
+Com --profile, a leitura e a extração de cada música são perfiladas com o
+cProfile (backend/profiling.py; perfis em data/profiles/<hash do MIDI>/) e o
+relatório das funções mais lentas da ingestão é mostrado ao final.
+
+Uso (a partir da raiz do repositório):
+    python -m backend.ingest /caminho/do/acervo
+    python -m backend.ingest /caminho/do/acervo --workers 8 --batch 200 --engine numpy
+    python -m backend.ingest /caminho/do/acervo --profile --profile-limit 30
+"""
+import argparse
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+import hashlib
+import json
+import os
+import sys
+import time
+
+import backend.config as config
+import backend.database as database
+import backend.lyrics_parser as lyrics_parser
+import backend.midi_reader as midi_reader
+import backend.profiling as profiling
+import backend.uploads as uploads
+from backend.advanced_chord_extractor import AdvancedChordExtractor
+
+MIDI_EXTENSIONS = {'.mid', '.midi', '.kar'}
+LYRICS_EXTENSIONS = {'.txt', '.lrc'}
+
+# Pasta dos arquivos de progresso (um por pasta de origem)
+CHECKPOINT_FOLDER = os.path.join(config.DATA_DIR, 'ingest')
+
+# Extrator de cada processo de trabalho (a tabela de acordes é montada uma vez)
+_extractor = None
+
+# Se os processos de trabalho perfilam a extração
+_profile = False
+
+
+def find_pairs(directory):
+    """
+    Encontra os pares MIDI + letra de uma pasta e subpastas.
+
+    Returns:
+        tuple: (pares (caminho do MIDI, caminho da letra) em ordem, arquivos sem par)
+    """
+    pairs = []
+    unpaired = 0
+    for root, dirs, files in os.walk(directory):
+        dirs.sort()
+        midis = {}
+        lyrics = {}
+        for name in files:
+            stem, extension = os.path.splitext(name)
+            extension = extension.lower()
+            if extension in MIDI_EXTENSIONS:
+                midis[stem] = os.path.join(root, name)
+            elif extension in LYRICS_EXTENSIONS:
+                lyrics[stem] = os.path.join(root, name)
+
+        for stem in sorted(midis):
+            if stem in lyrics:
+                pairs.append((midis[stem], lyrics.pop(stem)))
+            else:
+                unpaired += 1
+        unpaired += len(lyrics)
+    return pairs, unpaired
+
+
+def song_chords(extracted):
+    """Converte os acordes do AdvancedChordExtractor para o formato do app."""
+    return [
+        {
+            'time': chord['time'],
+            'start': chord['start'],
+            'end': chord['end'],
+            'chord': chord['name'],
+            'components': _components(chord['name'], chord.get('notes', []))
+        }
+        for chord in extracted
+    ]
+
+
+# Componentes já calculados por nome de acorde
+_components_cache = {}
+
+
+def _components(name, notes):
+    # Mesmos componentes que o app obtém com o pychord; se o nome não for
+    # reconhecido, as notas que soavam
+    if name not in _components_cache:
+        # pychord é carregado no primeiro acorde, como no app
+        from pychord import Chord
+        try:
+            _components_cache[name] = Chord(name.replace('-', 'b')).components()
+        except Exception:
+            _components_cache[name] = None
+    return _components_cache[name] or list(dict.fromkeys(notes))
+
+
+def _title_and_artist(midi_path, metadata):
+    stem = os.path.splitext(os.path.basename(midi_path))[0]
+    artist, separator, title = stem.partition(' - ')
+    if not separator:
+        artist, title = 'Desconhecido', stem
+    return metadata.get('ti') or title.strip(), metadata.get('ar') or artist.strip()
+
+
+def _init_worker(engine, profile=False):
+    global _extractor, _profile
+    _extractor = AdvancedChordExtractor(engine=engine)
+    _profile = profile
+
+
+def process_pair(midi_path, lyrics_path):
+    """
+    Prepara uma música (executado nos processos de trabalho).
+
+    Returns:
+        dict: Música no formato de database.save_songs_batch, mais 'source' e
+              'midi_hash' e 'profile' (perfil gravado com --profile), ou com
+              'error' se a música não puder ser lida
+    """
+    try:
+        with open(midi_path, 'rb') as f:
+            midi_data = f.read()
+        stored_midi, midi_hash, _ = uploads.store_bytes(midi_data, config.MIDI_FOLDER, '.mid')
+
+        with open(lyrics_path, 'rb') as f:
+            lyrics_bytes = f.read()
+        stored_lyrics, _, _ = uploads.store_bytes(lyrics_bytes, config.LYRICS_FOLDER, '.txt')
+        lyrics, metadata = lyrics_parser.parse_lyrics(lyrics_bytes.decode('utf-8', errors='replace').splitlines())
+
+        with profiling.profile(midi_hash if _profile else None, 'ingest') as profile:
+            note_table = midi_reader.read_midi(midi_data)
+            chords = song_chords(_extractor.extract_chords(note_table))
+
+        title, artist = _title_and_artist(midi_path, metadata)
+        return {
+            'source': midi_path,
+            'midi_hash': midi_hash,
+            'title': title,
+            'artist': artist,
+            'midi_path': stored_midi,
+            'lyrics_path': stored_lyrics,
+            'lyrics': lyrics,
+            'chords': chords,
+            'profile': profile['name']
+        }
+    except Exception as e:
+        return {'source': midi_path, 'error': str(e)}
+
+
+class Checkpoint:
+    """
+    Progresso de uma ingestão: uma linha JSON por música gravada no banco.
+
+    Linhas incompletas (ingestão interrompida no meio da escrita) são ignoradas.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.done = set()
+        if os.path.exists(path):
+            with open(path, 'r') as f:
+                for line in f:
+                    try:
+                        self.done.add(json.loads(line)['source'])
+                    except (ValueError, KeyError):
+                        continue
+
+    def record(self, entries):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with open(self.path, 'a') as f:
+            for entry in entries:
+                f.write(json.dumps(entry) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+        self.done.update(entry['source'] for entry in entries)
+
+
+def default_checkpoint(directory):
+    """Arquivo de progresso padrão de uma pasta de origem."""
+    digest = hashlib.sha1(os.path.abspath(directory).encode('utf-8')).hexdigest()[:12]
+    return os.path.join(CHECKPOINT_FOLDER, f"{digest}.jsonl")
+
+
+def ingest(directory, workers, batch_size, checkpoint_path, engine='sweep', profile=False):
+    """
+    Ingere as músicas de uma pasta.
+
+    Returns:
+        dict: Contagens ('ingested', 'failed', 'skipped': já no progresso ou
+              já no banco, 'unpaired'), tempo em
+              segundos, músicas por segundo e os perfis gravados ('profiles')
+    """
+    pairs, unpaired = find_pairs(directory)
+    checkpoint = Checkpoint(checkpoint_path)
+
+    # Os caminhos no progresso são relativos à pasta, para que ela possa ser movida
+    relative = {midi_path: os.path.relpath(midi_path, directory) for midi_path, _ in pairs}
+    pending = [(midi, lyrics) for midi, lyrics in pairs if relative[midi] not in checkpoint.done]
+    skipped = len(pairs) - len(pending)
+
+    print(f"{len(pairs)} pares encontrados, {skipped} já ingeridos, {unpaired} arquivos sem par")
+    if not pending:
+        return {'ingested': 0, 'failed': 0, 'skipped': skipped, 'unpaired': unpaired,
+                'elapsed': 0.0, 'songs_per_second': 0.0, 'profiles': []}
+
+    database.create_tables()
+
+    started = time.perf_counter()
+    ingested = 0
+    failed = 0
+    found = 0
+    batch = []
+    profiles = []
+
+    def flush():
+        nonlocal ingested, found
+        # Músicas gravadas por uma ingestão interrompida antes de registrar o
+        # progresso: já estão no banco e não são inseridas de novo
+        stored = database.find_songs_by_files((song['midi_path'], song['lyrics_path']) for song in batch)
+        if stored is None:
+            raise RuntimeError("Falha ao consultar o banco de dados; execute novamente para continuar")
+        new = [song for song in batch if (song['midi_path'], song['lyrics_path']) not in stored]
+
+        song_ids = database.save_songs_batch(new) if new else []
+        if song_ids is None:
+            raise RuntimeError("Falha ao gravar o lote no banco de dados; execute novamente para continuar")
+        stored = {**stored, **{(song['midi_path'], song['lyrics_path']): song_id
+                               for song_id, song in zip(song_ids, new)}}
+        checkpoint.record([
+            {'source': relative[song['source']],
+             'song_id': stored[(song['midi_path'], song['lyrics_path'])],
+             'midi_hash': song['midi_hash']}
+            for song in batch
+        ])
+        ingested += len(new)
+        found += len(batch) - len(new)
+        batch.clear()
+
+        elapsed = time.perf_counter() - started
+        print(f"{ingested + found + failed}/{len(pending)} músicas, {ingested / elapsed:.1f} músicas/s")
+
+    # Poucas tarefas por processo em andamento mantêm a memória limitada em acervos grandes
+    max_in_flight = workers * 4
+    work = iter(pending)
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(engine, profile)) as executor:
+        in_flight = set()
+        while True:
+            for midi_path, lyrics_path in work:
+                in_flight.add(executor.submit(process_pair, midi_path, lyrics_path))
+                if len(in_flight) >= max_in_flight:
+                    break
+            if not in_flight:
+                break
+
+            completed, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in completed:
+                song = future.result()
+                if 'error' in song:
+                    failed += 1
+                    print(f"Erro ao processar {song['source']}: {song['error']}", file=sys.stderr)
+                    continue
+                if song['profile']:
+                    profiles.append(song['profile'])
+                batch.append(song)
+                if len(batch) >= batch_size:
+                    flush()
+
+        if batch:
+            flush()
+
+    elapsed = time.perf_counter() - started
+    return {
+        'ingested': ingested,
+        'failed': failed,
+        'skipped': skipped + found,
+        'unpaired': unpaired,
+        'elapsed': elapsed,
+        'songs_per_second': ingested / elapsed if elapsed else 0.0,
+        'profiles': profiles
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('directory', help='Pasta com os arquivos MIDI e as letras')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                        help='Processos de trabalho (padrão: número de CPUs)')
+    parser.add_argument('--batch', type=int, default=100,
+                        help='Músicas gravadas por transação')
+    parser.add_argument('--checkpoint', help='Arquivo de progresso (padrão: data/ingest/<pasta>.jsonl)')
+    parser.add_argument('--engine', choices=('sweep', 'numpy'), default='sweep',
+                        help='Motor de varredura do AdvancedChordExtractor')
+    parser.add_argument('--profile', action='store_true', default=config.PROFILE_EXTRACTION,
+                        help='Perfila a extração de cada música e mostra as funções mais lentas')
+    parser.add_argument('--profile-limit', type=int, default=20,
+                        help='Funções no relatório do --profile')
+    args = parser.parse_args(argv)
+
+    if not os.path.isdir(args.directory):
+        parser.error(f"Pasta não encontrada: {args.directory}")
+
+    try:
+        result = ingest(args.directory, max(1, args.workers), max(1, args.batch),
+                        args.checkpoint or default_checkpoint(args.directory), args.engine, args.profile)
+    except RuntimeError as e:
+        print(e, file=sys.stderr)
+        return 1
+    finally:
+        database.close_pool()
+
+    print(f"Ingeridas: {result['ingested']}, falhas: {result['failed']}, "
+          f"já ingeridas: {result['skipped']}, sem par: {result['unpaired']}")
+    print(f"Tempo: {result['elapsed']:.1f} s ({result['songs_per_second']:.1f} músicas/s)")
+
+    # Relatório só dos perfis desta ingestão
+    report = profiling.hotspots(limit=args.profile_limit, names=result['profiles']) if result['profiles'] else None
+    if report is not None:
+        print(f"\nPerfil da extração (perfis em {config.PROFILES_FOLDER}):")
+        print(profiling.format_report(report))
+    return 0 if not result['failed'] else 2
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,363 @@
+"""
+Fila de tarefas em segundo plano executadas em um pool de processos.
+
+Cada tarefa tem um registro JSON em disco (um arquivo por tarefa) com estado,
+progresso e resultado, de modo que o status pode ser consultado por qualquer
+processo do servidor e as tarefas pendentes sobrevivem a um reinício.
+"""
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import contextmanager
+import fcntl
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+import uuid
+
+import backend.metrics as metrics
+
+# Estados de uma tarefa
+QUEUED = 'queued'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+
+ACTIVE_STATES = (QUEUED, RUNNING)
+
+# Trava (flock) que serializa a leitura e regravação dos registros, entre processos
+RECORDS_LOCK = 'records.lock'
+
+
+def _write_json_atomic(path, data):
+    """Grava JSON em um arquivo temporário e o renomeia sobre o destino."""
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w') as f:
+            json.dump(data, f)
+        os.replace(tmp_path, path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+@contextmanager
+def _records_locked(store_dir):
+    """
+    Trava exclusiva sobre os registros de uma pasta de tarefas, para que o
+    progresso informado pelo processo de trabalho e o resultado gravado pelo
+    servidor não se sobrescrevam.
+    """
+    fd = os.open(os.path.join(store_dir, RECORDS_LOCK), os.O_CREAT | os.O_RDWR, 0o644)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        yield
+    finally:
+        # Soltar explicitamente: um processo criado por fork no meio guarda uma cópia do descritor
+        fcntl.flock(fd, fcntl.LOCK_UN)
+        os.close(fd)
+
+
+class JobReporter:
+    """
+    Permite que a função da tarefa, no processo de trabalho, informe o progresso.
+    """
+
+    def __init__(self, job_path):
+        self.job_path = job_path
+
+    def update(self, stage, progress):
+        """
+        Registra a etapa atual e o progresso (0 a 1) da tarefa.
+
+        Args:
+            stage (str): Nome da etapa (ex.: 'parsing', 'extracting')
+            progress (float): Fração concluída
+        """
+        try:
+            with _records_locked(os.path.dirname(self.job_path)):
+                with open(self.job_path, 'r') as f:
+                    job = json.load(f)
+                if job['status'] not in ACTIVE_STATES:
+                    return
+                job.update({
+                    'status': RUNNING,
+                    'stage': stage,
+                    'progress': progress,
+                    'updated_at': time.time()
+                })
+                _write_json_atomic(self.job_path, job)
+        except Exception as e:
+            print(f"Erro ao atualizar progresso da tarefa: {e}")
+
+
+def _run_task(task, job_path, args):
+    """
+    Ponto de entrada no processo de trabalho. Se a tarefa for sorteada pela
+    amostragem, a medição das etapas segue no resultado ('metrics').
+    """
+    reporter = JobReporter(job_path)
+    reporter.update('starting', 0.0)
+    with metrics.collect() as measurement:
+        result = task(reporter, *args)
+    if measurement is not None and isinstance(result, dict):
+        result = dict(result, metrics=measurement.export())
+    return result
+
+
+class JobQueue:
+    """
+    Fila de tarefas com deduplicação por chave e persistência em disco.
+
+    As funções de tarefa precisam ser registradas por nome (com register) para
+    que tarefas pendentes possam ser retomadas depois de um reinício. Cada função
+    recebe um JobReporter seguido dos argumentos passados a submit e devolve um
+    dicionário serializável em JSON com o resultado.
+    """
+
+    def __init__(self, store_dir, max_workers=None):
+        """
+        Args:
+            store_dir (str): Pasta dos registros das tarefas
+            max_workers (int, optional): Número de processos de trabalho
+        """
+        self.store_dir = store_dir
+        self.max_workers = max_workers
+        self.tasks = {}
+
+        self._executor = None
+        self._lock = threading.RLock()
+        self._recovered = False
+        # Travas das tarefas reivindicadas por este processo: id -> descritor
+        self._claims = {}
+
+    def register(self, name, task):
+        """Registra uma função de tarefa (de nível de módulo, para ser serializável)."""
+        self.tasks[name] = task
+
+    def submit(self, name, key, *args):
+        """
+        Enfileira uma tarefa, ou devolve a tarefa ativa com a mesma chave.
+
+        Args:
+            name (str): Nome da função registrada
+            key (str): Chave de deduplicação (ex.: caminho ou hash do MIDI)
+            *args: Argumentos serializáveis em JSON para a função
+
+        Returns:
+            dict: Registro da tarefa
+        """
+        with self._lock:
+            self._recover()
+
+            now = time.time()
+            job = {
+                'id': uuid.uuid4().hex,
+                'task': name,
+                'key': key,
+                'args': list(args),
+                'status': QUEUED,
+                'stage': 'queued',
+                'progress': 0.0,
+                'created_at': now,
+                'updated_at': now,
+                'result': None,
+                'error': None
+            }
+            # Reivindicada antes de o registro existir: nenhum outro processo
+            # pode retomá-la entre a gravação e o início
+            if not self._claim(job['id']):
+                raise RuntimeError(f"Não foi possível reivindicar a tarefa {job['id']}")
+
+            # Consulta e gravação da chave sob a trava dos registros, para que
+            # dois processos do servidor não enfileirem a mesma chave
+            with _records_locked(self.store_dir):
+                # A chave aponta para a última tarefa enviada, em qualquer processo
+                existing = self.get(self._read_key(key))
+                if existing and existing['status'] in ACTIVE_STATES:
+                    # O id novo nunca foi publicado: a trava pode ser apagada
+                    self._release_claim(job['id'])
+                    os.remove(os.path.join(self.store_dir, f"{job['id']}.lock"))
+                    return existing
+
+                _write_json_atomic(self._job_path(job['id']), job)
+                self._write_key(key, job['id'])
+
+            self._start(job)
+            return job
+
+    def get(self, job_id):
+        """
+        Lê o registro de uma tarefa.
+
+        Args:
+            job_id (str): Identificador da tarefa
+
+        Returns:
+            dict: Registro da tarefa ou None se não existir
+        """
+        # Os identificadores são hexadecimais; qualquer outra coisa não é uma tarefa
+        if not job_id or not all(c in '0123456789abcdef' for c in job_id):
+            return None
+
+        with self._lock:
+            self._recover()
+
+        try:
+            with open(self._job_path(job_id), 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def shutdown(self, wait=True):
+        """Encerra o pool de processos."""
+        if self._executor:
+            self._executor.shutdown(wait=wait)
+            self._executor = None
+
+    def _job_path(self, job_id):
+        return os.path.join(self.store_dir, f"{job_id}.json")
+
+    def _key_path(self, key):
+        digest = hashlib.sha1(key.encode('utf-8')).hexdigest()
+        return os.path.join(self.store_dir, f"key-{digest}")
+
+    def _read_key(self, key):
+        try:
+            with open(self._key_path(key), 'r') as f:
+                return f.read().strip()
+        except OSError:
+            return None
+
+    def _write_key(self, key, job_id):
+        try:
+            with open(self._key_path(key), 'w') as f:
+                f.write(job_id)
+        except OSError as e:
+            print(f"Erro ao indexar tarefa {job_id}: {e}")
+
+    def _start(self, job):
+        args = (_run_task, self.tasks[job['task']], self._job_path(job['id']), job['args'])
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+        try:
+            future = self._executor.submit(*args)
+        except BrokenProcessPool:
+            # Um processo de trabalho morreu (ex.: falta de memória) e o pool não
+            # aceita mais tarefas: as seguintes vão para um pool novo
+            self._executor.shutdown(wait=False)
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+            future = self._executor.submit(*args)
+
+        executor = self._executor
+        future.add_done_callback(lambda f, job_id=job['id']: self._finish(job_id, f, executor))
+
+    def _finish(self, job_id, future, executor=None):
+        try:
+            result = future.result()
+            error = None
+        except BrokenProcessPool as e:
+            result = None
+            error = f"Processo de trabalho encerrado inesperadamente: {e}"
+            with self._lock:
+                if self._executor is executor and executor is not None:
+                    executor.shutdown(wait=False)
+                    self._executor = None
+        except Exception as e:
+            result = None
+            error = str(e)
+
+        with self._lock, _records_locked(self.store_dir):
+            job = self.get(job_id)
+            if job is None:
+                return
+
+            if error is None:
+                job['result'] = result
+                # Medição feita no processo de trabalho: somada ao registro deste processo
+                if isinstance(result, dict):
+                    metrics.record(f"job.{job['task']}", result.get('metrics'))
+                job['status'] = DONE
+                job['stage'] = 'done'
+                job['progress'] = 1.0
+            else:
+                job['status'] = FAILED
+                job['stage'] = 'failed'
+                job['error'] = error
+            job['updated_at'] = time.time()
+
+            try:
+                _write_json_atomic(self._job_path(job_id), job)
+            except Exception as e:
+                print(f"Erro ao salvar resultado da tarefa {job_id}: {e}")
+
+            self._release_claim(job_id)
+
+    def _recover(self):
+        """
+        Na primeira utilização, retoma as tarefas que estavam na fila ou em execução
+        quando o servidor parou. Cada tarefa é reivindicada com uma trava (_claim),
+        para que vários processos do servidor não a executem em dobro.
+        """
+        if self._recovered:
+            return
+        self._recovered = True
+
+        for file_name in os.listdir(self.store_dir):
+            if not file_name.endswith('.json'):
+                continue
+            job_id = file_name[:-len('.json')]
+            job = self.get(job_id)
+            if not job or job['status'] not in ACTIVE_STATES or job['task'] not in self.tasks:
+                continue
+            if not self._claim(job_id):
+                continue
+
+            with _records_locked(self.store_dir):
+                # Relida depois da trava: outro processo pode tê-la concluído nesse meio tempo
+                job = self.get(job_id)
+                if not job or job['status'] not in ACTIVE_STATES:
+                    self._release_claim(job_id)
+                    continue
+                job['status'] = QUEUED
+                job['stage'] = 'queued'
+                job['updated_at'] = time.time()
+                _write_json_atomic(self._job_path(job['id']), job)
+            self._start(job)
+
+    def _claim(self, job_id):
+        """
+        Reivindica uma tarefa com uma trava flock no arquivo <id>.lock, mantida
+        enquanto a tarefa roda neste processo. O sistema solta a trava quando o
+        processo termina, então não há trava velha a detectar nem PID reaproveitado.
+
+        O arquivo da trava nunca é apagado (fica junto do registro da tarefa):
+        apagá-lo deixaria um processo travando o arquivo antigo enquanto outro
+        cria e trava um novo, e os dois executariam a tarefa.
+        """
+        lock_path = os.path.join(self.store_dir, f"{job_id}.lock")
+        try:
+            fd = os.open(lock_path, os.O_CREAT | os.O_RDWR, 0o644)
+        except OSError as e:
+            print(f"Erro ao reivindicar tarefa {job_id}: {e}")
+            return False
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            os.close(fd)
+            return False
+        with self._lock:
+            self._claims[job_id] = fd
+        return True
+
+    def _release_claim(self, job_id):
+        with self._lock:
+            fd = self._claims.pop(job_id, None)
+        if fd is None:
+            return
+        # Soltar explicitamente: os processos de trabalho criados por fork guardam uma cópia do descritor
+        fcntl.flock(fd, fcntl.LOCK_UN)
+        os.close(fd)
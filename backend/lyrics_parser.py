@@ -0,0 +1,211 @@
+"""
+Leitor de letras sincronizadas (formato do aplicativo e LRC).
+
+Reconhece, com uma única expressão regular compilada:
+    [mm:ss] ou [hh:mm:ss] no início da linha, com fração opcional ([01:02.50]);
+    várias marcas no início da mesma linha ([00:12.00][01:40.00]Refrão);
+    marcas de palavra/sílaba do LRC estendido (<00:12.50>Quan<00:12.80>do);
+    cabeçalhos [chave:valor] ([ti:], [ar:], [offset:+250], ...).
+
+O arquivo é lido linha a linha e o resultado é memorizado pelo mtime do arquivo.
+"""
+from collections import OrderedDict
+import os
+import re
+
+# Marca de tempo de linha ([...]) ou de palavra (<...>), ou cabeçalho [chave:valor]
+TAG_PATTERN = re.compile(
+    r'(?P<bracket>[\[<])(?:(?P<hours>\d+):)?(?P<minutes>\d+):(?P<seconds>\d+(?:\.\d+)?)(?P<close>[\]>])'
+    r'|\[(?P<key>[A-Za-z#]+):(?P<value>[^\]]*)\]'
+)
+
+# Espaços entre marcas consecutivas no início da linha
+_SPACES = re.compile(r'\s*')
+
+# Letras já lidas: caminho -> (mtime, tamanho, resultado)
+_file_cache = OrderedDict()
+_FILE_CACHE_LIMIT = 256
+
+
+def parse_lyrics(lines):
+    """
+    Lê as linhas de uma letra.
+
+    Linhas sem marca de tempo entram com tempo 0. Linhas com várias marcas são
+    repetidas em cada tempo. O cabeçalho [offset:N] (em ms, positivo adianta a
+    letra) é aplicado a todos os tempos.
+
+    Args:
+        lines (iterable): Linhas do arquivo (um arquivo aberto serve)
+
+    Returns:
+        tuple: (linhas, metadados). Cada linha é um dicionário com 'time' (ms) e
+               'text', mais 'words' quando houver marcas de palavra — cada
+               palavra com 'time', 'end' (ms ou None) e 'text'. As linhas vêm
+               ordenadas por tempo; metadados são os demais cabeçalhos.
+    """
+    lyrics = []
+    metadata = {}
+
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+
+        line_times, position, header = _read_line_tags(line)
+        if header:
+            metadata[header[0]] = header[1]
+            continue
+
+        text, words = _read_words(line, position)
+        if not line_times:
+            tagged = [word['time'] for word in words if word['time'] is not None]
+            if tagged:
+                # Só marcas de palavra: a linha começa na primeira palavra marcada
+                line_times = [tagged[0]]
+            else:
+                lyrics.append({'time': 0, 'text': text})
+                continue
+
+        for line_time in line_times:
+            entry = {'time': line_time, 'text': text}
+            if words:
+                # Em linhas repetidas, as palavras acompanham o deslocamento da linha;
+                # palavras sem marca no início da linha ficam com o tempo da linha
+                shift = line_time - line_times[0]
+                entry['words'] = [
+                    {
+                        'time': (word['time'] if word['time'] is not None else line_times[0]) + shift,
+                        'end': word['end'] + shift if word['end'] is not None else None,
+                        'text': word['text']
+                    }
+                    for word in words
+                ]
+            lyrics.append(entry)
+
+    offset = _read_offset(metadata.pop('offset', None))
+    if offset:
+        for entry in lyrics:
+            entry['time'] = max(entry['time'] - offset, 0)
+            for word in entry.get('words', ()):
+                word['time'] = max(word['time'] - offset, 0)
+                if word['end'] is not None:
+                    word['end'] = max(word['end'] - offset, 0)
+
+    lyrics.sort(key=lambda entry: entry['time'])
+    return lyrics, metadata
+
+
+def parse_lyrics_file(lyrics_path):
+    """
+    Lê um arquivo de letra, reaproveitando o resultado enquanto o arquivo não mudar.
+
+    O resultado memorizado é compartilhado entre as chamadas e não deve ser
+    modificado por quem o recebe.
+
+    Args:
+        lyrics_path (str): Caminho do arquivo
+
+    Returns:
+        tuple: (linhas, metadados), como em parse_lyrics
+    """
+    stat = os.stat(lyrics_path)
+    cache_key = os.path.abspath(lyrics_path)
+
+    cached = _file_cache.get(cache_key)
+    if cached and cached[0] == stat.st_mtime_ns and cached[1] == stat.st_size:
+        _file_cache.move_to_end(cache_key)
+        return cached[2]
+
+    with open(lyrics_path, 'r') as f:
+        result = parse_lyrics(f)
+
+    _file_cache[cache_key] = (stat.st_mtime_ns, stat.st_size, result)
+    _file_cache.move_to_end(cache_key)
+    if len(_file_cache) > _FILE_CACHE_LIMIT:
+        _file_cache.popitem(last=False)
+    return result
+
+
+def _to_ms(match):
+    hours = int(match.group('hours') or 0)
+    minutes = int(match.group('minutes'))
+    seconds = float(match.group('seconds'))
+    return round((hours * 3600 + minutes * 60 + seconds) * 1000)
+
+
+def _is_time_tag(match, bracket):
+    closing = ']' if bracket == '[' else '>'
+    return match.group('minutes') is not None and match.group('bracket') == bracket \
+        and match.group('close') == closing
+
+
+def _read_line_tags(line):
+    """
+    Lê as marcas do início da linha.
+
+    Returns:
+        tuple: (tempos em ms, posição do texto, cabeçalho (chave, valor) ou None)
+    """
+    line_times = []
+    position = 0
+    while True:
+        match = TAG_PATTERN.match(line, position)
+        if not match:
+            break
+
+        if match.group('key') is not None:
+            # Cabeçalho: precisa estar sozinho na linha
+            if not line_times and not line[match.end():].strip():
+                return [], 0, (match.group('key').lower(), match.group('value').strip())
+            break
+
+        if not _is_time_tag(match, '['):
+            break
+
+        line_times.append(_to_ms(match))
+        position = _SPACES.match(line, match.end()).end()
+
+    return line_times, position, None
+
+
+def _read_words(line, position):
+    """
+    Lê o texto depois das marcas de linha, separando as palavras marcadas com <tempo>.
+
+    Returns:
+        tuple: (texto sem marcas, palavras) — palavras vazio se não houver marcas
+    """
+    words = []
+    text_parts = []
+    word_time = None
+
+    for match in TAG_PATTERN.finditer(line, position):
+        if not _is_time_tag(match, '<'):
+            continue
+
+        segment = line[position:match.start()]
+        if segment.strip() or (segment and words):
+            text_parts.append(segment)
+            words.append({'time': word_time, 'end': None, 'text': segment})
+
+        tag_time = _to_ms(match)
+        if words and words[-1]['end'] is None:
+            words[-1]['end'] = tag_time
+        word_time = tag_time
+        position = match.end()
+
+    tail = line[position:]
+    if tail:
+        text_parts.append(tail)
+        if word_time is not None:
+            words.append({'time': word_time, 'end': None, 'text': tail})
+
+    return ''.join(text_parts).strip(), words
+
+
+def _read_offset(value):
+    try:
+        return int(value) if value else 0
+    except ValueError:
+        return 0
@@ -0,0 +1,380 @@
+"""
+Instrumentação do backend: tempo por etapa, idas ao banco e acertos de cache.
+
+Cada pedido HTTP (ou tarefa em segundo plano) sorteado pela amostragem
+(config.METRICS_SAMPLE_RATE) recebe uma Measurement, guardada em uma
+ContextVar. As etapas instrumentadas (stage, timed) somam tempo e chamadas
+nela, o cursor do banco conta as idas ao servidor e as consultas aos caches
+contam acertos e falhas. Ao fim do pedido, a medição vira o cabeçalho
+Server-Timing da resposta e é somada ao registro do processo, exposto em
+/metrics no formato texto do Prometheus.
+
+Com a amostragem desligada (ou em pedidos não sorteados) não existe medição:
+stage devolve um gerenciador de contexto vazio e as demais funções retornam
+logo depois de ler a ContextVar. Só a contagem de pedidos é sempre feita.
+
+O registro é por processo, como o pool de conexões: com vários workers do
+gunicorn, cada um expõe os próprios números. As tarefas rodam no pool de
+processos e devolvem a medição junto com o resultado (backend/jobs.py), que
+é somada no processo que as enviou.
+"""
+from contextlib import contextmanager
+import contextvars
+import functools
+import random
+import threading
+import time
+
+import backend.config as config
+
+# Limites dos histogramas: segundos por pedido/etapa e idas ao banco por pedido
+SECONDS_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+ROUND_TRIP_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+# Família -> (tipo, descrição, limites dos buckets)
+FAMILIES = {
+    'kplay_requests_total': ('counter', 'Pedidos HTTP atendidos', None),
+    'kplay_sampled_total': ('counter', 'Pedidos e tarefas medidos pela amostragem', None),
+    'kplay_request_seconds': ('histogram', 'Duração dos pedidos e tarefas medidos', SECONDS_BUCKETS),
+    'kplay_stage_seconds': ('histogram', 'Tempo de cada etapa por pedido ou tarefa medido', SECONDS_BUCKETS),
+    'kplay_stage_calls_total': ('counter', 'Execuções de cada etapa nos pedidos e tarefas medidos', None),
+    'kplay_db_round_trips': ('histogram', 'Idas ao banco por pedido ou tarefa medido', ROUND_TRIP_BUCKETS),
+    'kplay_cache_lookups_total': ('counter', 'Consultas aos caches nos pedidos e tarefas medidos', None),
+    'kplay_cache_hit_ratio': ('gauge', 'Fração das consultas a cada cache respondidas por ele', None),
+}
+
+# Etapa em que o cursor do banco soma o tempo das idas ao servidor
+DB_STAGE = 'db'
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# Medição do pedido ou tarefa atual (None quando não foi sorteado)
+_current = contextvars.ContextVar('kplay_measurement', default=None)
+
+# Registro do processo: (família, rótulos) -> valor ou [buckets..., soma, total]
+_series = {}
+_lock = threading.Lock()
+
+
+class Measurement:
+    """Tempos e contagens de um pedido ou de uma tarefa."""
+
+    __slots__ = ('started', 'stages', 'db_round_trips', 'caches', 'annotations')
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.stages = {}  # etapa -> [chamadas, segundos]
+        self.db_round_trips = 0
+        self.caches = {}  # cache -> [acertos, falhas]
+        self.annotations = []  # (nome, segundos, descrição): só no Server-Timing
+
+    def add(self, stage, seconds, calls=1):
+        entry = self.stages.get(stage)
+        if entry is None:
+            self.stages[stage] = [calls, seconds]
+        else:
+            entry[0] += calls
+            entry[1] += seconds
+
+    def export(self):
+        """Dicionário serializável em JSON (enviado pelas tarefas ao processo principal)."""
+        return {
+            'seconds': time.perf_counter() - self.started,
+            'stages': self.stages,
+            'db_round_trips': self.db_round_trips,
+            'caches': self.caches
+        }
+
+
+class _NoStage:
+    """Etapa fora de uma medição: não faz nada."""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NO_STAGE = _NoStage()
+
+
+class _Stage:
+    __slots__ = ('measurement', 'name', 'started')
+
+    def __init__(self, measurement, name):
+        self.measurement = measurement
+        self.name = name
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.measurement.add(self.name, time.perf_counter() - self.started)
+        return False
+
+
+def should_sample():
+    """Sorteia se o próximo pedido ou tarefa será medido."""
+    rate = config.METRICS_SAMPLE_RATE
+    return rate > 0 and (rate >= 1 or random.random() < rate)
+
+
+def begin(sampled=None):
+    """
+    Começa a medição do pedido ou tarefa atual, se ele for sorteado.
+
+    Args:
+        sampled (bool, optional): Força (ou impede) a medição, sem sortear
+
+    Returns:
+        Token para end (o pedido não é medido se current() continuar None)
+    """
+    if sampled is None:
+        sampled = should_sample()
+    return _current.set(Measurement() if sampled else None)
+
+
+def end(token):
+    """
+    Encerra a medição aberta por begin.
+
+    Returns:
+        Measurement: A medição encerrada, ou None se não foi sorteada
+    """
+    measurement = _current.get()
+    _current.reset(token)
+    return measurement
+
+
+def current():
+    """Medição do pedido ou tarefa atual (None fora da amostragem)."""
+    return _current.get()
+
+
+@contextmanager
+def collect(sampled=None):
+    """
+    Mede um trecho fora dos pedidos HTTP (tarefas, ingestão, benchmarks).
+
+    Uso:
+        with metrics.collect() as measurement:
+            ...
+        # measurement é None se o trecho não foi sorteado
+    """
+    token = begin(sampled)
+    try:
+        yield _current.get()
+    finally:
+        _current.reset(token)
+
+
+def stage(name):
+    """
+    Gerenciador de contexto que soma o tempo do bloco à etapa 'name'.
+
+    Uso:
+        with metrics.stage('parse'):
+            note_table = midi_reader.read_midi(midi_path)
+    """
+    measurement = _current.get()
+    if measurement is None:
+        return _NO_STAGE
+    return _Stage(measurement, name)
+
+
+def timed(name):
+    """Decorador equivalente a stage, para funções inteiras."""
+    def decorator(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            measurement = _current.get()
+            if measurement is None:
+                return function(*args, **kwargs)
+            started = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                measurement.add(name, time.perf_counter() - started)
+        return wrapper
+    return decorator
+
+
+def db_round_trip(seconds):
+    """Registra uma ida ao banco (chamado pelo cursor de backend/database.py)."""
+    measurement = _current.get()
+    if measurement is not None:
+        measurement.db_round_trips += 1
+        measurement.add(DB_STAGE, seconds)
+
+
+def cache_lookup(cache, hit):
+    """
+    Registra uma consulta a um cache.
+
+    Args:
+        cache (str): Nome do cache (ex.: 'chords')
+        hit (bool): Se o cache tinha a entrada
+    """
+    measurement = _current.get()
+    if measurement is not None:
+        entry = measurement.caches.setdefault(cache, [0, 0])
+        entry[0 if hit else 1] += 1
+
+
+def annotate(name, seconds, description=None):
+    """Acrescenta uma entrada ao Server-Timing do pedido atual, sem somá-la ao registro."""
+    measurement = _current.get()
+    if measurement is not None:
+        measurement.annotations.append((name, seconds, description))
+
+
+def server_timing(measurement):
+    """
+    Valor do cabeçalho Server-Timing de uma medição: uma entrada por etapa,
+    idas ao banco na descrição de 'db', acertos de cache e o total.
+    """
+    entries = []
+    for name, (calls, seconds) in measurement.stages.items():
+        description = None
+        if name == DB_STAGE:
+            description = round_trips_text(measurement.db_round_trips)
+        elif calls > 1:
+            description = f"{calls} chamadas"
+        entries.append(_timing_entry(name, seconds, description))
+    for name, (hits, misses) in measurement.caches.items():
+        entries.append(f'cache.{name};desc="{hits}/{hits + misses} acertos"')
+    for name, seconds, description in measurement.annotations:
+        entries.append(_timing_entry(name, seconds, description))
+    entries.append(_timing_entry('total', time.perf_counter() - measurement.started))
+    return ', '.join(entries)
+
+
+def round_trips_text(count):
+    """Descrição das idas ao banco no Server-Timing ('1 ida ao banco', '3 idas ao banco')."""
+    return f"{count} ida ao banco" if count == 1 else f"{count} idas ao banco"
+
+
+def _timing_entry(name, seconds, description=None):
+    entry = f"{name};dur={seconds * 1000:.2f}"
+    if description:
+        entry += f';desc="{description}"'
+    return entry
+
+
+def count_request(endpoint, method, status):
+    """Conta um pedido HTTP atendido (sempre, com ou sem amostragem)."""
+    with _lock:
+        _inc('kplay_requests_total', (('endpoint', endpoint), ('method', method), ('status', str(status))))
+
+
+def record(source, measurement):
+    """
+    Soma uma medição ao registro do processo.
+
+    Args:
+        source (str): Origem ('endpoint' do Flask ou 'job.<tarefa>')
+        measurement (Measurement | dict): Medição, ou o resultado de export
+    """
+    if measurement is None:
+        return
+    if isinstance(measurement, Measurement):
+        measurement = measurement.export()
+
+    labels = (('source', source),)
+    with _lock:
+        _inc('kplay_sampled_total', labels)
+        _observe('kplay_request_seconds', labels, measurement['seconds'])
+        _observe('kplay_db_round_trips', labels, measurement['db_round_trips'])
+        for name, (calls, seconds) in measurement['stages'].items():
+            _observe('kplay_stage_seconds', (('stage', name),), seconds)
+            _inc('kplay_stage_calls_total', (('stage', name),), calls)
+        for name, (hits, misses) in measurement['caches'].items():
+            _inc('kplay_cache_lookups_total', (('cache', name), ('result', 'hit')), hits)
+            _inc('kplay_cache_lookups_total', (('cache', name), ('result', 'miss')), misses)
+
+
+def _inc(family, labels, value=1):
+    # Chamado com _lock adquirido
+    _series[(family, labels)] = _series.get((family, labels), 0) + value
+
+
+def _observe(family, labels, value):
+    # Chamado com _lock adquirido
+    buckets = FAMILIES[family][2]
+    series = _series.get((family, labels))
+    if series is None:
+        series = _series[(family, labels)] = [0] * (len(buckets) + 2)
+    for i, bound in enumerate(buckets):
+        if value <= bound:
+            series[i] += 1
+            break
+    series[-2] += value
+    series[-1] += 1
+
+
+def render():
+    """
+    Registro do processo no formato texto do Prometheus (versão 0.0.4).
+
+    Returns:
+        str: Corpo da resposta de /metrics
+    """
+    with _lock:
+        series = {key: list(value) if isinstance(value, list) else value for key, value in _series.items()}
+
+    # Razão de acertos de cada cache, a partir das consultas contadas
+    lookups = {}
+    for (family, labels), value in series.items():
+        if family == 'kplay_cache_lookups_total':
+            cache, result = labels[0][1], labels[1][1]
+            lookups.setdefault(cache, {'hit': 0, 'miss': 0})[result] += value
+    for cache, counts in lookups.items():
+        total = counts['hit'] + counts['miss']
+        if total:
+            series[('kplay_cache_hit_ratio', (('cache', cache),))] = counts['hit'] / total
+
+    lines = []
+    for family, (kind, description, buckets) in FAMILIES.items():
+        family_series = sorted((labels, value) for (name, labels), value in series.items() if name == family)
+        if not family_series:
+            continue
+        lines.append(f"# HELP {family} {description}")
+        lines.append(f"# TYPE {family} {kind}")
+        for labels, value in family_series:
+            if kind != 'histogram':
+                lines.append(f"{family}{_format_labels(labels)} {_format_value(value)}")
+                continue
+            cumulative = 0
+            for bound, count in zip(buckets, value):
+                cumulative += count
+                lines.append(f"{family}_bucket{_format_labels(labels + (('le', _format_value(bound)),))} {cumulative}")
+            lines.append(f"{family}_bucket{_format_labels(labels + (('le', '+Inf'),))} {value[-1]}")
+            lines.append(f"{family}_sum{_format_labels(labels)} {_format_value(value[-2])}")
+            lines.append(f"{family}_count{_format_labels(labels)} {value[-1]}")
+    return '\n'.join(lines) + '\n'
+
+
+def reset():
+    """Zera o registro do processo (testes e benchmarks)."""
+    with _lock:
+        _series.clear()
+
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{key}="{_escape(value)}"' for key, value in labels) + '}'
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_value(value):
+    if isinstance(value, float):
+        return repr(value)
+    return str(value)
@@ -0,0 +1,323 @@
+"""
+Leitor leve de arquivos MIDI padrão (Standard MIDI File, formatos 0 e 1).
+
+Lê o arquivo em uma única passada, sem montar a partitura do music21, e produz uma
+tabela plana de notas (uma coluna `array` por campo) com altura, tick inicial e
+final, canal e faixa, além dos tempos em milissegundos resolvidos pelo mapa de
+andamentos do arquivo.
+
+As notas são lidas como o music21 as lê: na ordem em que são ligadas, cada uma
+pareada com o primeiro desligamento seguinte da mesma altura e canal, e notas
+que nunca são desligadas são descartadas. O formato 2 (faixas independentes,
+cada uma com seu próprio andamento) não é aceito, como no music21.
+"""
+from array import array
+from bisect import bisect_right
+import struct
+
+# Andamento padrão de um SMF sem evento de andamento: 120 BPM
+DEFAULT_TEMPO = 500000  # microssegundos por semínima
+
+# Canal MIDI de percussão (canal 10, índice 9)
+PERCUSSION_CHANNEL = 9
+
+
+class MidiFormatError(ValueError):
+    """Arquivo que não é um SMF válido."""
+
+
+class TempoMap:
+    """
+    Índice do mapa de andamentos de um arquivo MIDI.
+    
+    Guarda, para cada trecho de andamento constante, o tick inicial, o tempo
+    acumulado em milissegundos nesse tick e a duração de um tick; a conversão de
+    um tick é uma busca binária seguida de uma interpolação linear.
+    """
+
+    def __init__(self, tempo_changes=(), ticks_per_beat=None, ticks_per_second=None):
+        """
+        Args:
+            tempo_changes (iterable): Pares (tick, microssegundos por semínima)
+            ticks_per_beat (int, optional): Resolução métrica do arquivo
+            ticks_per_second (float, optional): Resolução SMPTE do arquivo
+        """
+        self.ticks_per_beat = ticks_per_beat
+        self.ticks_per_second = ticks_per_second
+
+        self.segment_ticks = array('d', [0])
+        self.segment_ms = array('d', [0.0])
+
+        if ticks_per_second:
+            # Divisão SMPTE: ticks têm duração fixa e o andamento é ignorado
+            self.segment_rates = array('d', [1000.0 / ticks_per_second])
+            return
+
+        self.segment_rates = array('d', [DEFAULT_TEMPO / 1000.0 / ticks_per_beat])
+        for tick, tempo in sorted(tempo_changes, key=lambda change: change[0]):
+            rate = tempo / 1000.0 / ticks_per_beat
+            if tick == self.segment_ticks[-1]:
+                # Vários andamentos no mesmo tick: vale o último
+                self.segment_rates[-1] = rate
+                continue
+            self.segment_ms.append(self.segment_ms[-1] +
+                                   (tick - self.segment_ticks[-1]) * self.segment_rates[-1])
+            self.segment_ticks.append(tick)
+            self.segment_rates.append(rate)
+
+    def __len__(self):
+        return len(self.segment_ticks)
+
+    def tick_to_ms(self, tick):
+        """Converte um tick em milissegundos desde o início do arquivo."""
+        i = bisect_right(self.segment_ticks, tick) - 1
+        if i < 0:
+            i = 0
+        return self.segment_ms[i] + (tick - self.segment_ticks[i]) * self.segment_rates[i]
+
+    def ticks_to_ms(self, ticks):
+        """
+        Converte vários ticks em milissegundos.
+        
+        Só há busca binária quando o tick sai do trecho do anterior, então
+        sequências ordenadas (ou quase) custam O(n + trocas de trecho).
+        
+        Args:
+            ticks (iterable): Ticks a converter
+            
+        Returns:
+            array: Tempos em milissegundos, na mesma ordem
+        """
+        segment_ticks = self.segment_ticks
+        segment_ms = self.segment_ms
+        segment_rates = self.segment_rates
+        last = len(segment_ticks) - 1
+
+        result = array('d')
+        i = 0
+        low, high = segment_ticks[0], segment_ticks[1] if last else float('inf')
+        for tick in ticks:
+            if not low <= tick < high:
+                i = max(bisect_right(segment_ticks, tick) - 1, 0)
+                low = segment_ticks[i]
+                high = segment_ticks[i + 1] if i < last else float('inf')
+            result.append(segment_ms[i] + (tick - low) * segment_rates[i])
+        return result
+
+    def quarters_to_ms(self, quarter_length):
+        """Converte uma posição em semínimas (offset do music21) em milissegundos."""
+        if not self.ticks_per_beat:
+            # Sem semínima definida no arquivo, considera-se 120 BPM
+            return float(quarter_length) * DEFAULT_TEMPO / 1000.0
+        return self.tick_to_ms(float(quarter_length) * self.ticks_per_beat)
+
+
+class NoteTable:
+    """
+    Tabela de notas de um arquivo MIDI, em colunas paralelas.
+
+    Atributos:
+        pitch, velocity, channel, track: colunas inteiras de cada nota
+        start_tick, end_tick: posição da nota em ticks do arquivo
+        start_ms, end_ms: posição da nota em milissegundos
+        ticks_per_beat (int): Resolução do arquivo (None para divisão SMPTE)
+        ticks_per_second (float): Resolução SMPTE (None para divisão métrica)
+        tempo_changes (list): Pares (tick, microssegundos por semínima) em ordem
+        time_signatures (list): Quádruplas (faixa, tick, numerador, denominador) na
+            ordem do arquivo
+        note_tracks (set): Faixas com algum evento de nota ligada
+        tempo_map (TempoMap): Índice para converter ticks em milissegundos
+    """
+
+    def __init__(self, ticks_per_beat=None, ticks_per_second=None):
+        self.ticks_per_beat = ticks_per_beat
+        self.ticks_per_second = ticks_per_second
+        self.tempo_changes = []
+        self.time_signatures = []
+        self.note_tracks = set()
+        self.tempo_map = None
+
+        self.pitch = array('B')
+        self.velocity = array('B')
+        self.channel = array('B')
+        self.track = array('H')
+        # 'Q' em vez de 'L', cujo tamanho depende da plataforma
+        self.start_tick = array('Q')
+        self.end_tick = array('Q')
+        self.start_ms = array('d')
+        self.end_ms = array('d')
+
+    def __len__(self):
+        return len(self.pitch)
+
+    def _append(self, pitch, velocity, channel, track, start_tick, end_tick):
+        self.pitch.append(pitch)
+        self.velocity.append(velocity)
+        self.channel.append(channel)
+        self.track.append(track)
+        self.start_tick.append(start_tick)
+        self.end_tick.append(end_tick)
+
+    def _resolve_ms(self):
+        """Monta o mapa de andamentos e preenche start_ms/end_ms."""
+        self.tempo_map = TempoMap(self.tempo_changes, self.ticks_per_beat, self.ticks_per_second)
+        self.start_ms = self.tempo_map.ticks_to_ms(self.start_tick)
+        self.end_ms = self.tempo_map.ticks_to_ms(self.end_tick)
+
+
+def read_midi(source):
+    """
+    Lê um arquivo MIDI e devolve a tabela de notas.
+
+    Args:
+        source (str | bytes): Caminho do arquivo ou seu conteúdo
+
+    Returns:
+        NoteTable: Notas do arquivo, com tempos em ticks e milissegundos
+
+    Raises:
+        MidiFormatError: Se o conteúdo não for um SMF válido
+    """
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        data = bytes(source)
+    else:
+        with open(source, 'rb') as f:
+            data = f.read()
+
+    # Arquivos RMID (RIFF) carregam o SMF dentro de um bloco 'data'
+    header_offset = data.find(b'MThd')
+    if header_offset < 0:
+        raise MidiFormatError("Cabeçalho MThd não encontrado")
+
+    if len(data) < header_offset + 14:
+        raise MidiFormatError("Cabeçalho MThd truncado")
+    header_length, midi_format, track_count, division = struct.unpack_from('>IHHH', data, header_offset + 4)
+    position = header_offset + 8 + header_length
+
+    if midi_format not in (0, 1):
+        # No formato 2 as faixas são sequências independentes, sem um mapa de
+        # andamentos comum
+        raise MidiFormatError(f"Formato MIDI {midi_format} não suportado")
+
+    if division & 0x8000:
+        # Divisão SMPTE: quadros por segundo (negativo) e ticks por quadro
+        frames_per_second = 256 - (division >> 8)
+        if frames_per_second == 29:
+            frames_per_second = 29.97
+        table = NoteTable(ticks_per_second=frames_per_second * (division & 0xFF))
+    else:
+        if division == 0:
+            raise MidiFormatError("Divisão de tempo inválida")
+        table = NoteTable(ticks_per_beat=division)
+
+    track_index = 0
+    while track_index < track_count and position < len(data):
+        if position + 8 > len(data):
+            raise MidiFormatError(f"Cabeçalho da faixa {track_index} truncado")
+        chunk_type = data[position:position + 4]
+        (chunk_length,) = struct.unpack_from('>I', data, position + 4)
+        chunk_start = position + 8
+        chunk_end = min(chunk_start + chunk_length, len(data))
+        position = chunk_start + chunk_length
+
+        # Blocos desconhecidos devem ser ignorados
+        if chunk_type != b'MTrk':
+            continue
+
+        try:
+            _read_track(data, chunk_start, chunk_end, track_index, table)
+        except IndexError:
+            raise MidiFormatError(f"Faixa {track_index} truncada")
+        track_index += 1
+
+    table.tempo_changes.sort(key=lambda change: change[0])
+    table._resolve_ms()
+    return table
+
+
+def _read_track(data, position, end, track_index, table):
+    """
+    Lê os eventos de um bloco MTrk, acrescentando as notas à tabela.
+
+    As notas entram na tabela na ordem em que são ligadas. Notas sobrepostas na
+    mesma altura e canal são pareadas na ordem em que começaram (a primeira
+    ligada é a primeira desligada); notas sem desligamento são descartadas.
+    """
+    tick = 0
+    running_status = None
+    open_notes = {}
+    # [altura, intensidade, canal, tick inicial, tick final ou None]
+    notes = []
+
+    while position < end:
+        delta, position = _read_varlen(data, position)
+        tick += delta
+
+        status = data[position]
+        if status & 0x80:
+            position += 1
+        elif running_status is None:
+            raise MidiFormatError(f"Byte de dados sem status na faixa {track_index}")
+        else:
+            status = running_status
+
+        if status == 0xFF:
+            meta_type = data[position]
+            length, position = _read_varlen(data, position + 1)
+            if meta_type == 0x51 and length == 3:
+                tempo = (data[position] << 16) | (data[position + 1] << 8) | data[position + 2]
+                table.tempo_changes.append((tick, tempo))
+            elif meta_type == 0x58 and length >= 2 and data[position]:
+                table.time_signatures.append((track_index, tick, data[position], 2 ** data[position + 1]))
+            position += length
+            if meta_type == 0x2F:
+                break
+            continue
+
+        if status in (0xF0, 0xF7):
+            length, position = _read_varlen(data, position)
+            position += length
+            continue
+
+        if status >= 0xF0:
+            # Mensagens de sistema comum/tempo real não deveriam aparecer em arquivos
+            position += {0xF1: 1, 0xF2: 2, 0xF3: 1}.get(status, 0)
+            continue
+
+        running_status = status
+        kind = status & 0xF0
+        channel = status & 0x0F
+
+        if kind in (0xC0, 0xD0):
+            position += 1
+            continue
+
+        key = data[position]
+        velocity = data[position + 1]
+        position += 2
+
+        if kind == 0x90 and velocity > 0:
+            note = [key, velocity, channel, tick, None]
+            notes.append(note)
+            open_notes.setdefault((channel, key), []).append(note)
+        elif kind == 0x80 or kind == 0x90:
+            started = open_notes.get((channel, key))
+            if started:
+                started.pop(0)[4] = tick
+
+    if notes:
+        table.note_tracks.add(track_index)
+    for key, velocity, channel, start_tick, end_tick in notes:
+        if end_tick is not None:
+            table._append(key, velocity, channel, track_index, start_tick, end_tick)
+
+
+def _read_varlen(data, position):
+    """Lê uma quantidade de comprimento variável; devolve (valor, nova posição)."""
+    value = 0
+    while True:
+        byte = data[position]
+        position += 1
+        value = (value << 7) | (byte & 0x7F)
+        if not byte & 0x80:
+            return value, position
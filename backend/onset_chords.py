@@ -0,0 +1,170 @@
+"""
+Acordes por ataque simultâneo, lidos direto da tabela de notas do midi_reader.
+
+Em cada faixa, notas que começam juntas (a menos de ONSET_TOLERANCE de
+semínima da primeira) formam um acorde, que vai do início da primeira ao fim
+da última nota do grupo. Os tempos vêm dos ticks reais das notas, convertidos
+pelo mapa de andamentos do arquivo, sem quantização nem divisão nas barras de
+compasso; notas que terminam em tempos diferentes (várias vozes na mesma
+faixa) continuam formando o acorde. Notas do canal de percussão são ignoradas.
+
+Fundamental e qualidade seguem Chord.root() e Chord.quality do music21,
+calculadas a partir das classes de altura com a grafia padrão dele, para que
+os nomes dos acordes continuem os mesmos de quando a extração usava a
+partitura do music21.
+"""
+from functools import lru_cache
+
+import backend.midi_reader as midi_reader
+
+# Distância máxima, em semínimas, entre o início da primeira nota de um acorde
+# e o das demais (notas de um acorde "arpejado" pelo intérprete)
+ONSET_TOLERANCE = 1 / 8
+
+# Com divisão SMPTE (sem semínimas), a mesma tolerância a 120 BPM
+SMPTE_ONSET_TOLERANCE_SECONDS = 0.0625
+
+# Grafia padrão do music21 para cada classe de altura e seu passo diatônico (C=0 ... B=6)
+PITCH_NAMES = ('C', 'C#', 'D', 'E-', 'E', 'F', 'F#', 'G', 'G#', 'A', 'B-', 'B')
+PITCH_STEPS = (0, 0, 1, 2, 2, 3, 3, 4, 4, 5, 6, 6)
+
+# Ordem dos graus usada pelo music21 para pontuar candidatos a fundamental
+_ROOTNESS_CHORD_STEPS = (3, 5, 7, 2, 4, 6)
+
+
+def onset_chords(note_table):
+    """
+    Agrupa as notas de uma tabela em acordes pelos ataques simultâneos.
+
+    Args:
+        note_table (NoteTable): Tabela lida por midi_reader.read_midi
+
+    Returns:
+        list: Quádruplas (início em ms, fim em ms, fundamental, qualidade),
+              ordenadas pelo início
+    """
+    if note_table.ticks_per_beat:
+        tolerance = note_table.ticks_per_beat * ONSET_TOLERANCE
+    else:
+        tolerance = note_table.ticks_per_second * SMPTE_ONSET_TOLERANCE_SECONDS
+
+    rows_by_track = {}
+    for row, track in enumerate(note_table.track):
+        if note_table.channel[row] != midi_reader.PERCUSSION_CHANNEL:
+            rows_by_track.setdefault(track, []).append(row)
+
+    start_tick = note_table.start_tick
+    chords = []
+    for rows in rows_by_track.values():
+        # As linhas já vêm na ordem em que as notas foram ligadas
+        rows.sort(key=start_tick.__getitem__)
+        first = 0
+        while first < len(rows):
+            onset = start_tick[rows[first]]
+            last = first + 1
+            while last < len(rows) and start_tick[rows[last]] - onset < tolerance:
+                last += 1
+            if last - first > 1:
+                chords.append(_describe_group(note_table, rows[first:last]))
+            first = last
+
+    chords.sort(key=lambda chord: chord[0])
+    return chords
+
+
+def _describe_group(note_table, group):
+    """(início em ms, fim em ms, fundamental, qualidade) de um grupo de notas."""
+    # start_ms/end_ms são os ticks convertidos por tempo_map.ticks_to_ms na leitura
+    start_ms = round(min(note_table.start_ms[row] for row in group))
+    end_ms = round(max(note_table.end_ms[row] for row in group))
+
+    pitch_classes = []
+    for row in group:
+        pitch_class = note_table.pitch[row] % 12
+        if pitch_class not in pitch_classes:
+            pitch_classes.append(pitch_class)
+    bass = None
+    if len({PITCH_STEPS[pitch_class] for pitch_class in pitch_classes}) == 7:
+        bass = min(note_table.pitch[row] for row in group) % 12
+    return (start_ms, end_ms, *root_and_quality(tuple(pitch_classes), bass))
+
+
+@lru_cache(maxsize=None)
+def root_and_quality(pitch_classes, bass=None):
+    """
+    Fundamental e qualidade de um acorde, como Chord.root() e Chord.quality.
+
+    O music21 só depende das classes de altura (na grafia padrão, C# e não D-)
+    e da ordem em que aparecem; com os sete passos diatônicos, a fundamental é
+    o baixo.
+
+    Args:
+        pitch_classes (tuple): Classes de altura distintas, na ordem do acorde
+        bass (int, optional): Classe de altura da nota mais grave
+
+    Returns:
+        tuple: (nome da fundamental, 'major', 'minor', 'augmented',
+                'diminished' ou 'other')
+    """
+    # Primeira classe de altura de cada passo diatônico
+    by_step = {}
+    for pitch_class in pitch_classes:
+        by_step.setdefault(PITCH_STEPS[pitch_class], pitch_class)
+
+    if len(by_step) == 1:
+        root = pitch_classes[0]
+    elif len(by_step) == 7:
+        root = pitch_classes[0] if bass is None else bass
+    else:
+        root = _stacked_thirds_root(by_step)
+        if root is None:
+            root = _rootiest(by_step)
+
+    root_step = PITCH_STEPS[root]
+    semitones = {}  # grau -> semitons de cada classe de altura, na ordem do acorde
+    for pitch_class in pitch_classes:
+        chord_step = (PITCH_STEPS[pitch_class] - root_step) % 7 + 1
+        semitones.setdefault(chord_step, []).append((pitch_class - root) % 12)
+
+    def repeated(chord_step):
+        return len(set(semitones.get(chord_step, ()))) > 1
+
+    third = semitones[3][0] if 3 in semitones else None
+    fifth = semitones[5][0] if 5 in semitones else None
+    if third is None or repeated(1) or repeated(3):
+        quality = 'other'
+    elif fifth is None:
+        quality = {4: 'major', 3: 'minor'}.get(third, 'other')
+    elif repeated(5):
+        quality = 'other'
+    else:
+        quality = {(7, 4): 'major', (7, 3): 'minor', (8, 4): 'augmented',
+                   (6, 3): 'diminished'}.get((fifth, third), 'other')
+    return PITCH_NAMES[root], quality
+
+
+def _stacked_thirds_root(by_step):
+    """Passo a partir do qual todos os outros se empilham em terças, se houver."""
+    steps = sorted(by_step)
+    count = len(steps)
+    for start in range(count):
+        last = steps[start]
+        for index in range(start + 1, start + count):
+            step = steps[index % count]
+            if step - last not in (2, -5):
+                break
+            last = step
+        else:
+            return by_step[steps[start]]
+    return None
+
+
+def _rootiest(by_step):
+    """Classe de altura com mais terças, quintas, sétimas... acima (a primeira no empate)."""
+    best, best_score = None, -1
+    for step, pitch_class in by_step.items():
+        score = sum(1 / (index + 6) for index, chord_step in enumerate(_ROOTNESS_CHORD_STEPS)
+                    if (step + chord_step - 1) % 7 in by_step)
+        if score > best_score:
+            best, best_score = pitch_class, score
+    return best
@@ -0,0 +1,270 @@
+#!/usr/bin/env python3
+"""
+Perfis de execução (cProfile) da extração de acordes, sob demanda.
+
+A extração é perfilada quando o pedido traz o cabeçalho X-Profile com o valor
+de PROFILE_TOKEN, quando PROFILE_EXTRACTION está ligado ou, na ingestão, com
+--profile. Cada perfil é gravado no formato do pstats em
+DATA_DIR/profiles/<hash do MIDI>/, então os arquivos que demoram em produção
+podem ser examinados depois (python -m pstats, snakeviz) e comparados entre
+si. hotspots soma os perfis de uma música, ou de todas, e devolve as funções
+que mais consomem tempo.
+
+O cProfile mede todas as chamadas e deixa a extração bem mais lenta (o
+caminho do music21, cheio de chamadas curtas, chega a dobrar), por isso só
+os pedidos marcados são perfilados.
+
+Uso (a partir da raiz do repositório):
+    python -m backend.profiling
+    python -m backend.profiling --hash <sha256 do MIDI> --limit 30 --sort cumulative
+"""
+import argparse
+from contextlib import contextmanager
+import cProfile
+from functools import lru_cache
+import hmac
+import os
+import pstats
+import re
+import sysconfig
+import time
+
+import backend.config as config
+
+PROFILE_HEADER = 'X-Profile'
+
+# Ordenações do relatório -> posição na tupla do pstats (cc, nc, tt, ct, callers)
+SORT_KEYS = {'tottime': 2, 'cumulative': 3, 'calls': 1}
+
+# Perfis somados no máximo por relatório (os mais recentes)
+REPORT_MAX_PROFILES = 200
+
+_SONG_HASH = re.compile(r'^[0-9a-f]{8,64}$')
+
+
+def requested(headers):
+    """
+    Indica se um pedido HTTP pediu o perfil da extração (X-Profile igual a
+    PROFILE_TOKEN). O pedido refaz a extração mesmo com a análise no cache;
+    com PROFILE_EXTRACTION, só as extrações que de fato rodam são perfiladas.
+
+    Args:
+        headers: Cabeçalhos do pedido
+
+    Returns:
+        bool: True se o perfil foi pedido
+    """
+    return _token_matches(headers)
+
+
+def authorized(headers):
+    """
+    Indica se o pedido pode ler os perfis: X-Profile precisa conferir com
+    PROFILE_TOKEN. Sem PROFILE_TOKEN definido, ninguém lê os perfis pela API
+    (os caminhos de arquivos e as chamadas internas ficariam expostos); use
+    python -m backend.profiling no servidor.
+    """
+    return _token_matches(headers)
+
+
+def _token_matches(headers):
+    token = config.PROFILE_TOKEN
+    value = headers.get(PROFILE_HEADER, '')
+    return bool(token) and hmac.compare_digest(value.encode('utf-8'), token.encode('utf-8'))
+
+
+def is_song_hash(value):
+    """Valida um hash de MIDI usado como nome de pasta."""
+    return bool(value) and _SONG_HASH.match(value) is not None
+
+
+@contextmanager
+def profile(song_hash, label):
+    """
+    Perfila o bloco e grava o resultado em PROFILES_FOLDER/<song_hash>/.
+
+    Sem song_hash o bloco roda sem perfil, então o chamador não precisa de
+    dois caminhos.
+
+    Uso:
+        with profiling.profile(midi_hash if pedido else None, 'generate_chords') as result:
+            ...
+        result['name']  # perfil gravado (relativo a PROFILES_FOLDER) ou None
+
+    Args:
+        song_hash (str | None): Hash do MIDI perfilado
+        label (str): Origem do perfil ('generate_chords', 'ingest')
+    """
+    result = {'name': None}
+    if song_hash is None:
+        yield result
+        return
+
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield result
+    finally:
+        profiler.disable()
+        result['name'] = _save(profiler, song_hash, label)
+
+
+def _save(profiler, song_hash, label):
+    """Grava um perfil e descarta os mais antigos da música além de PROFILE_KEEP."""
+    if not is_song_hash(song_hash):
+        print(f"Erro ao salvar perfil: hash inválido {song_hash!r}")
+        return None
+
+    directory = os.path.join(config.PROFILES_FOLDER, song_hash)
+    # Milissegundos com largura fixa: a ordem dos nomes é a ordem de gravação
+    file_name = f"{int(time.time() * 1000):013d}-{label}-{os.getpid()}.prof"
+    try:
+        os.makedirs(directory, exist_ok=True)
+        tmp_path = os.path.join(directory, f"{file_name}.tmp")
+        profiler.dump_stats(tmp_path)
+        os.replace(tmp_path, os.path.join(directory, file_name))
+
+        old_profiles = sorted(name for name in os.listdir(directory) if name.endswith('.prof'))
+        for name in old_profiles[:-config.PROFILE_KEEP]:
+            os.remove(os.path.join(directory, name))
+    except Exception as e:
+        print(f"Erro ao salvar perfil de {song_hash}: {e}")
+        return None
+    return f"{song_hash}/{file_name}"
+
+
+def list_profiles(song_hash=None):
+    """
+    Perfis gravados, do mais antigo para o mais recente.
+
+    Args:
+        song_hash (str, optional): Só os perfis deste MIDI
+
+    Returns:
+        list: Nomes relativos a PROFILES_FOLDER ('<hash>/<arquivo>.prof')
+    """
+    if song_hash is not None:
+        song_hashes = [song_hash] if is_song_hash(song_hash) else []
+    else:
+        try:
+            song_hashes = [name for name in os.listdir(config.PROFILES_FOLDER) if is_song_hash(name)]
+        except OSError:
+            return []
+
+    names = []
+    for current_hash in song_hashes:
+        try:
+            files = os.listdir(os.path.join(config.PROFILES_FOLDER, current_hash))
+        except OSError:
+            continue
+        names.extend((file_name, f"{current_hash}/{file_name}") for file_name in files if file_name.endswith('.prof'))
+    return [name for _, name in sorted(names)]
+
+
+def hotspots(song_hash=None, limit=20, sort='tottime', names=None):
+    """
+    Soma perfis gravados e devolve as funções que mais consomem tempo.
+
+    Args:
+        song_hash (str, optional): Só os perfis deste MIDI
+        limit (int): Quantidade de funções no relatório
+        sort (str): 'tottime' (tempo na própria função), 'cumulative'
+                    (incluindo as chamadas) ou 'calls'
+        names (list, optional): Perfis específicos (ex.: os de uma ingestão)
+
+    Returns:
+        dict: 'profiles', 'total_time', 'sort' e 'hotspots' (função, chamadas,
+              tempos e fração do total), ou None se não houver perfis
+    """
+    if sort not in SORT_KEYS:
+        raise ValueError(f"Ordenação inválida: {sort}")
+    if names is None:
+        names = list_profiles(song_hash)
+    names = names[-REPORT_MAX_PROFILES:]
+
+    stats = None
+    loaded = []
+    for name in names:
+        path = os.path.join(config.PROFILES_FOLDER, name)
+        try:
+            if stats is None:
+                stats = pstats.Stats(path)
+            else:
+                stats.add(path)
+            loaded.append(name)
+        except Exception as e:
+            print(f"Erro ao ler perfil {name}: {e}")
+    if stats is None:
+        return None
+
+    index = SORT_KEYS[sort]
+    rows = sorted(stats.stats.items(), key=lambda item: item[1][index], reverse=True)[:max(1, limit)]
+    total = stats.total_tt
+    return {
+        'profiles': len(loaded),
+        'files': loaded,
+        'total_time': total,
+        'sort': sort,
+        'hotspots': [
+            {
+                'function': _function_label(function),
+                'calls': calls,
+                'primitive_calls': primitive_calls,
+                'tottime': tottime,
+                'cumtime': cumtime,
+                'tottime_share': tottime / total if total else 0.0
+            }
+            for function, (primitive_calls, calls, tottime, cumtime, _) in rows
+        ]
+    }
+
+
+@lru_cache(maxsize=None)
+def _path_prefixes():
+    """
+    Prefixos removidos dos caminhos das funções no relatório (o mais longo
+    primeiro). Calculados no primeiro relatório: sysconfig.get_paths custa
+    mais que o resto da importação do módulo.
+    """
+    return sorted(
+        {os.path.dirname(config.BASE_DIR)} |
+        {sysconfig.get_paths()[name] for name in ('purelib', 'platlib', 'stdlib', 'platstdlib')},
+        key=len, reverse=True)
+
+
+def _function_label(function):
+    """'arquivo:linha(função)' com o caminho encurtado (repositório, site-packages, biblioteca padrão)."""
+    file_name, line, name = function
+    if file_name == '~':
+        # Funções embutidas ("<built-in method ...>")
+        return name
+    for prefix in _path_prefixes():
+        if file_name.startswith(prefix + os.sep):
+            file_name = file_name[len(prefix) + 1:]
+            break
+    return f"{file_name}:{line}({name})"
+
+
+def format_report(report):
+    """Relatório de hotspots em texto, para o terminal."""
+    lines = [f"{report['profiles']} perfis, {report['total_time']:.3f} s no total "
+             f"(ordenado por {report['sort']})",
+             f"{'tottime':>9} {'%':>6} {'cumtime':>9} {'chamadas':>10}  função"]
+    for hotspot in report['hotspots']:
+        lines.append(f"{hotspot['tottime']:>9.3f} {hotspot['tottime_share'] * 100:>5.1f}% "
+                     f"{hotspot['cumtime']:>9.3f} {hotspot['calls']:>10}  {hotspot['function']}")
+    return '\n'.join(lines)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--hash', help='Só os perfis deste MIDI (SHA-256)')
+    parser.add_argument('--limit', type=int, default=20, help='Funções no relatório')
+    parser.add_argument('--sort', choices=tuple(SORT_KEYS), default='tottime', help='Ordenação')
+    args = parser.parse_args()
+
+    report = hotspots(args.hash, args.limit, args.sort)
+    if report is None:
+        print(f"Nenhum perfil encontrado em {config.PROFILES_FOLDER}")
+    else:
+        print(format_report(report))
@@ -0,0 +1,198 @@
+"""
+Índice de busca em memória, usado quando o PostgreSQL não está disponível.
+
+Reproduz em pequena escala a busca do banco (database.search_songs): índice
+invertido de palavras do título, do artista e de cada linha da letra, mais um
+índice de trigramas do título e do artista para nomes digitados com erro. O
+texto é normalizado (minúsculas, sem acentos) antes de ser indexado.
+"""
+from collections import Counter, defaultdict
+import re
+import threading
+import unicodedata
+
+# Palavras de uma linha já normalizada
+WORD_PATTERN = re.compile(r'\w+')
+
+# Semelhança mínima de trigramas para aceitar um título/artista
+# (padrão de pg_trgm.word_similarity_threshold)
+TRIGRAM_THRESHOLD = 0.6
+
+
+def normalize(text):
+    """Minúsculas e sem acentos, para que 'Você' e 'voce' sejam a mesma palavra."""
+    if text.isascii():
+        return text.lower()
+    decomposed = unicodedata.normalize('NFKD', text.lower())
+    return ''.join(c for c in decomposed if not unicodedata.combining(c))
+
+
+def tokenize(text):
+    """Palavras normalizadas de um texto."""
+    return WORD_PATTERN.findall(normalize(text))
+
+
+def trigrams(word):
+    """Trigramas de uma palavra, com as bordas marcadas como no pg_trgm."""
+    padded = f"  {word} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class SearchIndex:
+    """
+    Índice de músicas por título, artista e linhas da letra.
+
+    As músicas são identificadas pelo mesmo ID aceito por /api/get_song_data.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._songs = {}                      # id -> (título, artista)
+        self._lines = {}                      # id -> linhas da letra
+        self._name_words = defaultdict(set)   # palavra -> ids (título/artista)
+        self._trigrams = defaultdict(set)     # trigrama -> palavras do título/artista
+        self._lyric_words = defaultdict(set)  # palavra -> (id, número da linha)
+
+    def __len__(self):
+        return len(self._songs)
+
+    def __contains__(self, song_id):
+        return song_id in self._songs
+
+    def add_song(self, song_id, title, artist, lyric_lines=()):
+        """
+        Indexa (ou reindexa) uma música.
+
+        Args:
+            song_id: Identificador da música
+            title (str): Título
+            artist (str): Artista
+            lyric_lines (iterable): Textos das linhas da letra, sem timestamps
+        """
+        with self._lock:
+            self._remove(song_id)
+
+            self._songs[song_id] = (title, artist)
+            for word in tokenize(f"{title} {artist}"):
+                self._name_words[word].add(song_id)
+                for trigram in trigrams(word):
+                    self._trigrams[trigram].add(word)
+
+            lines = [line for line in lyric_lines if line.strip()]
+            self._lines[song_id] = lines
+            for number, line in enumerate(lines):
+                for word in tokenize(line):
+                    self._lyric_words[word].add((song_id, number))
+
+    def remove_song(self, song_id):
+        """Remove uma música do índice."""
+        with self._lock:
+            self._remove(song_id)
+
+    def search(self, query, limit=20):
+        """
+        Busca músicas, da mais relevante para a menos.
+
+        Pontuação (mesma escala de database.search_songs): todas as palavras no
+        título/artista valem 1 ou mais; uma linha da letra com todas as palavras
+        vale 0,5 ou mais; sem isso, vale a semelhança de trigramas do nome.
+
+        Args:
+            query (str): Texto digitado
+            limit (int): Número máximo de resultados
+
+        Returns:
+            list: Dicionários com 'id', 'title', 'artist', 'score' e 'snippet'
+        """
+        words = tokenize(query)
+        if not words:
+            return []
+
+        with self._lock:
+            best = {}
+
+            def offer(song_id, score, snippet=None):
+                if song_id not in best or score > best[song_id][0]:
+                    best[song_id] = (score, snippet)
+
+            # Todas as palavras no título/artista
+            for song_id in self._intersect(self._name_words, words):
+                title, artist = self._songs[song_id]
+                name_words = tokenize(f"{title} {artist}")
+                offer(song_id, 1.0 + sum(name_words.count(w) for w in words) / len(name_words))
+
+            # Todas as palavras na mesma linha da letra
+            for song_id, number in self._intersect(self._lyric_words, words):
+                line = self._lines[song_id][number]
+                offer(song_id, 0.5 + len(words) / len(tokenize(line)) * 0.5, line)
+
+            # Nomes parecidos: cada palavra da busca casa com a palavra mais parecida
+            similarity = self._name_similarity(words)
+            for song_id, score in similarity.items():
+                if score >= TRIGRAM_THRESHOLD:
+                    offer(song_id, score)
+
+            ranked = sorted(best.items(), key=lambda item: (-item[1][0], str(item[0])))
+            return [
+                {
+                    'id': song_id,
+                    'title': self._songs[song_id][0],
+                    'artist': self._songs[song_id][1],
+                    'score': round(score, 4),
+                    'snippet': snippet
+                }
+                for song_id, (score, snippet) in ranked[:limit]
+            ]
+
+    def _intersect(self, postings, words):
+        sets = sorted((postings.get(word, set()) for word in set(words)), key=len)
+        if not sets[0]:
+            return set()
+        result = set(sets[0])
+        for other in sets[1:]:
+            result &= other
+        return result
+
+    def _name_similarity(self, words):
+        """
+        Média, por música, da melhor semelhança de cada palavra da busca. A
+        semelhança é a fração dos trigramas da palavra buscada presentes na
+        palavra indexada, como o word_similarity do pg_trgm.
+        """
+        totals = defaultdict(float)
+        for word in words:
+            word_trigrams = trigrams(word)
+
+            # Trigramas compartilhados com cada palavra indexada
+            shared = Counter()
+            for trigram in word_trigrams:
+                shared.update(self._trigrams.get(trigram, ()))
+
+            best_per_song = {}
+            for candidate, count in shared.items():
+                score = count / len(word_trigrams)
+                for song_id in self._name_words[candidate]:
+                    if score > best_per_song.get(song_id, 0.0):
+                        best_per_song[song_id] = score
+
+            for song_id, score in best_per_song.items():
+                totals[song_id] += score / len(words)
+        return totals
+
+    def _remove(self, song_id):
+        if song_id not in self._songs:
+            return
+
+        title, artist = self._songs.pop(song_id)
+        for word in tokenize(f"{title} {artist}"):
+            self._name_words[word].discard(song_id)
+            if not self._name_words[word]:
+                del self._name_words[word]
+                for trigram in trigrams(word):
+                    self._trigrams[trigram].discard(word)
+
+        for number, line in enumerate(self._lines.pop(song_id, [])):
+            for word in tokenize(line):
+                self._lyric_words[word].discard((song_id, number))
+                if not self._lyric_words[word]:
+                    del self._lyric_words[word]
@@ -0,0 +1,301 @@
+"""
+Formato binário compacto do documento de uma música (application/x-kplay-song).
+
+Alternativa ao JSON de /api/get_song_data para redes móveis, escolhida pelo
+cabeçalho Accept. Carrega os campos que o player usa:
+    nomes de acordes e de notas guardados uma única vez (tabela de textos) e
+    referenciados por índice;
+    tempos como diferenças para o anterior, em varints (LEB128, com zigzag
+    para valores que podem ser negativos);
+    textos da letra em um único bloco UTF-8, com o tamanho de cada trecho em
+    unidades UTF-16 (as do String do JavaScript, então o navegador decodifica o
+    bloco uma vez e recorta os trechos com slice); nas linhas com marcas de palavra, o texto da linha é a junção das
+    palavras e não é repetido;
+    o alinhamento letra/acordes sem 'start'/'end', que são os tempos das linhas.
+
+O decodificador para o navegador está em frontend/js/song-codec.js; os dois
+precisam mudar juntos (FORMAT_VERSION).
+
+Estrutura:
+    'KPS' + versão
+    id (tipo + valor), título, artista
+    tabela de textos: quantidade, textos
+    acordes: quantidade; por acorde: início (diferença), duração + 1 (0 = sem fim),
+             índice do nome, quantidade de notas e seus índices
+    letra: quantidade de linhas, bloco de textos; por linha: tempo (diferença),
+           marcadores, tamanho do texto ou palavras (tempo, fim + 1, tamanho)
+    alinhamento: marcador de presença, versão, acordes da introdução e, por
+                 linha, acordes (índice, posição, palavra + 1)
+"""
+
+MEDIA_TYPE = 'application/x-kplay-song'
+
+MAGIC = b'KPS'
+FORMAT_VERSION = 1
+
+# Tipo do ID da música
+_ID_INT = 0
+_ID_STR = 1
+
+# Marcadores de uma linha da letra
+_LINE_HAS_WORDS = 1
+
+
+def encode_song(document):
+    """
+    Codifica o documento de uma música.
+
+    Args:
+        document (dict): Documento como devolvido por /api/get_song_data
+
+    Returns:
+        bytes: Documento no formato compacto
+    """
+    out = bytearray(MAGIC)
+    out.append(FORMAT_VERSION)
+
+    song_id = document.get('song_id')
+    if isinstance(song_id, int):
+        out.append(_ID_INT)
+        _write_varint(out, _zigzag(song_id))
+    else:
+        out.append(_ID_STR)
+        _write_text(out, '' if song_id is None else str(song_id))
+    _write_text(out, document.get('title') or '')
+    _write_text(out, document.get('artist') or '')
+
+    chords = document.get('chords') or []
+    lyrics = document.get('lyrics') or []
+
+    # Tabela de textos: nomes dos acordes e notas, na ordem em que aparecem
+    strings = {}
+    for entry in chords:
+        for name in (entry['chord'], *entry.get('components', ())):
+            strings.setdefault(name, len(strings))
+    _write_varint(out, len(strings))
+    for name in strings:
+        _write_text(out, name)
+
+    _write_chords(out, chords, strings)
+    _write_lyrics(out, lyrics)
+    _write_alignment(out, document.get('alignment'), len(lyrics))
+    return bytes(out)
+
+
+def decode_song(data):
+    """
+    Decodifica um documento codificado por encode_song.
+
+    Args:
+        data (bytes): Documento no formato compacto
+
+    Returns:
+        dict: Documento com 'song_id', 'title', 'artist', 'lyrics', 'chords'
+              e, se houver, 'alignment'
+
+    Raises:
+        ValueError: Se os dados não estiverem no formato ou versão esperados
+    """
+    reader = _Reader(data)
+    if reader.read_bytes(len(MAGIC)) != MAGIC:
+        raise ValueError("Dados não estão no formato kplay-song")
+    version = reader.read_byte()
+    if version != FORMAT_VERSION:
+        raise ValueError(f"Versão do formato não suportada: {version}")
+
+    id_type = reader.read_byte()
+    song_id = _unzigzag(reader.read_varint()) if id_type == _ID_INT else reader.read_text()
+    document = {'song_id': song_id, 'title': reader.read_text(), 'artist': reader.read_text()}
+
+    strings = [reader.read_text() for _ in range(reader.read_varint())]
+
+    chords = []
+    time = 0
+    for _ in range(reader.read_varint()):
+        time += _unzigzag(reader.read_varint())
+        duration = reader.read_varint()
+        name = strings[reader.read_varint()]
+        components = [strings[reader.read_varint()] for _ in range(reader.read_varint())]
+        chords.append({
+            'time': time,
+            'start': time,
+            'end': time + _unzigzag(duration - 1) if duration else None,
+            'chord': name,
+            'components': components
+        })
+
+    line_count = reader.read_varint()
+    # Os tamanhos dos trechos estão em unidades UTF-16 (2 bytes em UTF-16-LE)
+    blob = reader.read_bytes(reader.read_varint()).decode('utf-8').encode('utf-16-le')
+    lyrics = []
+    time = 0
+    position = 0
+    for _ in range(line_count):
+        time += _unzigzag(reader.read_varint())
+        flags = reader.read_varint()
+        if flags & _LINE_HAS_WORDS:
+            words = []
+            for _ in range(reader.read_varint()):
+                word_time = time + _unzigzag(reader.read_varint())
+                end = reader.read_varint()
+                size = reader.read_varint()
+                words.append({
+                    'time': word_time,
+                    'end': word_time + _unzigzag(end - 1) if end else None,
+                    'text': blob[position * 2:(position + size) * 2].decode('utf-16-le')
+                })
+                position += size
+            text = ''.join(word['text'] for word in words).strip()
+            lyrics.append({'time': time, 'text': text, 'words': words})
+        else:
+            size = reader.read_varint()
+            lyrics.append({'time': time, 'text': blob[position * 2:(position + size) * 2].decode('utf-16-le')})
+            position += size
+
+    document['lyrics'] = lyrics
+    document['chords'] = chords
+
+    if reader.read_byte():
+        alignment_version = reader.read_varint()
+        intro = [reader.read_varint() for _ in range(reader.read_varint())]
+        lines = []
+        for number in range(line_count):
+            placed = []
+            for _ in range(reader.read_varint()):
+                index = reader.read_varint()
+                offset = reader.read_varint()
+                word = reader.read_varint()
+                placed.append({'index': index, 'offset': offset, 'word': word - 1 if word else None})
+            lines.append({
+                'start': lyrics[number]['time'],
+                'end': lyrics[number + 1]['time'] if number + 1 < line_count else None,
+                'chords': placed
+            })
+        document['alignment'] = {'version': alignment_version, 'intro': intro, 'lines': lines}
+
+    return document
+
+
+def _write_chords(out, chords, strings):
+    _write_varint(out, len(chords))
+    previous = 0
+    for entry in chords:
+        start = int(entry.get('start', entry['time']))
+        end = entry.get('end')
+        _write_varint(out, _zigzag(start - previous))
+        _write_varint(out, 0 if end is None else _zigzag(int(end) - start) + 1)
+        _write_varint(out, strings[entry['chord']])
+        components = entry.get('components', ())
+        _write_varint(out, len(components))
+        for name in components:
+            _write_varint(out, strings[name])
+        previous = start
+
+
+def _write_lyrics(out, lyrics):
+    blob = []
+    lines = bytearray()
+    previous = 0
+    for line in lyrics:
+        time = int(line['time'])
+        _write_varint(lines, _zigzag(time - previous))
+        previous = time
+
+        words = line.get('words')
+        if words and ''.join(word['text'] for word in words).strip() == line['text']:
+            _write_varint(lines, _LINE_HAS_WORDS)
+            _write_varint(lines, len(words))
+            for word in words:
+                _write_varint(lines, _zigzag(int(word['time']) - time))
+                end = word.get('end')
+                _write_varint(lines, 0 if end is None else _zigzag(int(end) - int(word['time'])) + 1)
+                _write_varint(lines, _utf16_length(word['text']))
+                blob.append(word['text'])
+        else:
+            _write_varint(lines, 0)
+            _write_varint(lines, _utf16_length(line['text']))
+            blob.append(line['text'])
+
+    _write_varint(out, len(lyrics))
+    _write_text(out, ''.join(blob))
+    out += lines
+
+
+def _write_alignment(out, alignment, line_count):
+    # Só é gravado se corresponder às linhas da letra
+    if not alignment or len(alignment.get('lines', ())) != line_count:
+        out.append(0)
+        return
+
+    out.append(1)
+    _write_varint(out, alignment['version'])
+    _write_varint(out, len(alignment['intro']))
+    for index in alignment['intro']:
+        _write_varint(out, index)
+    for line in alignment['lines']:
+        _write_varint(out, len(line['chords']))
+        for placed in line['chords']:
+            _write_varint(out, placed['index'])
+            _write_varint(out, placed['offset'])
+            _write_varint(out, 0 if placed['word'] is None else placed['word'] + 1)
+
+
+def _utf16_length(text):
+    # Caracteres fora do plano básico (emoji) ocupam duas unidades
+    return len(text) if text.isascii() else len(text.encode('utf-16-le')) // 2
+
+
+def _zigzag(value):
+    return value * 2 if value >= 0 else -value * 2 - 1
+
+
+def _unzigzag(value):
+    return value >> 1 if not value & 1 else -((value + 1) >> 1)
+
+
+def _write_varint(out, value):
+    while value > 0x7F:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def _write_text(out, text):
+    encoded = text.encode('utf-8')
+    _write_varint(out, len(encoded))
+    out += encoded
+
+
+class _Reader:
+    """Leitura sequencial dos dados codificados."""
+
+    def __init__(self, data):
+        self.data = memoryview(data)
+        self.position = 0
+
+    def read_byte(self):
+        if self.position >= len(self.data):
+            raise ValueError("Dados kplay-song truncados")
+        value = self.data[self.position]
+        self.position += 1
+        return value
+
+    def read_bytes(self, size):
+        if self.position + size > len(self.data):
+            raise ValueError("Dados kplay-song truncados")
+        value = bytes(self.data[self.position:self.position + size])
+        self.position += size
+        return value
+
+    def read_varint(self):
+        value = 0
+        shift = 0
+        while True:
+            byte = self.read_byte()
+            value |= (byte & 0x7F) << shift
+            if not byte & 0x80:
+                return value
+            shift += 7
+
+    def read_text(self):
+        return self.read_bytes(self.read_varint()).decode('utf-8')
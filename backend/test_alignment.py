@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Testes do alinhamento entre letra e acordes (backend/alignment.py).
+
+Uso (a partir da raiz do repositório):
+    python -m pytest backend/test_alignment.py
+"""
+from backend.alignment import ALIGNMENT_VERSION, align_song, is_current
+
+LYRICS = [
+    {'time': 1000, 'text': 'Quando você vem'},
+    {'time': 3000, 'text': 'Olá mundo', 'words': [
+        {'time': 3000, 'end': 3500, 'text': ' Olá '},
+        {'time': 3500, 'end': None, 'text': 'mundo'}
+    ]},
+    {'time': 5000, 'text': 'fim'}
+]
+
+# Fora de ordem de propósito: os índices continuam sendo os desta lista
+CHORDS = [
+    {'time': 0, 'end': 1000, 'chord': 'G'},
+    {'time': 1000, 'end': 1500, 'chord': 'C'},
+    {'time': 2000, 'end': 3000, 'chord': 'Am'},
+    {'time': 1500, 'end': 2000, 'chord': 'F'},
+    {'time': 3600, 'end': 5000, 'chord': 'D'},
+    {'time': 3000, 'end': 3600, 'chord': 'Em'},
+    {'time': 5500, 'end': 7000, 'chord': 'C'}
+]
+
+
+def test_chords_are_placed_on_lines_words_and_text():
+    result = align_song(LYRICS, CHORDS)
+
+    assert result['version'] == ALIGNMENT_VERSION
+    assert result['intro'] == [0]
+    assert result['lines'] == [
+        # Sem marcas de palavra: posição proporcional ao tempo, recuada até o
+        # início da palavra (2000 ms é metade da linha: caractere 7, 'você')
+        {'start': 1000, 'end': 3000, 'chords': [
+            {'index': 1, 'offset': 0, 'word': None},
+            {'index': 3, 'offset': 0, 'word': None},
+            {'index': 2, 'offset': 7, 'word': None}
+        ]},
+        # Com marcas: a palavra cantada quando o acorde começa; posições no
+        # texto da linha, que não tem os espaços das pontas
+        {'start': 3000, 'end': 5000, 'chords': [
+            {'index': 5, 'offset': 0, 'word': 0},
+            {'index': 4, 'offset': 4, 'word': 1}
+        ]},
+        # Última linha: vai até o fim do último acorde
+        {'start': 5000, 'end': None, 'chords': [
+            {'index': 6, 'offset': 0, 'word': None}
+        ]}
+    ]
+
+
+def test_without_lyrics_every_chord_is_intro():
+    assert align_song([], CHORDS) == {'version': ALIGNMENT_VERSION, 'intro': [0, 1, 3, 2, 5, 4, 6], 'lines': []}
+
+
+def test_lines_at_the_same_time_and_lines_without_chords():
+    lyrics = [{'time': 1000, 'text': 'a'}, {'time': 1000, 'text': 'b c'}, {'time': 9000, 'text': 'd'}]
+    chords = [{'time': 1000, 'chord': 'C'}, {'time': 1200, 'chord': 'G'}]
+
+    lines = align_song(lyrics, chords)['lines']
+    assert lines[0]['chords'] == []
+    assert lines[1]['chords'] == [
+        {'index': 0, 'offset': 0, 'word': None},
+        {'index': 1, 'offset': 0, 'word': None}
+    ]
+    assert lines[2] == {'start': 9000, 'end': None, 'chords': []}
+
+
+def test_is_current():
+    assert is_current(align_song(LYRICS, CHORDS))
+    assert not is_current({'version': ALIGNMENT_VERSION - 1, 'intro': [], 'lines': []})
+    assert not is_current(None)
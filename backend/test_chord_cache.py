@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Testes do cache de análises de acordes (backend/chord_cache.py).
+
+Uso (a partir da raiz do repositório):
+    python -m pytest backend/test_chord_cache.py
+"""
+from concurrent.futures import ThreadPoolExecutor
+import hashlib
+import os
+
+import backend.chord_cache as chord_cache
+from backend.chord_cache import ChordCache, cache_key, hash_midi, remember_hash
+
+CHORDS = [{'time': 0, 'start': 0, 'end': 500, 'chord': 'C', 'components': ['C', 'E', 'G']}]
+
+
+def test_hash_midi_of_bytes_and_path(tmp_path):
+    data = b'MThd fake midi'
+    path = tmp_path / 'a.mid'
+    path.write_bytes(data)
+
+    assert hash_midi(data) == hashlib.sha256(data).hexdigest()
+    assert hash_midi(str(path)) == hash_midi(data)
+
+    # Um arquivo alterado é lido de novo
+    path.write_bytes(data + b' changed')
+    assert hash_midi(str(path)) == hashlib.sha256(data + b' changed').hexdigest()
+
+
+def test_remembered_hash_is_used_without_reading(tmp_path):
+    path = tmp_path / 'b.mid'
+    path.write_bytes(b'content')
+    remember_hash(str(path), 'f' * 64)
+    assert hash_midi(str(path)) == 'f' * 64
+
+
+def test_hash_memo_is_safe_across_threads(tmp_path, monkeypatch):
+    # Memória pequena para que as threads disputem as remoções do LRU
+    monkeypatch.setattr(chord_cache, '_PATH_HASHES_LIMIT', 4)
+    paths = []
+    for i in range(16):
+        path = tmp_path / f"{i}.mid"
+        path.write_bytes(str(i).encode())
+        paths.append(str(path))
+
+    def hash_all(worker):
+        for _ in range(50):
+            for i, path in enumerate(paths):
+                if (i + worker) % 3:
+                    assert hash_midi(path) == hashlib.sha256(str(i).encode()).hexdigest()
+                else:
+                    remember_hash(path, hashlib.sha256(str(i).encode()).hexdigest())
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        list(executor.map(hash_all, range(8)))
+    assert len(chord_cache._path_hashes) <= 4
+
+
+def test_cache_key_depends_on_hash_and_settings():
+    settings = {'version': 1, 'engine': 'sweep'}
+    key = cache_key('a' * 64, settings)
+
+    assert key == cache_key('a' * 64, dict(reversed(list(settings.items()))))
+    assert key != cache_key('b' * 64, settings)
+    assert key != cache_key('a' * 64, dict(settings, version=2))
+
+
+def test_get_and_put_in_memory_and_on_disk(tmp_path):
+    cache = ChordCache(str(tmp_path / 'cache'))
+    key = cache_key('a' * 64, {})
+
+    assert cache.get(key) is None
+    assert cache.get('') is None
+    cache.put(key, CHORDS)
+    assert cache.get(key) == CHORDS
+    assert os.path.exists(os.path.join(cache.directory, key[:2], f"{key}.json"))
+
+    # Outro processo (ou a memória esvaziada) encontra a análise em disco
+    other = ChordCache(cache.directory)
+    assert other.get(key) == CHORDS
+    cache.clear_memory()
+    assert cache.get(key) == CHORDS
+    assert (cache.hits, cache.misses) == (2, 1)
+
+
+def test_memory_layer_is_bounded_lru(tmp_path):
+    cache = ChordCache(str(tmp_path / 'cache'), max_entries=2)
+    keys = [cache_key(str(i) * 64, {}) for i in range(3)]
+    cache.put(keys[0], CHORDS)
+    cache.put(keys[1], CHORDS)
+    cache.get(keys[0])
+    cache.put(keys[2], CHORDS)
+
+    assert list(cache._memory) == [keys[0], keys[2]]
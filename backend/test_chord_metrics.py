@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Testes das métricas de avaliação de acordes (backend/chord_metrics.py), com
+respostas calculadas à mão.
+
+Uso (a partir da raiz do repositório):
+    python -m pytest backend/test_chord_metrics.py
+"""
+import pytest
+
+from backend.chord_metrics import EXCLUDED, NO_CHORD, chord_labels, evaluate
+
+
+def _chords(*spans):
+    """Acordes a partir de triplas (nome, início, fim)."""
+    return [{'name': name, 'start': start, 'end': end} for name, start, end in spans]
+
+
+def test_chord_labels_accept_every_spelling():
+    assert chord_labels('C#:min7') == chord_labels('Dbm7') == chord_labels('D-min7')
+    assert chord_labels('C/E') == chord_labels('C') == chord_labels('C:maj')
+    assert chord_labels('N') == chord_labels('') == (NO_CHORD, NO_CHORD, NO_CHORD)
+
+    # G7 é maior no nível majmin; sus4 fica fora dos dois níveis
+    assert chord_labels('G7')[1] == chord_labels('G')[1]
+    assert chord_labels('G7')[2] != chord_labels('G')[2]
+    assert chord_labels('Csus4')[1:] == (EXCLUDED, EXCLUDED)
+    assert chord_labels('Cdim')[0] == chord_labels('C')[0]
+
+
+def test_wcsr_per_level():
+    reference = _chords(('C', 0, 4), ('Am', 4, 8), ('G7', 8, 10), ('Csus4', 10, 12))
+    estimated = _chords(('C', 0, 2), ('C7', 2, 6), ('Am', 6, 8), ('G', 8, 12))
+
+    metrics = evaluate(reference, estimated)
+
+    # Trechos de 2: C/C, C/C7, Am/C7, Am/Am, G7/G, Csus4/G
+    assert metrics['wcsr_root'] == pytest.approx(8 / 12)
+    # Csus4 fica fora da conta: 8 de 10
+    assert metrics['wcsr_majmin'] == pytest.approx(8 / 10)
+    # C/C7 e G7/G erram a sétima
+    assert metrics['wcsr_sevenths'] == pytest.approx(4 / 10)
+    assert metrics['duration'] == 12
+
+
+def test_segmentation_directions():
+    reference = _chords(('C', 0, 6), ('G', 6, 12))
+    # A estimativa divide o primeiro segmento da referência em dois
+    estimated = _chords(('C', 0, 3), ('Am', 3, 6), ('G', 6, 12))
+
+    metrics = evaluate(reference, estimated)
+    assert metrics['oversegmentation'] == pytest.approx(9 / 12)
+    assert metrics['undersegmentation'] == pytest.approx(1.0)
+    assert metrics['segmentation'] == pytest.approx(9 / 12)
+
+    # Com as listas trocadas, é a estimativa que junta os segmentos
+    swapped = evaluate(estimated, reference)
+    assert swapped['oversegmentation'] == pytest.approx(1.0)
+    assert swapped['undersegmentation'] == pytest.approx(9 / 12)
+
+
+def test_gaps_overlaps_and_estimate_outside_the_reference():
+    reference = _chords(('C', 0, 4), ('C', 6, 8))
+    # Buraco de 4 a 6 na referência; a estimativa cobre tudo e passa do fim
+    assert evaluate(reference, _chords(('C', 0, 20)))['wcsr_root'] == pytest.approx(6 / 8)
+    # Sem acorde dos dois lados conta como acerto
+    assert evaluate(reference, _chords(('C', 0, 4), ('C', 6, 8)))['wcsr_root'] == pytest.approx(1.0)
+
+    # Sem 'end', o acorde dura até o início do seguinte; sobreposição é cortada
+    estimated = [{'name': 'C', 'start': 0}, {'name': 'G', 'start': 2}, {'name': 'G', 'start': 4, 'end': 5}]
+    overlapping = _chords(('C', 0, 7), ('G', 2, 4))
+    assert evaluate(_chords(('C', 0, 4)), estimated)['wcsr_root'] == pytest.approx(0.5)
+    assert evaluate(_chords(('C', 0, 4)), overlapping)['wcsr_root'] == pytest.approx(0.5)
+
+
+def test_reference_without_duration():
+    assert evaluate([], _chords(('C', 0, 4))) is None
+    assert evaluate(_chords(('C', 4, 4)), _chords(('C', 0, 4))) is None
+    assert evaluate(_chords(('N', 0, 4)), [])['wcsr_root'] == pytest.approx(1.0)
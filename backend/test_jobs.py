@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+Testes da fila de tarefas (backend/jobs.py): deduplicação, retomada depois de
+um reinício e pool de processos quebrado.
+
+Uso (a partir da raiz do repositório):
+    python -m pytest backend/test_jobs.py
+"""
+from concurrent.futures import ThreadPoolExecutor
+import fcntl
+import json
+import os
+import time
+
+import pytest
+
+from backend.jobs import DONE, FAILED, QUEUED, RUNNING, JobQueue
+
+
+def wait_for_file(reporter, path):
+    """Tarefa que só termina quando o arquivo existir."""
+    reporter.update('waiting', 0.5)
+    while not os.path.exists(path):
+        time.sleep(0.01)
+    return {'waited': path}
+
+
+def add(reporter, a, b):
+    return {'sum': a + b}
+
+
+def crash(reporter):
+    os._exit(1)
+
+
+def _wait(queue, job_id, timeout=30):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        job = queue.get(job_id)
+        if job and job['status'] in (DONE, FAILED):
+            return job
+        time.sleep(0.02)
+    raise AssertionError(f"Tarefa {job_id} não terminou")
+
+
+@pytest.fixture
+def queue(tmp_path):
+    queue = JobQueue(str(tmp_path / 'jobs'), max_workers=1)
+    os.makedirs(queue.store_dir)
+    for name, task in (('wait', wait_for_file), ('add', add), ('crash', crash)):
+        queue.register(name, task)
+    yield queue
+    queue.shutdown()
+
+
+def test_active_job_is_deduplicated_by_key(queue, tmp_path):
+    release = str(tmp_path / 'release')
+    first = queue.submit('wait', 'song.mid', release)
+    second = queue.submit('wait', 'song.mid', release)
+    other = queue.submit('add', 'other.mid', 1, 2)
+
+    assert second['id'] == first['id']
+    assert other['id'] != first['id']
+
+    open(release, 'w').close()
+    assert _wait(queue, first['id'])['result'] == {'waited': release}
+    assert _wait(queue, other['id'])['result'] == {'sum': 3}
+
+    # Concluída a tarefa, a mesma chave cria uma tarefa nova
+    third = queue.submit('add', 'song.mid', 2, 2)
+    assert third['id'] != first['id']
+    assert _wait(queue, third['id'])['result'] == {'sum': 4}
+    # A trava da tarefa concluída foi solta
+    with open(os.path.join(queue.store_dir, f"{first['id']}.lock")) as f:
+        fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+
+
+def test_same_key_from_two_server_processes_is_enqueued_once(tmp_path, monkeypatch):
+    # Duas filas na mesma pasta fazem o papel de dois workers do gunicorn; a
+    # pausa depois de ler a chave alarga a janela entre a consulta e a gravação
+    read_key = JobQueue._read_key
+
+    def slow_read_key(self, key):
+        job_id = read_key(self, key)
+        time.sleep(0.05)
+        return job_id
+
+    monkeypatch.setattr(JobQueue, '_read_key', slow_read_key)
+    store_dir = str(tmp_path / 'jobs')
+    os.makedirs(store_dir)
+    release = str(tmp_path / 'release')
+    queues = [JobQueue(store_dir, max_workers=1) for _ in range(2)]
+    for queue in queues:
+        queue.register('wait', wait_for_file)
+    try:
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            jobs = list(executor.map(lambda k: queues[k % 2].submit('wait', 'song.mid', release), range(8)))
+        assert len({job['id'] for job in jobs}) == 1
+        assert len([name for name in os.listdir(store_dir) if name.endswith('.json')]) == 1
+        assert [name for name in os.listdir(store_dir) if name.endswith('.lock') and name != 'records.lock'] \
+            == [f"{jobs[0]['id']}.lock"]
+
+        open(release, 'w').close()
+        assert _wait(queues[0], jobs[0]['id'])['result'] == {'waited': release}
+    finally:
+        open(release, 'w').close()
+        for queue in queues:
+            queue.shutdown()
+
+
+def _write_job(store_dir, job_id, status, task='add', args=(1, 2)):
+    job = {'id': job_id, 'task': task, 'key': job_id, 'args': list(args), 'status': status,
+           'stage': status, 'progress': 0.3, 'created_at': 0, 'updated_at': 0, 'result': None, 'error': None}
+    with open(os.path.join(store_dir, f"{job_id}.json"), 'w') as f:
+        json.dump(job, f)
+
+
+def test_interrupted_jobs_are_recovered(tmp_path):
+    store_dir = str(tmp_path / 'jobs')
+    os.makedirs(store_dir)
+    _write_job(store_dir, 'a1', RUNNING)
+    _write_job(store_dir, 'b2', QUEUED, args=(5, 5))
+    _write_job(store_dir, 'c3', DONE)
+    # Trava deixada por um processo que morreu: sem flock, não impede a retomada
+    with open(os.path.join(store_dir, 'a1.lock'), 'w') as f:
+        f.write('999999')
+
+    queue = JobQueue(store_dir, max_workers=1)
+    queue.register('add', add)
+    try:
+        assert _wait(queue, 'a1')['result'] == {'sum': 3}
+        assert _wait(queue, 'b2')['result'] == {'sum': 10}
+        assert queue.get('c3')['result'] is None
+    finally:
+        queue.shutdown()
+
+
+def test_job_claimed_by_another_process_is_not_recovered(tmp_path):
+    store_dir = str(tmp_path / 'jobs')
+    os.makedirs(store_dir)
+    _write_job(store_dir, 'a1', RUNNING)
+
+    # Outro processo do servidor está executando a tarefa e mantém a trava
+    fd = os.open(os.path.join(store_dir, 'a1.lock'), os.O_CREAT | os.O_RDWR)
+    fcntl.flock(fd, fcntl.LOCK_EX)
+    queue = JobQueue(store_dir, max_workers=1)
+    queue.register('add', add)
+    try:
+        time.sleep(0.5)
+        assert queue.get('a1')['status'] == RUNNING
+    finally:
+        queue.shutdown()
+        os.close(fd)
+
+
+def test_broken_pool_fails_the_job_and_is_rebuilt(queue):
+    crashed = queue.submit('crash', 'crash.mid')
+    job = _wait(queue, crashed['id'])
+    assert job['status'] == FAILED
+    assert job['error']
+
+    after = queue.submit('add', 'after.mid', 20, 22)
+    assert _wait(queue, after['id'])['result'] == {'sum': 42}
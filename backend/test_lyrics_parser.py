@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Testes do leitor de letras sincronizadas (backend/lyrics_parser.py).
+
+Uso (a partir da raiz do repositório):
+    python -m pytest backend/test_lyrics_parser.py
+"""
+import os
+
+from backend.lyrics_parser import parse_lyrics, parse_lyrics_file
+
+
+def test_line_tags_fractions_and_untimed_lines():
+    lyrics, metadata = parse_lyrics([
+        '[00:12.3]Primeira', '', '[01:02:03.456] Segunda', 'sem tempo', '[00:05]'
+    ])
+
+    assert lyrics == [
+        {'time': 0, 'text': 'sem tempo'},
+        {'time': 5000, 'text': ''},
+        # Arredondado, não truncado (12,3 s não vira 12299 ms)
+        {'time': 12300, 'text': 'Primeira'},
+        {'time': 3723456, 'text': 'Segunda'}
+    ]
+    assert metadata == {}
+
+
+def test_multiple_timestamps_repeat_the_line_and_its_words():
+    lyrics, _ = parse_lyrics(['[00:10.00] [01:40.00]<00:10.50>Re<00:10.80>frão <00:11.20>bis'])
+
+    assert [(line['time'], line['text']) for line in lyrics] == [(10000, 'Refrão bis'), (100000, 'Refrão bis')]
+    assert lyrics[0]['words'] == [
+        {'time': 10500, 'end': 10800, 'text': 'Re'},
+        {'time': 10800, 'end': 11200, 'text': 'frão '},
+        {'time': 11200, 'end': None, 'text': 'bis'}
+    ]
+    # As palavras da repetição acompanham o deslocamento da linha
+    assert [word['time'] for word in lyrics[1]['words']] == [100500, 100800, 101200]
+    assert [word['end'] for word in lyrics[1]['words']] == [100800, 101200, None]
+
+
+def test_offset_header_shifts_lines_and_words():
+    lyrics, metadata = parse_lyrics([
+        '[ti:Canção]', '[ar: Artista ]', '[offset:+250]',
+        '[00:00.10]Cedo', '[00:02.00]<00:02.00>Tar<00:02.40>de'
+    ])
+
+    assert metadata == {'ti': 'Canção', 'ar': 'Artista'}
+    # Positivo adianta a letra, sem tempos negativos
+    assert [line['time'] for line in lyrics] == [0, 1750]
+    assert lyrics[1]['words'] == [
+        {'time': 1750, 'end': 2150, 'text': 'Tar'},
+        {'time': 2150, 'end': None, 'text': 'de'}
+    ]
+
+    delayed, _ = parse_lyrics(['[offset:-500]', '[00:01.00]Linha'])
+    assert delayed == [{'time': 1500, 'text': 'Linha'}]
+
+    # Offset inválido é ignorado
+    ignored, _ = parse_lyrics(['[offset:abc]', '[00:01.00]Linha'])
+    assert ignored == [{'time': 1000, 'text': 'Linha'}]
+
+
+def test_word_tags_without_line_tag_start_at_the_first_word():
+    lyrics, _ = parse_lyrics(['<00:03.00>Só <00:03.50>palavras'])
+
+    assert lyrics[0]['time'] == 3000
+    assert lyrics[0]['text'] == 'Só palavras'
+
+
+def test_untagged_leading_words_take_the_line_time():
+    # Com marca de linha: a primeira palavra, sem marca, começa com a linha
+    timed, _ = parse_lyrics(['[00:10.00]Quando <00:10.50>você <00:11.00>vem'])
+    assert timed[0]['time'] == 10000
+    assert timed[0]['text'] == 'Quando você vem'
+    assert [(word['time'], word['end']) for word in timed[0]['words']] == \
+        [(10000, 10500), (10500, 11000), (11000, None)]
+
+    # Sem marca de linha: a linha começa na primeira palavra marcada, e o
+    # texto nunca fica com as marcas
+    untimed, _ = parse_lyrics(['Quando <00:10.50>você <00:11.00>vem'])
+    assert untimed[0]['time'] == 10500
+    assert untimed[0]['text'] == 'Quando você vem'
+    assert untimed[0]['words'][0] == {'time': 10500, 'end': 10500, 'text': 'Quando '}
+
+
+def test_file_result_is_reused_until_the_file_changes(tmp_path):
+    path = tmp_path / 'letra.txt'
+    path.write_text('[00:01.00]Um\n', encoding='utf-8')
+
+    first = parse_lyrics_file(str(path))
+    assert parse_lyrics_file(str(path)) is first
+
+    path.write_text('[00:02.00]Dois\n', encoding='utf-8')
+    os.utime(path, ns=(0, os.stat(path).st_mtime_ns + 1_000_000))
+    assert parse_lyrics_file(str(path))[0] == [{'time': 2000, 'text': 'Dois'}]
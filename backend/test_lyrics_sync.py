@@ -3,6 +3,10 @@ import os
 import json
 import sys
 
+# Permite executar o script de dentro de backend/ (python test_lyrics_sync.py)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from backend.lyrics_parser import parse_lyrics_file
+
 def test_lyrics_sync(lyrics_path, chords_path):
     """
     Testa a sincronização entre letras e acordes
@@ -12,57 +16,13 @@ def test_lyrics_sync(lyrics_path, chords_path):
     print(f"Arquivo de acordes: {chords_path}")
     
     try:
-        # Carregar o arquivo de letras
-        with open(lyrics_path, 'r') as f:
-            lyrics_content = f.readlines()
-        
-        # Processar as linhas da letra com timestamps
-        lyrics_data = []
-        for line in lyrics_content:
-            line = line.strip()
-            if line:
-                # Verificar se a linha tem formato de timestamp [00:00:00]
-                if line.startswith('[') and ']' in line:
-                    time_str = line[1:line.index(']')]
-                    text = line[line.index(']')+1:].strip()
-                    
-                    # Converter timestamp para milissegundos
-                    try:
-                        parts = time_str.split(':')
-                        if len(parts) == 3:  # hh:mm:ss
-                            hours, minutes, seconds = map(float, parts)
-                            time_ms = int((hours * 3600 + minutes * 60 + seconds) * 1000)
-                        elif len(parts) == 2:  # mm:ss
-                            minutes, seconds = map(float, parts)
-                            time_ms = int((minutes * 60 + seconds) * 1000)
-                        else:
-                            time_ms = 0
-                        
-                        lyrics_data.append({
-                            'time': time_ms,
-                            'text': text
-                        })
-                    except Exception as e:
-                        print(f"Erro ao processar timestamp: {e}")
-                        # Se falhar na conversão, adicionar com tempo 0
-                        lyrics_data.append({
-                            'time': 0,
-                            'text': line
-                        })
-                else:
-                    # Linha sem timestamp, adicionar com tempo 0
-                    lyrics_data.append({
-                        'time': 0,
-                        'text': line
-                    })
+        # Carregar o arquivo de letras (mesmo leitor usado pela API)
+        lyrics_data, _ = parse_lyrics_file(lyrics_path)
         
         # Carregar o arquivo de acordes
         with open(chords_path, 'r') as f:
             chords_data = json.load(f)
         
-        # Ordenar os dados por tempo
-        lyrics_data.sort(key=lambda x: x['time'])
-        
         # Criar uma simulação de sincronização
         print("\nSimulação de sincronização:")
         
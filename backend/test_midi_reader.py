@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Testes do leitor de MIDI (backend/midi_reader.py).
+
+Uso (a partir da raiz do repositório):
+    python -m pytest backend/test_midi_reader.py
+"""
+import struct
+
+import pytest
+
+from backend.midi_reader import MidiFormatError, TempoMap, read_midi
+
+
+def _track(*events):
+    """Bloco MTrk a partir de pares (delta em ticks, bytes do evento)."""
+    data = b''.join(bytes([delta]) + message for delta, message in events) + b'\x00\xff\x2f\x00'
+    return b'MTrk' + struct.pack('>I', len(data)) + data
+
+
+def _midi(*tracks, midi_format=1, division=480):
+    return b'MThd' + struct.pack('>IHHH', 6, midi_format, len(tracks), division) + b''.join(tracks)
+
+
+def _tempo(microseconds):
+    return b'\xff\x51\x03' + microseconds.to_bytes(3, 'big')
+
+
+def test_tempo_map_across_tempo_changes():
+    # 120 BPM até o tick 960, 60 BPM até o 1920 e 240 BPM depois
+    tempo_map = TempoMap([(1920, 250000), (960, 1000000)], ticks_per_beat=480)
+
+    assert tempo_map.tick_to_ms(0) == 0.0
+    assert tempo_map.tick_to_ms(480) == pytest.approx(500.0)
+    assert tempo_map.tick_to_ms(960) == pytest.approx(1000.0)
+    assert tempo_map.tick_to_ms(1440) == pytest.approx(2000.0)
+    assert tempo_map.tick_to_ms(1920) == pytest.approx(3000.0)
+    assert tempo_map.tick_to_ms(2400) == pytest.approx(3250.0)
+    assert list(tempo_map.ticks_to_ms([2400, 0, 1440, 960])) == pytest.approx([3250.0, 0.0, 2000.0, 1000.0])
+    assert tempo_map.quarters_to_ms(3) == pytest.approx(2000.0)
+
+
+def test_tempo_map_same_tick_keeps_last_and_smpte_ignores_tempo():
+    assert TempoMap([(0, 1000000), (0, 250000)], ticks_per_beat=100).tick_to_ms(100) == pytest.approx(250.0)
+    assert TempoMap([(0, 1000000)], ticks_per_second=1000).tick_to_ms(500) == pytest.approx(500.0)
+
+
+def test_read_midi_notes_and_tempo():
+    conductor = _track((0, _tempo(500000)), (120, _tempo(1000000)))
+    # Dó e mi juntos, depois outro dó; running status e velocidade 0 como desligamento
+    notes = _track((0, b'\x90\x3c\x40'), (0, b'\x40\x40'), (120, b'\x80\x3c\x00'),
+                   (0, b'\x90\x40\x00'), (0, b'\x3c\x50'), (120, b'\x3c\x00'))
+    table = read_midi(_midi(conductor, notes, division=120))
+
+    assert list(table.pitch) == [60, 64, 60]
+    assert list(table.velocity) == [64, 64, 80]
+    assert list(table.track) == [1, 1, 1]
+    assert list(table.start_tick) == [0, 0, 120]
+    assert list(table.end_tick) == [120, 120, 240]
+    assert list(table.start_ms) == pytest.approx([0.0, 0.0, 500.0])
+    assert list(table.end_ms) == pytest.approx([500.0, 500.0, 1500.0])
+    assert table.note_tracks == {1}
+
+
+def test_overlapping_notes_pair_in_start_order_and_unterminated_are_dropped():
+    notes = _track((0, b'\x90\x3c\x40'), (10, b'\x90\x3c\x41'), (10, b'\x80\x3c\x00'),
+                   (10, b'\x90\x3e\x40'), (10, b'\x80\x3c\x00'))
+    table = read_midi(_midi(notes))
+
+    # O ré nunca é desligado; o primeiro dó ligado é o primeiro desligado
+    assert list(table.pitch) == [60, 60]
+    assert list(table.velocity) == [64, 65]
+    assert list(table.start_tick) == [0, 10]
+    assert list(table.end_tick) == [20, 40]
+    assert table.note_tracks == {0}
+
+
+def test_time_signatures_are_recorded_per_track():
+    conductor = _track((0, b'\xff\x58\x04\x03\x02\x18\x08'), (96, b'\xff\x58\x04\x06\x03\x18\x08'))
+    table = read_midi(_midi(conductor, _track((0, b'\x90\x3c\x40'), (10, b'\x80\x3c\x00'))))
+
+    assert table.time_signatures == [(0, 0, 3, 4), (0, 96, 6, 8)]
+    assert table.note_tracks == {1}
+
+
+@pytest.mark.parametrize('cut', [4, 10, 13, 20, 30])
+def test_truncated_file_raises_midi_format_error(cut):
+    data = _midi(_track((0, _tempo(500000)), (0, b'\x90\x3c\x40'), (120, b'\x80\x3c\x00')))
+    with pytest.raises(MidiFormatError):
+        read_midi(data[:cut])
+
+
+def test_invalid_files_raise_midi_format_error():
+    with pytest.raises(MidiFormatError):
+        read_midi(b'not a midi file')
+    with pytest.raises(MidiFormatError):
+        read_midi(_midi(_track(), division=0))
+
+
+def test_format_2_is_rejected():
+    with pytest.raises(MidiFormatError):
+        read_midi(_midi(_track((0, _tempo(500000))), _track((0, _tempo(250000))), midi_format=2))
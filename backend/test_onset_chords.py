@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Testes de backend/onset_chords.py: acordes pelos ataques simultâneos, com os
+tempos reais das notas, e nomes iguais aos do music21 (o teste comparativo é
+pulado se o music21 não estiver instalado).
+
+Uso (a partir da raiz do repositório):
+    python -m pytest backend/test_onset_chords.py
+"""
+from itertools import combinations
+import struct
+
+import pytest
+
+from backend.midi_reader import read_midi
+from backend.onset_chords import onset_chords, root_and_quality
+
+C_MAJOR = (60, 64, 67)
+A_MINOR = (57, 60, 64)
+
+
+def _varlen(value):
+    data = bytearray([value & 0x7F])
+    value >>= 7
+    while value:
+        data.insert(0, (value & 0x7F) | 0x80)
+        value >>= 7
+    return bytes(data)
+
+
+def _midi(*chords, channel=0, division=96):
+    """
+    SMF formato 0 com acordes em sequência.
+
+    Args:
+        chords: Triplas (pausa antes em ticks, duração em ticks, alturas); a
+                duração pode ser uma tupla com uma duração por nota
+    """
+    data = bytearray()
+    for rest, duration, pitches in chords:
+        durations = duration if isinstance(duration, tuple) else (duration,) * len(pitches)
+        for k, pitch in enumerate(pitches):
+            data += _varlen(rest if k == 0 else 0) + bytes((0x90 | channel, pitch, 64))
+        elapsed = 0
+        for end, pitch in sorted(zip(durations, pitches)):
+            data += _varlen(end - elapsed) + bytes((0x80 | channel, pitch, 0))
+            elapsed = end
+    data += b'\x00\xff\x2f\x00'
+    return (b'MThd' + struct.pack('>IHHH', 6, 0, 1, division) +
+            b'MTrk' + struct.pack('>I', len(data)) + bytes(data))
+
+
+def _midi_events(*events, division=96):
+    """SMF formato 0 a partir de pares (delta em ticks, bytes do evento)."""
+    data = b''.join(_varlen(delta) + message for delta, message in events) + b'\x00\xff\x2f\x00'
+    return (b'MThd' + struct.pack('>IHHH', 6, 0, 1, division) +
+            b'MTrk' + struct.pack('>I', len(data)) + data)
+
+
+def test_root_and_quality_of_common_chords():
+    assert root_and_quality((0, 4, 7)) == ('C', 'major')
+    assert root_and_quality((9, 0, 4)) == ('A', 'minor')
+    assert root_and_quality((11, 2, 5)) == ('B', 'diminished')
+    assert root_and_quality((0, 4, 8)) == ('C', 'augmented')
+    assert root_and_quality((7, 11, 2, 5)) == ('G', 'major')
+    assert root_and_quality((2, 6, 9)) == ('D', 'major')
+    assert root_and_quality((4, 7, 11)) == ('E', 'minor')
+    # Grafia do music21 para MIDI: F# e não G-, então mi bemol menor não é 'minor'
+    assert root_and_quality((3, 6, 10)) == ('E-', 'other')
+
+
+def test_root_and_quality_matches_music21():
+    pytest.importorskip('music21')
+    from music21 import chord, note
+
+    def midi_note(number):
+        # Grafia do music21 ao ler um MIDI (Note com pitch.midi)
+        element = note.Note()
+        element.pitch.midi = number
+        return element
+
+    for size in (2, 3, 4):
+        for pitch_classes in combinations(range(12), size):
+            element = chord.Chord([midi_note(60 + pitch_class) for pitch_class in pitch_classes])
+            assert root_and_quality(pitch_classes) == (element.root().name, element.quality), pitch_classes
+
+
+def test_chords_use_the_real_note_times():
+    # Sem quantização: o lá menor começa 2 ticks depois do tempo 2
+    data = _midi((0, 72, C_MAJOR), (26, 96, A_MINOR))
+    assert onset_chords(read_midi(data)) == [(0, 375, 'C', 'major'), (510, 1010, 'A', 'minor')]
+
+
+def test_chord_crossing_a_barline_is_not_split_or_delayed():
+    # O dó maior vai de 0 a 5 semínimas em 4/4, atravessando a barra
+    data = _midi((0, 480, C_MAJOR), (96, 192, A_MINOR))
+    assert onset_chords(read_midi(data)) == [(0, 2500, 'C', 'major'), (3000, 4000, 'A', 'minor')]
+
+
+def test_notes_ending_apart_still_form_a_chord():
+    # Notas do acorde com durações diferentes: o acorde vai até a última
+    data = _midi((0, (96, 96, 384), C_MAJOR), (0, 96, A_MINOR))
+    assert onset_chords(read_midi(data)) == [(0, 2000, 'C', 'major'), (2000, 2500, 'A', 'minor')]
+
+
+def test_melody_over_a_held_chord_and_rolled_chords():
+    # Melodia na mesma faixa sobre o dó maior sustentado: a nota isolada não é acorde
+    held = _midi_events((0, b'\x90\x3c\x40'), (0, b'\x90\x40\x40'), (0, b'\x90\x43\x40'),
+                        (96, b'\x90\x4c\x40'), (96, b'\x80\x4c\x00'),
+                        (192, b'\x80\x3c\x00'), (0, b'\x80\x40\x00'), (0, b'\x80\x43\x00'))
+    assert onset_chords(read_midi(held)) == [(0, 2000, 'C', 'major')]
+
+    # Lá menor "arpejado" (ataques 4 ticks um do outro) seguido de uma nota isolada
+    rolled = _midi_events((0, b'\x90\x39\x40'), (4, b'\x90\x3c\x40'), (4, b'\x90\x40\x40'),
+                          (88, b'\x80\x39\x00'), (0, b'\x80\x3c\x00'), (0, b'\x80\x40\x00'),
+                          (0, b'\x90\x48\x40'), (96, b'\x80\x48\x00'))
+    assert onset_chords(read_midi(rolled)) == [(0, 500, 'A', 'minor')]
+
+
+def test_percussion_notes_are_ignored():
+    data = _midi((0, (96, 96, 384), (36, 38, 42)), channel=9)
+    assert onset_chords(read_midi(data)) == []
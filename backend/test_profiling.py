@@ -0,0 +1,26 @@
+#!/usr/bin/env python3
+"""
+Testes do acesso aos perfis de extração (backend/profiling.py).
+
+Uso (a partir da raiz do repositório):
+    python -m pytest backend/test_profiling.py
+"""
+import backend.config as config
+from backend.profiling import PROFILE_HEADER, authorized, requested
+
+
+def test_without_token_profiles_are_never_exposed(monkeypatch):
+    monkeypatch.setattr(config, 'PROFILE_TOKEN', '')
+
+    assert not authorized({})
+    assert not authorized({PROFILE_HEADER: ''})
+    assert not requested({PROFILE_HEADER: ''})
+
+
+def test_token_must_match(monkeypatch):
+    monkeypatch.setattr(config, 'PROFILE_TOKEN', 'segredo')
+
+    assert authorized({PROFILE_HEADER: 'segredo'})
+    assert requested({PROFILE_HEADER: 'segredo'})
+    assert not authorized({PROFILE_HEADER: 'outro'})
+    assert not authorized({})
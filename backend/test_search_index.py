@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Testes do índice de busca em memória (backend/search_index.py).
+
+Uso (a partir da raiz do repositório):
+    python -m pytest backend/test_search_index.py
+"""
+import pytest
+
+from backend.search_index import SearchIndex, normalize, tokenize, trigrams
+
+
+@pytest.fixture
+def index():
+    index = SearchIndex()
+    index.add_song('aquarela', 'Aquarela', 'Toquinho',
+                   ['Numa folha qualquer', 'Eu desenho um sol amarelo', ''])
+    index.add_song('garota', 'Garota de Ipanema', 'Tom Jobim',
+                   ['Olha que coisa mais linda', 'Mais cheia de graça'])
+    index.add_song('sol', 'Sol de Primavera', 'Beto Guedes', ['Já choramos muito'])
+    return index
+
+
+def test_normalize_and_tokenize():
+    assert normalize('Você É') == 'voce e'
+    assert tokenize('Olá, mundo! 2x') == ['ola', 'mundo', '2x']
+    assert trigrams('sol') == {'  s', ' so', 'sol', 'ol '}
+
+
+def test_name_match_scores_above_lyrics(index):
+    results = index.search('sol')
+
+    assert [result['id'] for result in results] == ['sol', 'aquarela']
+    assert results[0]['score'] >= 1.0 and results[0]['snippet'] is None
+    assert results[1]['score'] == pytest.approx(0.5 + 1 / 5 * 0.5)
+    assert results[1]['snippet'] == 'Eu desenho um sol amarelo'
+
+
+def test_lyrics_need_all_words_in_the_same_line(index):
+    assert [result['id'] for result in index.search('coisa linda')] == ['garota']
+    assert index.search('linda graça') == []
+
+
+def test_misspelled_name_matches_by_trigrams(index):
+    results = index.search('toquino')
+
+    assert [result['id'] for result in results] == ['aquarela']
+    assert 0.6 <= results[0]['score'] < 1.0
+
+
+def test_accents_and_limit(index):
+    assert [result['id'] for result in index.search('JA CHORAMOS')] == ['sol']
+    assert len(index.search('de', limit=1)) == 1
+    assert index.search('!!') == []
+
+
+def test_reindex_and_remove(index):
+    index.add_song('sol', 'Sol de Verão', 'Beto Guedes')
+    assert index.search('primavera') == []
+    assert index.search('choramos') == []
+    assert [result['id'] for result in index.search('verao')] == ['sol']
+
+    index.remove_song('sol')
+    assert 'sol' not in index and len(index) == 2
+    assert index.search('guedes') == []
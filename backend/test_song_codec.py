@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Testes do formato compacto das músicas (backend/song_codec.py): o documento
+codificado em Python deve ser reproduzido pelo decodificador em Python e pelo
+do navegador (frontend/js/song-codec.js, executado no Node; pulado se o Node
+não estiver instalado).
+
+Uso (a partir da raiz do repositório):
+    python -m pytest backend/test_song_codec.py
+"""
+import json
+import os
+import shutil
+import subprocess
+
+import pytest
+
+import backend.alignment as alignment
+from backend.song_codec import decode_song, encode_song
+
+CODEC_SCRIPT = os.path.join(os.path.dirname(__file__), '..', 'frontend', 'js', 'song-codec.js')
+
+# Decodifica o arquivo com o SongCodec e imprime o documento em JSON
+NODE_DECODE = """
+const fs = require('fs');
+const SongCodec = require(process.argv[1]);
+const file = fs.readFileSync(process.argv[2]);
+const buffer = file.buffer.slice(file.byteOffset, file.byteOffset + file.length);
+try {
+    process.stdout.write(JSON.stringify(SongCodec.decode(buffer)));
+} catch (e) {
+    process.stdout.write(JSON.stringify({ error: e.message }));
+}
+"""
+
+
+def _document(song_id):
+    chords = [
+        {'time': 0, 'start': 0, 'end': 1500, 'chord': 'C', 'components': ['C', 'E', 'G']},
+        {'time': 1500, 'start': 1500, 'end': None, 'chord': 'F#m7', 'components': ['F#', 'A', 'C#', 'E']},
+        # Fim antes do início (zigzag negativo) e tempo além de 32 bits
+        {'time': 2000, 'start': 2000, 'end': 1900, 'chord': 'C', 'components': ['C', 'E', 'G']},
+        {'time': 5_000_000_000, 'start': 5_000_000_000, 'end': 5_000_000_500, 'chord': 'G', 'components': []}
+    ]
+    lyrics = [
+        {'time': 0, 'text': 'Coração 🎸 de estudante'},
+        {'time': 1500, 'text': 'Olá 😀 mundo', 'words': [
+            {'time': 1500, 'end': 1800, 'text': 'Olá '},
+            {'time': 1800, 'end': None, 'text': '😀 '},
+            {'time': 2100, 'end': 2400, 'text': 'mundo'}
+        ]},
+        # Palavras que não formam o texto da linha: gravada sem elas
+        {'time': 2000, 'text': '𝄞 clave'},
+        {'time': 5_000_000_000, 'text': ''}
+    ]
+    return {
+        'song_id': song_id, 'title': 'Canção 🎶', 'artist': 'Artista',
+        'lyrics': lyrics, 'chords': chords,
+        'alignment': alignment.align_song(lyrics, chords)
+    }
+
+
+def _expected(document):
+    # A linha sem as palavras correspondentes perde 'words'
+    expected = json.loads(json.dumps(document))
+    expected['lyrics'][2].pop('words', None)
+    return expected
+
+
+def _node_decode(data, tmp_path):
+    node = shutil.which('node')
+    if not node:
+        pytest.skip('Node não instalado')
+    path = tmp_path / 'song.bin'
+    path.write_bytes(data)
+    result = subprocess.run([node, '-e', NODE_DECODE, os.path.abspath(CODEC_SCRIPT), str(path)],
+                            capture_output=True, text=True, encoding='utf-8', check=True)
+    return json.loads(result.stdout)
+
+
+@pytest.mark.parametrize('song_id', [42, -7, 'minha_musica'])
+def test_python_round_trip(song_id):
+    document = _document(song_id)
+    assert decode_song(encode_song(document)) == _expected(document)
+
+
+@pytest.mark.parametrize('song_id', [42, 'minha_musica'])
+def test_browser_decoder_matches_python(song_id, tmp_path):
+    document = _document(song_id)
+    data = encode_song(document)
+
+    assert _node_decode(data, tmp_path) == _expected(document) == decode_song(data)
+
+
+def test_browser_decoder_rejects_truncated_and_foreign_data(tmp_path):
+    data = encode_song(_document(1))
+
+    assert _node_decode(data[:len(data) // 2], tmp_path) == {'error': 'Dados kplay-song truncados'}
+    assert _node_decode(b'{"song_id": 1}', tmp_path) == {'error': 'Dados não estão no formato kplay-song'}
@@ -0,0 +1,158 @@
+"""
+Recebimento de arquivos enviados, gravados em partes e identificados pelo conteúdo.
+
+UploadRequest troca o destino dos arquivos do formulário multipart: em vez
+de um buffer do Werkzeug, cada arquivo vai direto, parte a parte, para um
+arquivo temporário em UPLOAD_TMP_FOLDER, enquanto o SHA-256 é calculado. Ao
+final do envio o hash já é conhecido e store() só precisa renomear o
+temporário para o caminho definitivo, <pasta>/<hash[:2]>/<hash><extensão>.
+
+Como o caminho depende só do conteúdo, dois arquivos com o mesmo nome não
+se sobrescrevem e um arquivo repetido é detectado sem ser lido de novo.
+"""
+import hashlib
+import os
+import tempfile
+
+from flask import Request
+
+import backend.config as config
+
+
+class HashingFile:
+    """
+    Arquivo temporário que calcula o SHA-256 do que é escrito nele.
+
+    Se não for guardado com store(), é apagado ao ser fechado.
+    """
+
+    def __init__(self, directory):
+        fd, self.path = tempfile.mkstemp(dir=directory, suffix='.upload')
+        self._file = os.fdopen(fd, 'w+b')
+        self._digest = hashlib.sha256()
+        self.size = 0
+        self.stored = False
+
+    def write(self, data):
+        self._digest.update(data)
+        self.size += len(data)
+        return self._file.write(data)
+
+    def read(self, *args):
+        return self._file.read(*args)
+
+    def seek(self, *args):
+        return self._file.seek(*args)
+
+    def tell(self):
+        return self._file.tell()
+
+    def flush(self):
+        return self._file.flush()
+
+    def sync(self):
+        """Garante que o conteúdo está no disco antes de o arquivo ser renomeado."""
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def seekable(self):
+        return True
+
+    def readable(self):
+        return True
+
+    def writable(self):
+        return True
+
+    @property
+    def closed(self):
+        return self._file.closed
+
+    @property
+    def sha256(self):
+        """Hash hexadecimal do conteúdo escrito até agora."""
+        return self._digest.hexdigest()
+
+    def close(self):
+        if not self._file.closed:
+            self._file.close()
+        if not self.stored:
+            try:
+                os.remove(self.path)
+            except OSError:
+                pass
+
+    def __iter__(self):
+        return iter(self._file)
+
+
+class UploadRequest(Request):
+    """Request do Flask que grava os arquivos enviados em HashingFile."""
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        return HashingFile(config.UPLOAD_TMP_FOLDER)
+
+
+def content_path(folder, digest, extension):
+    """Caminho de um arquivo identificado pelo conteúdo."""
+    return os.path.join(folder, digest[:2], f"{digest}{extension}")
+
+
+def store(file_storage, folder, extension):
+    """
+    Move um arquivo enviado para o caminho definido pelo seu conteúdo.
+
+    Args:
+        file_storage (FileStorage): Arquivo do formulário (request.files)
+        folder (str): Pasta de destino
+        extension (str): Extensão do arquivo gravado (com o ponto)
+
+    Returns:
+        tuple: (caminho, sha256, duplicado) — duplicado é True se o mesmo
+               conteúdo já estava gravado; nesse caso o temporário é descartado
+    """
+    stream = file_storage.stream
+    if not isinstance(stream, HashingFile):
+        # Arquivo que não passou pelo UploadRequest: gravar calculando o hash
+        stream = HashingFile(config.UPLOAD_TMP_FOLDER)
+        try:
+            file_storage.save(stream)
+        except Exception:
+            stream.close()
+            raise
+
+    return _commit(stream, folder, extension)
+
+
+def store_bytes(data, folder, extension):
+    """
+    Grava um conteúdo já lido (ingestão em lote) no caminho definido por ele.
+
+    Returns:
+        tuple: (caminho, sha256, duplicado), como em store
+    """
+    stream = HashingFile(config.UPLOAD_TMP_FOLDER)
+    try:
+        stream.write(data)
+    except Exception:
+        stream.close()
+        raise
+    return _commit(stream, folder, extension)
+
+
+def _commit(stream, folder, extension):
+    digest = stream.sha256
+    path = content_path(folder, digest, extension)
+
+    if os.path.exists(path):
+        stream.close()
+        return path, digest, True
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    stream.sync()
+    # mkstemp cria o arquivo só com permissão para o dono
+    os.chmod(stream.path, 0o644)
+    os.replace(stream.path, path)
+    stream.stored = True
+    stream.close()
+    return path, digest, False
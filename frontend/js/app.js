@@ -5,9 +5,11 @@
 
 // Variáveis globais
 const API_URL = 'http://localhost:5000/api';
+const JOB_POLL_INTERVAL = 500; // Intervalo de consulta das tarefas do backend (ms)
 let midiPlayer;
 let lyricsSync;
 let currentSongId = null;
+let nextSongsCursor = null; // Cursor da próxima página da lista de músicas
 
 // Elementos DOM
 const uploadForm = document.getElementById('upload-form');
@@ -125,6 +127,8 @@ async function handleUpload(event) {
 
 /**
  * Gera acordes a partir do arquivo MIDI
+ * A extração roda em segundo plano: o backend devolve uma tarefa, que é
+ * consultada até terminar, ou os acordes, se a análise já estiver em cache
  * @param {string|number} songId - ID da música
  */
 async function generateChords(songId) {
@@ -137,7 +141,33 @@ async function generateChords(songId) {
             body: JSON.stringify({ song_id: songId })
         });
         
-        const data = await response.json();
+        const job = await response.json();
+        
+        if (!job.success) {
+            throw new Error(job.error || 'Erro ao gerar acordes');
+        }
+        
+        // Análise já em cache: os acordes vêm na própria resposta
+        if (job.cached) {
+            return job;
+        }
+        
+        // Aguardar a conclusão da tarefa
+        let status = job.status;
+        while (status !== 'done') {
+            await new Promise(resolve => setTimeout(resolve, JOB_POLL_INTERVAL));
+            
+            const statusResponse = await fetch(`${API_URL}/jobs/${job.job_id}`);
+            const jobStatus = await statusResponse.json();
+            
+            if (jobStatus.error || jobStatus.status === 'failed') {
+                throw new Error(jobStatus.error || 'Erro ao gerar acordes');
+            }
+            status = jobStatus.status;
+        }
+        
+        const resultResponse = await fetch(`${API_URL}/jobs/${job.job_id}/result`);
+        const data = await resultResponse.json();
         
         if (!data.success) {
             throw new Error(data.error || 'Erro ao gerar acordes');
@@ -157,9 +187,15 @@ async function generateChords(songId) {
  */
 async function loadSong(songId) {
     try {
-        // Obter dados da música do backend
-        const response = await fetch(`${API_URL}/get_song_data?id=${songId}`);
-        const songData = await response.json();
+        // Obter dados da música do backend (no formato compacto, se disponível;
+        // erros continuam vindo em JSON)
+        const response = await fetch(`${API_URL}/get_song_data?id=${songId}`, {
+            headers: { 'Accept': `${SongCodec.MEDIA_TYPE}, application/json;q=0.9` }
+        });
+        const contentType = response.headers.get('Content-Type') || '';
+        const songData = contentType.startsWith(SongCodec.MEDIA_TYPE)
+            ? SongCodec.decode(await response.arrayBuffer())
+            : await response.json();
         
         if (songData.error) {
             throw new Error(songData.error);
@@ -175,7 +211,7 @@ async function loadSong(songId) {
         await midiPlayer.loadMidi(midiArrayBuffer);
         
         // Carregar letras e acordes no sincronizador
-        lyricsSync.loadData(songData.lyrics, songData.chords);
+        lyricsSync.loadData(songData.lyrics, songData.chords, songData.alignment);
         
         // Mostrar a seção do player
         uploadSection.style.display = 'none';
@@ -206,16 +242,34 @@ function handleSpeedChange() {
 
 /**
  * Carrega a lista de músicas disponíveis
+ * A lista é paginada pelo backend; as páginas seguintes são acrescentadas
+ * pelo botão "Carregar mais"
+ * @param {boolean} append - Acrescentar a próxima página em vez de recarregar a lista
  */
-async function loadSongList() {
+async function loadSongList(append = false) {
     try {
-        const response = await fetch(`${API_URL}/songs`);
-        const songs = await response.json();
+        const cursorParam = append && nextSongsCursor ? `?cursor=${encodeURIComponent(nextSongsCursor)}` : '';
+        const response = await fetch(`${API_URL}/songs${cursorParam}`);
+        const page = await response.json();
+        
+        if (page.error) {
+            throw new Error(page.error);
+        }
         
-        // Limpar lista atual
-        songList.innerHTML = '';
+        const songs = page.songs;
+        nextSongsCursor = page.next_cursor;
         
-        if (songs.length === 0) {
+        // Limpar lista atual (ou apenas o botão da página anterior)
+        if (append) {
+            const loadMoreBtn = songList.querySelector('.load-more');
+            if (loadMoreBtn) {
+                loadMoreBtn.remove();
+            }
+        } else {
+            songList.innerHTML = '';
+        }
+        
+        if (!append && songs.length === 0) {
             // Mostrar mensagem de lista vazia
             const emptyMessage = document.createElement('p');
             emptyMessage.className = 'empty-message';
@@ -239,6 +293,15 @@ async function loadSongList() {
             songList.appendChild(songItem);
         });
         
+        // Botão para a próxima página
+        if (nextSongsCursor) {
+            const loadMoreBtn = document.createElement('button');
+            loadMoreBtn.className = 'btn control load-more';
+            loadMoreBtn.textContent = 'Carregar mais';
+            loadMoreBtn.addEventListener('click', () => loadSongList(true));
+            songList.appendChild(loadMoreBtn);
+        }
+        
     } catch (error) {
         console.error('Erro ao carregar lista de músicas:', error);
         
@@ -8,8 +8,11 @@ class LyricsSync {
         this.midiPlayer = midiPlayer;
         this.lyrics = [];
         this.chords = [];
+        this.alignment = null;
+        this.chordAnchors = {};
         this.currentLyricIndex = -1;
         this.currentChordIndex = -1;
+        this.currentWordIndex = -1;
         this.lyricsContainer = document.getElementById('lyrics-container');
         this.chordDisplay = document.getElementById('chord-display');
         
@@ -20,14 +23,24 @@ class LyricsSync {
 
     /**
      * Carrega dados de letras e acordes
-     * @param {Array} lyrics - Array de objetos de letra com tempo e texto
+     * @param {Array} lyrics - Array de objetos de letra com tempo e texto (e, nas
+     *                         letras com marcas de palavra, 'words' com tempo e texto)
      * @param {Array} chords - Array de objetos de acorde com tempo e nome
+     * @param {Object} alignment - Alinhamento calculado pelo backend: para cada
+     *                             linha, os acordes com a posição do caractere
+     *                             (opcional)
      */
-    loadData(lyrics, chords) {
+    loadData(lyrics, chords, alignment) {
         this.lyrics = lyrics || [];
         this.chords = chords || [];
+        
+        // O alinhamento só vale se corresponder às linhas recebidas
+        this.alignment = alignment && alignment.lines && alignment.lines.length === this.lyrics.length
+            ? alignment
+            : null;
         this.currentLyricIndex = -1;
         this.currentChordIndex = -1;
+        this.currentWordIndex = -1;
         
         // Renderizar letras iniciais
         this.renderLyrics();
@@ -42,17 +55,82 @@ class LyricsSync {
     renderLyrics() {
         // Limpar o container
         this.lyricsContainer.innerHTML = '';
+        this.chordAnchors = {};
         
         // Adicionar cada linha de letra
         this.lyrics.forEach((lyric, index) => {
             const line = document.createElement('div');
             line.className = 'lyrics-line';
             line.id = `lyric-${index}`;
-            line.textContent = lyric.text;
+            
+            const lineChords = this.alignment ? this.alignment.lines[index].chords : [];
+            if (lineChords.length) {
+                line.classList.add('with-chords');
+            }
+            
+            if (lyric.words && lyric.words.length) {
+                // Uma span por palavra/sílaba, destacadas conforme são cantadas
+                const spans = lyric.words.map(word => {
+                    const span = document.createElement('span');
+                    span.className = 'lyrics-word';
+                    span.textContent = word.text;
+                    line.appendChild(span);
+                    return span;
+                });
+                
+                // Acordes sobre a palavra em que começam
+                lineChords.forEach(placed => this.addChordAnchor(spans[placed.word], placed.index));
+            } else if (lineChords.length) {
+                this.renderChordSegments(line, lyric.text, lineChords);
+            } else {
+                line.textContent = lyric.text;
+            }
+            
             this.lyricsContainer.appendChild(line);
         });
     }
 
+    /**
+     * Divide o texto da linha nas posições dos acordes, com cada acorde sobre
+     * o trecho que começa na sua posição
+     * @param {HTMLElement} line - Elemento da linha
+     * @param {string} text - Texto da linha
+     * @param {Array} lineChords - Acordes alinhados à linha ({index, offset})
+     */
+    renderChordSegments(line, text, lineChords) {
+        if (lineChords[0].offset > 0) {
+            line.appendChild(document.createTextNode(text.slice(0, lineChords[0].offset)));
+        }
+        
+        let segment = null;
+        lineChords.forEach((placed, i) => {
+            // Acordes na mesma posição dividem o mesmo trecho
+            if (!segment || placed.offset !== lineChords[i - 1].offset) {
+                const next = lineChords.find(other => other.offset > placed.offset);
+                segment = document.createElement('span');
+                segment.className = 'lyrics-segment';
+                segment.textContent = text.slice(placed.offset, next ? next.offset : text.length);
+                line.appendChild(segment);
+            }
+            this.addChordAnchor(segment, placed.index);
+        });
+    }
+
+    /**
+     * Associa um acorde ao elemento sobre o qual ele é desenhado
+     * @param {HTMLElement} element - Palavra ou trecho da linha
+     * @param {number} chordIndex - Índice do acorde
+     */
+    addChordAnchor(element, chordIndex) {
+        const chord = this.chords[chordIndex];
+        if (!element || !chord) return;
+        
+        const names = element.dataset.chord ? `${element.dataset.chord} ${chord.chord}` : chord.chord;
+        element.dataset.chord = names;
+        element.classList.add('lyrics-chord');
+        this.chordAnchors[chordIndex] = element;
+    }
+
     /**
      * Atualiza o display de acordes
      * @param {string} chordName - Nome do acorde a ser exibido
@@ -66,9 +144,11 @@ class LyricsSync {
      * @param {number} index - Índice da linha a ser destacada
      */
     highlightLyric(index) {
-        // Remover destaque de todas as linhas
+        // Remover destaque de todas as linhas (e das sílabas cantadas)
         const lines = this.lyricsContainer.querySelectorAll('.lyrics-line');
         lines.forEach(line => line.classList.remove('active'));
+        this.lyricsContainer.querySelectorAll('.lyrics-word.sung')
+            .forEach(word => word.classList.remove('sung'));
         
         // Adicionar destaque à linha atual
         if (index >= 0 && index < lines.length) {
@@ -121,22 +201,47 @@ class LyricsSync {
      * @param {number} currentTime - Tempo atual em milissegundos
      */
     updateCurrentLyric(currentTime) {
-        // Encontrar a letra atual com base no tempo
-        let newIndex = -1;
-        
-        for (let i = 0; i < this.lyrics.length; i++) {
-            if (this.lyrics[i].time <= currentTime) {
-                newIndex = i;
-            } else {
-                break;
-            }
+        // Avançar a partir da linha atual (recomeçar do início se o tempo voltou)
+        let newIndex = this.currentLyricIndex;
+        if (newIndex >= 0 && this.lyrics[newIndex].time > currentTime) {
+            newIndex = -1;
+        }
+        while (newIndex + 1 < this.lyrics.length && this.lyrics[newIndex + 1].time <= currentTime) {
+            newIndex++;
         }
         
         // Se a letra mudou, atualizar a visualização
         if (newIndex !== this.currentLyricIndex) {
             this.currentLyricIndex = newIndex;
+            this.currentWordIndex = -1;
             this.highlightLyric(newIndex);
         }
+        
+        this.updateCurrentWord(currentTime);
+    }
+
+    /**
+     * Destaca as palavras/sílabas já cantadas da linha atual
+     * @param {number} currentTime - Tempo atual em milissegundos
+     */
+    updateCurrentWord(currentTime) {
+        const lyric = this.lyrics[this.currentLyricIndex];
+        if (!lyric || !lyric.words) return;
+        
+        // As palavras estão em ordem: avançar a partir da última destacada
+        let newIndex = this.currentWordIndex;
+        while (newIndex + 1 < lyric.words.length && lyric.words[newIndex + 1].time <= currentTime) {
+            newIndex++;
+        }
+        
+        if (newIndex === this.currentWordIndex) return;
+        
+        const line = document.getElementById(`lyric-${this.currentLyricIndex}`);
+        const spans = line ? line.querySelectorAll('.lyrics-word') : [];
+        for (let i = this.currentWordIndex + 1; i <= newIndex && i < spans.length; i++) {
+            spans[i].classList.add('sung');
+        }
+        this.currentWordIndex = newIndex;
     }
 
     /**
@@ -144,33 +249,44 @@ class LyricsSync {
      * @param {number} currentTime - Tempo atual em milissegundos
      */
     updateCurrentChord(currentTime) {
-        // Encontrar o acorde atual com base no tempo
-        let newIndex = -1;
-        let chordName = '';
-        
-        for (let i = 0; i < this.chords.length; i++) {
-            if (this.chords[i].time <= currentTime) {
-                newIndex = i;
-                chordName = this.chords[i].chord;
-            } else {
-                break;
-            }
+        // Avançar a partir do acorde atual (recomeçar do início se o tempo voltou)
+        let newIndex = this.currentChordIndex;
+        if (newIndex >= 0 && this.chords[newIndex].time > currentTime) {
+            newIndex = -1;
+        }
+        while (newIndex + 1 < this.chords.length && this.chords[newIndex + 1].time <= currentTime) {
+            newIndex++;
         }
         
         // Se o acorde mudou, atualizar a visualização
         if (newIndex !== this.currentChordIndex) {
+            this.highlightChord(newIndex);
             this.currentChordIndex = newIndex;
-            this.updateChordDisplay(chordName);
+            this.updateChordDisplay(newIndex >= 0 ? this.chords[newIndex].chord : '');
         }
     }
 
+    /**
+     * Destaca, sobre a letra, o acorde atual
+     * @param {number} index - Índice do acorde (-1 para nenhum)
+     */
+    highlightChord(index) {
+        const previous = this.chordAnchors[this.currentChordIndex];
+        if (previous) previous.classList.remove('current');
+        
+        const anchor = this.chordAnchors[index];
+        if (anchor) anchor.classList.add('current');
+    }
+
     /**
      * Manipulador de evento de parada
      */
     onStop() {
         // Resetar índices
+        this.highlightChord(-1);
         this.currentLyricIndex = -1;
         this.currentChordIndex = -1;
+        this.currentWordIndex = -1;
         
         // Limpar destaques
         this.highlightLyric(-1);
@@ -1,5 +1,5 @@
 // service-worker.js
-const CACHE_NAME = 'karaoke-app-v1';
+const CACHE_NAME = 'karaoke-app-v3';
 const urlsToCache = [
   '/',
   '/index.html',
@@ -7,11 +7,16 @@ const urlsToCache = [
   '/js/app.js',
   '/js/midi-player.js',
   '/js/lyrics-sync.js',
+  '/js/song-codec.js',
   '/manifest.json',
   'https://cdn.jsdelivr.net/npm/tone@14.7.77/build/Tone.min.js',
   'https://cdn.jsdelivr.net/npm/@tonejs/midi@2.0.28/dist/Midi.min.js'
 ];
 
+// Respostas da API que podem ser guardadas (e revalidadas) para uso offline;
+// as demais (tarefas, busca, listagem) sempre vão à rede
+const CACHEABLE_API = ['/api/get_song_data'];
+
 // Instalação do service worker e cache dos recursos
 self.addEventListener('install', event => {
   event.waitUntil(
@@ -23,45 +28,82 @@ self.addEventListener('install', event => {
   );
 });
 
-// Interceptação de requisições para servir do cache quando offline
+// Interceptação de requisições
 self.addEventListener('fetch', event => {
-  event.respondWith(
-    caches.match(event.request)
-      .then(response => {
-        // Cache hit - retorna a resposta do cache
-        if (response) {
-          return response;
-        }
-        
-        // Clone da requisição
-        const fetchRequest = event.request.clone();
-        
-        return fetch(fetchRequest).then(
-          response => {
-            // Verifica se a resposta é válida
-            if(!response || response.status !== 200 || response.type !== 'basic') {
-              return response;
-            }
-            
-            // Clone da resposta
-            const responseToCache = response.clone();
-            
-            caches.open(CACHE_NAME)
-              .then(cache => {
-                cache.put(event.request, responseToCache);
-              });
-              
-            return response;
-          }
-        );
-      })
-  );
+  const request = event.request;
+  if (request.method !== 'GET') {
+    return;
+  }
+
+  const url = new URL(request.url);
+
+  // Bibliotecas do CDN têm a versão na URL: o cache vale para sempre
+  if (url.origin !== self.location.origin) {
+    event.respondWith(cacheFirst(request));
+    return;
+  }
+
+  if (url.pathname.startsWith('/api/') && !CACHEABLE_API.includes(url.pathname)) {
+    return;
+  }
+
+  event.respondWith(revalidate(request));
 });
 
+/**
+ * Serve do cache; busca na rede só o que não estiver nele
+ */
+async function cacheFirst(request) {
+  const cached = await caches.match(request);
+  if (cached) {
+    return cached;
+  }
+
+  const response = await fetch(request);
+  if (response.ok) {
+    const cache = await caches.open(CACHE_NAME);
+    cache.put(request, response.clone());
+  }
+  return response;
+}
+
+/**
+ * Revalida a cópia em cache com o ETag: o servidor responde 304 sem corpo
+ * quando nada mudou. Sem rede, usa a cópia em cache
+ */
+async function revalidate(request) {
+  const cache = await caches.open(CACHE_NAME);
+  const cached = await cache.match(request);
+
+  const headers = new Headers(request.headers);
+  const etag = cached && cached.headers.get('ETag');
+  if (etag) {
+    headers.set('If-None-Match', etag);
+  }
+
+  try {
+    // cache: 'no-store' para a revalidação não passar de novo pelo cache HTTP
+    const response = await fetch(request.url, { headers: headers, cache: 'no-store', credentials: 'same-origin' });
+
+    if (response.status === 304 && cached) {
+      return cached;
+    }
+    if (response.ok) {
+      cache.put(request, response.clone());
+    }
+    return response;
+  } catch (error) {
+    if (cached) {
+      return cached;
+    }
+    throw error;
+  }
+}
+
 // Atualização do service worker
 self.addEventListener('activate', event => {
   const cacheWhitelist = [CACHE_NAME];
-  
+
   event.waitUntil(
     caches.keys().then(cacheNames => {
       return Promise.all(
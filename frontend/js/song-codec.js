@@ -0,0 +1,207 @@
+/**
+ * song-codec.js
+ * Decodificador do formato binário compacto das músicas (application/x-kplay-song)
+ *
+ * Espelha backend/song_codec.py: os dois precisam mudar juntos (FORMAT_VERSION).
+ */
+
+const SongCodec = (() => {
+    const MEDIA_TYPE = 'application/x-kplay-song';
+    const MAGIC = [0x4B, 0x50, 0x53]; // 'KPS'
+    const FORMAT_VERSION = 1;
+    const ID_INT = 0;
+    const LINE_HAS_WORDS = 1;
+
+    const utf8 = new TextDecoder('utf-8');
+
+    /**
+     * Decodifica um documento de música
+     *
+     * Cada música é decodificada uma única vez, quase sempre antes de o JIT
+     * otimizar este código: por isso a leitura usa variáveis locais e um
+     * caminho curto para varints de um byte (a maioria), em vez de métodos de
+     * um objeto leitor.
+     * @param {ArrayBuffer} buffer - Corpo da resposta
+     * @returns {Object} Documento no mesmo formato do JSON de /api/get_song_data
+     */
+    function decode(buffer) {
+        const bytes = new Uint8Array(buffer);
+        const length = bytes.length;
+        let position = 0;
+
+        function truncated() {
+            return new Error('Dados kplay-song truncados');
+        }
+
+        function byte() {
+            if (position >= length) {
+                throw truncated();
+            }
+            return bytes[position++];
+        }
+
+        // As verificações de limite ficam aqui dentro (e não em byte()) para
+        // poupar uma chamada por byte enquanto o código é interpretado
+        function varint() {
+            if (position >= length) {
+                throw truncated();
+            }
+            let byteValue = bytes[position++];
+            if (byteValue < 0x80) {
+                return byteValue;
+            }
+            // Multiplicação em vez de << para não estourar 32 bits
+            let value = byteValue & 0x7F;
+            let scale = 128;
+            do {
+                if (position >= length) {
+                    throw truncated();
+                }
+                byteValue = bytes[position++];
+                value += (byteValue & 0x7F) * scale;
+                scale *= 128;
+            } while (byteValue & 0x80);
+            return value;
+        }
+
+        function signed() {
+            return signedValue(varint());
+        }
+
+        function text() {
+            const size = varint();
+            if (position + size > length) {
+                throw truncated();
+            }
+            position += size;
+            return utf8.decode(bytes.subarray(position - size, position));
+        }
+
+        for (let i = 0; i < MAGIC.length; i++) {
+            if (byte() !== MAGIC[i]) {
+                throw new Error('Dados não estão no formato kplay-song');
+            }
+        }
+        const version = byte();
+        if (version !== FORMAT_VERSION) {
+            throw new Error(`Versão do formato não suportada: ${version}`);
+        }
+
+        const songId = byte() === ID_INT ? signed() : text();
+        const song = {
+            song_id: songId,
+            title: text(),
+            artist: text()
+        };
+
+        const strings = new Array(varint());
+        for (let i = 0; i < strings.length; i++) {
+            strings[i] = text();
+        }
+
+        // Acordes
+        const chordCount = varint();
+        const chords = new Array(chordCount);
+        let time = 0;
+        for (let i = 0; i < chordCount; i++) {
+            time += signed();
+            const duration = varint();
+            const name = strings[varint()];
+            const componentCount = varint();
+            const components = new Array(componentCount);
+            for (let j = 0; j < componentCount; j++) {
+                components[j] = strings[varint()];
+            }
+            chords[i] = {
+                time: time,
+                start: time,
+                end: duration ? time + signedValue(duration - 1) : null,
+                chord: name,
+                components: components
+            };
+        }
+
+        // Letra: textos em um único bloco, decodificado uma vez e recortado
+        // pelos tamanhos (em unidades UTF-16, as do String)
+        const lineCount = varint();
+        const lyrics = new Array(lineCount);
+        const blob = text();
+        let offset = 0;
+        time = 0;
+        for (let i = 0; i < lineCount; i++) {
+            time += signed();
+            const flags = varint();
+            if (flags & LINE_HAS_WORDS) {
+                const wordCount = varint();
+                const words = new Array(wordCount);
+                const lineStart = offset;
+                for (let j = 0; j < wordCount; j++) {
+                    const wordTime = time + signed();
+                    const end = varint();
+                    const size = varint();
+                    words[j] = {
+                        time: wordTime,
+                        end: end ? wordTime + signedValue(end - 1) : null,
+                        text: blob.slice(offset, offset + size)
+                    };
+                    offset += size;
+                }
+                // As palavras são consecutivas no bloco: a linha é o trecho todo
+                lyrics[i] = {
+                    time: time,
+                    text: blob.slice(lineStart, offset).trim(),
+                    words: words
+                };
+            } else {
+                const size = varint();
+                lyrics[i] = { time: time, text: blob.slice(offset, offset + size) };
+                offset += size;
+            }
+        }
+
+        song.lyrics = lyrics;
+        song.chords = chords;
+
+        // Alinhamento letra/acordes ('start' e 'end' são os tempos das linhas)
+        if (byte()) {
+            const alignmentVersion = varint();
+            const intro = new Array(varint());
+            for (let i = 0; i < intro.length; i++) {
+                intro[i] = varint();
+            }
+            const lines = new Array(lineCount);
+            for (let i = 0; i < lineCount; i++) {
+                const placed = new Array(varint());
+                for (let j = 0; j < placed.length; j++) {
+                    const index = varint();
+                    const chordOffset = varint();
+                    const word = varint();
+                    placed[j] = { index: index, offset: chordOffset, word: word ? word - 1 : null };
+                }
+                lines[i] = {
+                    start: lyrics[i].time,
+                    end: i + 1 < lineCount ? lyrics[i + 1].time : null,
+                    chords: placed
+                };
+            }
+            song.alignment = { version: alignmentVersion, intro: intro, lines: lines };
+        }
+
+        return song;
+    }
+
+    // Desfaz o zigzag dos valores com sinal
+    function signedValue(value) {
+        return value % 2 === 0 ? value / 2 : -(value + 1) / 2;
+    }
+
+    return { MEDIA_TYPE, decode };
+})();
+
+// Exportar para uso global (e para o benchmark em Node)
+if (typeof window !== 'undefined') {
+    window.SongCodec = SongCodec;
+}
+if (typeof module !== 'undefined') {
+    module.exports = SongCodec;
+}